@@ -0,0 +1,120 @@
+"""Memory benchmark: acquiescence bias correction.
+
+Compares the peak allocation (tracemalloc) of get_acquiescence_bias_corrected_skills
+with that of the former implementation, which added one column per corrected item, and
+checks that both give the same corrected skills.
+
+Usage: python benchmarks/benchmark_acquiescence_bias.py [n_obs]
+
+"""
+
+import sys
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from nc_skills_step_public.data_management import prepare_STEP_data as prd
+
+
+def make_skill_items(n_obs, seed=0):
+    """Create synthetic harmonized skill items (answers 1 to 4, some missing).
+
+    Args:
+        n_obs (int): Number of observations.
+        seed (int): Seed of the random number generator.
+
+    Returns:
+        data (pandas DataFrame): The synthetic data.
+
+    """
+    rng = np.random.default_rng(seed)
+    skill_dict = prd._skill_items_dicts_and_lists(which="skill_dict")
+    items = [item.removesuffix("_s") for items in skill_dict.values() for item in items]
+
+    answers = rng.integers(1, 5, (n_obs, len(items))).astype(float)
+    answers[rng.random(answers.shape) < 0.1] = np.nan
+
+    return pd.DataFrame(answers, columns=items)
+
+
+def get_acquiescence_bias_corrected_skills_columns(data):
+    """Former implementation: add the bias and the corrected items as columns.
+
+    Args:
+        data (pandas DataFrame): The data set.
+
+    Returns:
+        data_acq (pandas DataFrame): The data with corrected skills in addition.
+
+    """
+    data_acq = data.copy()
+    reversed_info = prd._skill_items_dicts_and_lists(which="reversed_info")
+
+    differences = [
+        (
+            data_acq[info["non_reversed"]].mean(axis=1)
+            - data_acq[info["reversed"]].mean(axis=1)
+        )
+        / 2
+        for info in reversed_info.values()
+    ]
+    data_acq["acq_bias"] = (differences[0] + differences[1] + differences[2]) / 3
+
+    for item in prd._skill_items_dicts_and_lists(which="reversed_item_list"):
+        data_acq[item + "_acq_corr"] = data_acq[item] + data_acq["acq_bias"]
+    for item in prd._skill_items_dicts_and_lists(which="non_reversed_item_list"):
+        data_acq[item + "_acq_corr"] = data_acq[item] - data_acq["acq_bias"]
+
+    skill_dict = prd._skill_items_dicts_and_lists(which="skill_dict")
+    for skill, items in skill_dict.items():
+        data_acq[skill + "_av_acq_corr"] = data_acq[
+            [item.replace("_s", "_acq_corr") for item in items]
+        ].mean(axis=1)
+        data_acq[skill + "_av_s_abcorr"] = prd._standardize(
+            data_acq[skill + "_av_acq_corr"],
+        )
+
+    return data_acq.drop(
+        columns=[col for col in data_acq if col.endswith("_av_acq_corr")],
+    )
+
+
+def peak_allocation(func, data):
+    """Measure the peak memory allocated while calling func(data).
+
+    Args:
+        func (callable): The function.
+        data (pandas DataFrame): Its argument.
+
+    Returns:
+        (float): Peak allocation in MB.
+
+    """
+    tracemalloc.start()
+    func(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return peak / 1e6
+
+
+if __name__ == "__main__":
+    n_obs = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    data = make_skill_items(n_obs)
+
+    new = prd.get_acquiescence_bias_corrected_skills(data)
+    former = get_acquiescence_bias_corrected_skills_columns(data)
+    pd.testing.assert_frame_equal(
+        new,
+        former[new.columns],
+        check_exact=False,
+        rtol=1e-12,
+    )
+
+    print(f"input: {data.memory_usage().sum() / 1e6:8.1f} MB ({n_obs} observations)")
+    for name, func in [
+        ("columns", get_acquiescence_bias_corrected_skills_columns),
+        ("array", prd.get_acquiescence_bias_corrected_skills),
+    ]:
+        print(f"{name:>7}: {peak_allocation(func, data):8.1f} MB peak allocation")
@@ -0,0 +1,148 @@
+"""Micro-benchmark: bandwidth selection from cell statistics.
+
+Selects the mserd bandwidths of several outcomes with cct_bandwidth.cct_bandwidths on
+synthetic data with the layout of the analysis data (discrete rel_cohort, reform
+dummies, clusters by reform and birth year). If rdrobust is installed, the bandwidths
+are compared with those of rdbwselect, and both are timed.
+
+The comparison was made at the default of 5,000 observations. rdbwselect needs several
+GB of memory from about 20,000 observations on. With many observations, the bandwidths
+can shrink to fewer mass points than the local polynomials need, and the selection
+raises a ValueError (rdbwselect fails as well).
+
+Usage: python benchmarks/benchmark_cct_bandwidths.py [n_obs]
+
+"""
+
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from nc_skills_step_public.analysis import cct_bandwidth as cct
+
+try:
+    import rdrobust as rdr
+except ImportError:
+    rdr = None
+
+REFORMS = ["Bolivia1994", "Colombia1991", "Vietnam1991", "Ghana1961", "Ghana1987"]
+COVS = [f"cr_{reform}" for reform in REFORMS[:-1]] + [
+    "siblings_age12",
+    "partially_treated",
+]
+
+
+def make_analysis_data(n_obs, n_outcomes=5, seed=0):
+    """Create synthetic data with the layout of the analysis data.
+
+    Args:
+        n_obs (int): Number of observations.
+        n_outcomes (int): Number of outcomes.
+        seed (int): Seed of the random number generator.
+
+    Returns:
+        data (pandas DataFrame): The synthetic data.
+
+    """
+    rng = np.random.default_rng(seed)
+    reform = rng.choice(REFORMS, n_obs)
+    rel_cohort = rng.integers(-15, 16, n_obs)
+    clusters = pd.Series(reform) + "_" + rel_cohort.astype(str)
+    data = pd.DataFrame(
+        {
+            "rel_cohort": rel_cohort,
+            "country_reform_brth_year": clusters,
+            "siblings_age12": rng.poisson(3, n_obs),
+            "partially_treated": ((rel_cohort >= -3) & (rel_cohort < 0))
+            * rng.random(n_obs),
+        },
+    )
+    for name in REFORMS[:-1]:
+        data[f"cr_{name}"] = (reform == name).astype(int)
+
+    cohort_shocks = rng.normal(scale=0.3, size=31)[rel_cohort + 15]
+    for j in range(n_outcomes):
+        data[f"y{j}"] = (
+            0.2 * (rel_cohort >= 0)
+            + 0.02 * rel_cohort
+            + 0.001 * j * rel_cohort**2
+            - 0.05 * data["siblings_age12"]
+            + cohort_shocks
+            + rng.normal(size=n_obs)
+        )
+
+    return data
+
+
+def select_with_cells(data, y_vars):
+    """Select the bandwidths of all outcomes from cell statistics.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        y_vars (list): The outcomes.
+
+    Returns:
+        (dict): The bws tables, see cct_bandwidth.cct_bandwidths.
+
+    """
+    return cct.cct_bandwidths(
+        y=data[y_vars],
+        x=data["rel_cohort"],
+        covs=data[COVS],
+        cluster=data["country_reform_brth_year"],
+        kernel="uniform",
+    )
+
+
+def select_with_rdbwselect(data, y_vars):
+    """Select the bandwidths of all outcomes with rdbwselect, one after the other.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        y_vars (list): The outcomes.
+
+    Returns:
+        (dict): The bws tables of rdbwselect.
+
+    """
+    return {
+        y_var: rdr.rdbwselect(
+            y=data[y_var],
+            x=data["rel_cohort"],
+            covs=data[COVS],
+            cluster=data["country_reform_brth_year"],
+            kernel="uniform",
+        ).bws
+        for y_var in y_vars
+    }
+
+
+if __name__ == "__main__":
+    n_obs = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    data = make_analysis_data(n_obs)
+    y_vars = [col for col in data if col.startswith("y")]
+
+    selectors = [("cells", select_with_cells)]
+    if rdr is not None:
+        selectors.append(("rdbwselect", select_with_rdbwselect))
+        cells = select_with_cells(data, y_vars)
+        reference = select_with_rdbwselect(data, y_vars)
+        for y_var in y_vars:
+            np.testing.assert_allclose(
+                cells[y_var].to_numpy(),
+                reference[y_var].to_numpy(),
+                rtol=1e-6,
+            )
+    else:
+        print("rdrobust is not installed, the bandwidths are not compared.")
+
+    for name, func in selectors:
+        seconds = min(
+            timeit.repeat(lambda func=func: func(data, y_vars), number=1, repeat=3),
+        )
+        print(
+            f"{name:>10}: {seconds * 1000:8.1f} ms "
+            f"({n_obs} observations, {len(y_vars)} outcomes)",
+        )
@@ -0,0 +1,103 @@
+"""Micro-benchmark: recoding of the skill items in harmonize_skill_items.
+
+Compares the array-based recoding with the former item-by-item loop on synthetic data
+and checks that both give the same result.
+
+Usage: python benchmarks/benchmark_harmonize_skill_items.py [n_obs]
+
+"""
+
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from nc_skills_step_public.data_management import prepare_STEP_data as prd
+
+COUNTRIES = [
+    "Armenia",
+    "Bolivia",
+    "Colombia",
+    "Georgia",
+    "Ghana",
+    "Kenya",
+    "Laos",
+    "Macedonia",
+    "Sri_Lanka",
+    "Ukraine",
+    "Vietnam",
+    "Yunnan",
+]
+
+
+def make_skill_items(n_obs, seed=0):
+    """Create synthetic raw skill items (answers 1 to 4, some missing or invalid).
+
+    Args:
+        n_obs (int): Number of observations.
+        seed (int): Seed of the random number generator.
+
+    Returns:
+        data (pandas DataFrame): The synthetic data.
+
+    """
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({"country": rng.choice(COUNTRIES, n_obs)})
+
+    for item in [f"m6a_q01{i:02d}" for i in range(1, 25)]:
+        answers = rng.integers(1, 5, n_obs).astype(float)
+        answers[rng.random(n_obs) < 0.05] = np.nan
+        answers[rng.random(n_obs) < 0.01] = 9
+        data[item] = answers
+
+    return data
+
+
+def harmonize_skill_items_loop(data):
+    """Former implementation: recode the items one by one.
+
+    Args:
+        data (pandas DataFrame): The data set.
+
+    Returns:
+        data_r (pandas DataFrame): The data with harmonized items instead.
+
+    """
+    item_recoding = prd._skill_items_dicts_and_lists(which="item_recoding")
+
+    data_r = data.copy()
+
+    for wave in item_recoding.values():
+        for item in wave["items"]:
+            data_r[wave["items"][item]] = data_r[item]
+
+    for wave in item_recoding.values():
+        for item in wave["items"]:
+            data_r.loc[
+                data_r["country"].isin(wave["countries"]),
+                wave["items"][item],
+            ] = data_r.loc[data_r["country"].isin(wave["countries"]), item].replace(
+                {1: 4, 2: 3, 3: 2, 4: 1},
+            )
+
+    return data_r.drop(
+        columns=[item for wave in item_recoding.values() for item in wave["items"]],
+    )
+
+
+if __name__ == "__main__":
+    n_obs = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    data = make_skill_items(n_obs)
+
+    pd.testing.assert_frame_equal(
+        prd.harmonize_skill_items(data),
+        harmonize_skill_items_loop(data),
+    )
+
+    for name, func in [
+        ("loop", harmonize_skill_items_loop),
+        ("array", prd.harmonize_skill_items),
+    ]:
+        seconds = min(timeit.repeat(lambda func=func: func(data), number=1, repeat=5))
+        print(f"{name:>6}: {seconds * 1000:8.1f} ms ({n_obs} observations)")
@@ -0,0 +1,91 @@
+"""Micro-benchmark: leave one reform out by downdating.
+
+Fits the 5 year linear specification with partially treated without each reform, once
+by selecting and refitting the data without the reform (analysis_RDD_direct) and once
+by subtracting the cells of the reform from the pooled window (window_cube), and checks
+that both give the same coefficients and standard errors.
+
+Usage: python benchmarks/benchmark_leave_one_out.py [n_obs]
+
+"""
+
+import sys
+import timeit
+
+import numpy as np
+from benchmark_window_cube import REFORMS, Y_VARS, make_analysis_data
+
+from nc_skills_step_public.analysis import analysis_RDD_direct as direct
+from nc_skills_step_public.analysis import select_sample_for_analysis as sel
+from nc_skills_step_public.analysis import window_cube as wc
+
+N_YEARS = 5
+
+
+def leave_out_refit(data):
+    """Select and refit the sample without each reform.
+
+    Args:
+        data (pandas DataFrame): The data set.
+
+    Returns:
+        (list): Coefficients and standard errors of treated per reform and outcome.
+
+    """
+    estimates = []
+    for reform in REFORMS:
+        sample = sel.select_sample_for_analysis(
+            data[data["country_reform"] != reform],
+            Y_VARS,
+            N_YEARS,
+            REFORMS,
+        )
+        design = direct.build_design_matrix(sample, Y_VARS, partially_treated=True)
+        estimates.append(
+            [
+                (result["params"]["treated"], result["bse"]["treated"])
+                for result in direct.fit_design(design)
+            ],
+        )
+
+    return estimates
+
+
+def leave_out_downdate(data):
+    """Aggregate the pooled window once and downdate the cells of each reform.
+
+    Args:
+        data (pandas DataFrame): The data set.
+
+    Returns:
+        (list): Coefficients and standard errors of treated per reform and outcome.
+
+    """
+    cube = wc.build_window_cube(data, Y_VARS, N_YEARS, REFORMS)
+    results = wc.leave_one_out(cube, n_years=N_YEARS, partially_treated=True)
+
+    return [
+        [
+            (result["params"]["treated"], result["bse"]["treated"])
+            for result in (results[reform][y_var] for y_var in Y_VARS)
+        ]
+        for reform in REFORMS
+    ]
+
+
+if __name__ == "__main__":
+    n_obs = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    data = make_analysis_data(n_obs)
+
+    np.testing.assert_allclose(
+        leave_out_downdate(data),
+        leave_out_refit(data),
+        rtol=1e-8,
+    )
+
+    for name, func in [("refit", leave_out_refit), ("downdate", leave_out_downdate)]:
+        seconds = min(timeit.repeat(lambda func=func: func(data), number=1, repeat=3))
+        print(
+            f"{name:>8}: {seconds * 1000:8.1f} ms "
+            f"({n_obs} observations, {len(REFORMS)} reforms)",
+        )
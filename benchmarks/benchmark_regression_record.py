@@ -0,0 +1,59 @@
+"""Micro-benchmark: memory held by a grid of regression results.
+
+Fits the linear specification on many bootstrap-like subsamples and keeps all results,
+once as statsmodels results and once as RegressionRecords (compact=True), and reports
+the memory still allocated after the grid (tracemalloc).
+
+Usage: python benchmarks/benchmark_regression_record.py [n_fits]
+
+"""
+
+import sys
+import tracemalloc
+
+import numpy as np
+from benchmark_window_cube import REFORMS, make_analysis_data
+
+from nc_skills_step_public.analysis import analysis_RDD as reg
+from nc_skills_step_public.analysis import select_sample_for_analysis as sel
+
+
+def run_grid(data, n_fits, compact):
+    """Fit the linear specification on n_fits subsamples and keep the results.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        n_fits (int): Number of fits.
+        compact (bool): Keep RegressionRecords instead of the statsmodels results.
+
+    Returns:
+        (list): The results.
+
+    """
+    rng = np.random.default_rng(0)
+    sample = sel.select_sample_for_analysis(data, ["y0"], 5, REFORMS)
+
+    return [
+        reg.linear_flexible_trends(
+            data=sample.sample(frac=0.5, random_state=rng.integers(2**31)),
+            y_var="y0",
+            reform_type_dummy=False,
+            partially_treated=True,
+            compact=compact,
+        )
+        for _ in range(n_fits)
+    ]
+
+
+if __name__ == "__main__":
+    n_fits = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    data = make_analysis_data(20_000)
+
+    for compact in [False, True]:
+        tracemalloc.start()
+        results = run_grid(data, n_fits, compact=compact)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        name = "record" if compact else "full"
+        print(f"{name:>6}: {current / 2**20:8.1f} MiB held by {len(results)} fits")
+        del results
@@ -0,0 +1,112 @@
+"""Micro-benchmark: bandwidth sweep from the window cube.
+
+Fits the linear specification with partially treated on the windows of 1 to 15 years,
+once by selecting and refitting every sample (analysis_RDD_direct) and once from the
+cells of one cube (window_cube), and checks that both give the same coefficients.
+
+Usage: python benchmarks/benchmark_window_cube.py [n_obs]
+
+"""
+
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from nc_skills_step_public.analysis import analysis_RDD_direct as direct
+from nc_skills_step_public.analysis import select_sample_for_analysis as sel
+from nc_skills_step_public.analysis import window_cube as wc
+
+REFORMS = ["Bolivia1994", "Colombia1991", "Vietnam1991", "Ghana1961", "Ghana1987"]
+Y_VARS = [f"y{j}" for j in range(5)]
+WINDOWS = range(1, 16)
+
+
+def make_analysis_data(n_obs, seed=0):
+    """Create synthetic data with the columns used by the RDD regressions.
+
+    Args:
+        n_obs (int): Number of observations.
+        seed (int): Seed of the random number generator.
+
+    Returns:
+        data (pandas DataFrame): The synthetic data.
+
+    """
+    rng = np.random.default_rng(seed)
+    reform = rng.choice(REFORMS, n_obs)
+    rel_cohort = rng.integers(-15, 15, n_obs)
+    data = pd.DataFrame(
+        {
+            "country_reform": reform,
+            "rel_cohort": rel_cohort,
+            "treated": (rel_cohort >= 0).astype(float),
+            "partially_treated": ((reform == "Vietnam1991") & (rel_cohort >= -3))
+            * (rel_cohort < 0),
+            "siblings_age12": rng.poisson(3, n_obs).astype(float),
+            "age": rng.integers(24, 60, n_obs),
+            "country_reform_brth_year": pd.Series(reform)
+            + "_"
+            + pd.Series(rel_cohort).astype(str),
+        },
+    )
+    for p in range(2, 5):
+        data[f"rel_cohort{p}"] = rel_cohort**p
+    for y_var in Y_VARS:
+        data[y_var] = 0.2 * data["treated"] + 0.01 * rel_cohort + rng.normal(size=n_obs)
+
+    return data
+
+
+def sweep_refit(data):
+    """Select the sample of every window and refit all outcomes.
+
+    Args:
+        data (pandas DataFrame): The data set.
+
+    Returns:
+        (list): Coefficients of treated per window and outcome.
+
+    """
+    coefs = []
+    for n_years in WINDOWS:
+        sample = sel.select_sample_for_analysis(data, Y_VARS, n_years, REFORMS)
+        design = direct.build_design_matrix(sample, Y_VARS, partially_treated=True)
+        results = direct.fit_design(design)
+        coefs.append([result["params"]["treated"] for result in results])
+
+    return coefs
+
+
+def sweep_cube(data):
+    """Aggregate the widest window once and fit every window from the cells.
+
+    Args:
+        data (pandas DataFrame): The data set.
+
+    Returns:
+        (list): Coefficients of treated per window and outcome.
+
+    """
+    cube = wc.build_window_cube(data, Y_VARS, max(WINDOWS), REFORMS)
+    coefs = []
+    for n_years in WINDOWS:
+        results = wc.fit_window(cube, n_years=n_years, partially_treated=True)
+        coefs.append([results[y_var]["params"]["treated"] for y_var in Y_VARS])
+
+    return coefs
+
+
+if __name__ == "__main__":
+    n_obs = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    data = make_analysis_data(n_obs)
+
+    np.testing.assert_allclose(sweep_cube(data), sweep_refit(data), atol=1e-10)
+
+    for name, func in [("refit", sweep_refit), ("cube", sweep_cube)]:
+        seconds = min(timeit.repeat(lambda func=func: func(data), number=1, repeat=3))
+        print(
+            f"{name:>6}: {seconds * 1000:8.1f} ms "
+            f"({n_obs} observations, {len(WINDOWS)} windows)",
+        )
@@ -0,0 +1,111 @@
+"""Micro-benchmark: RDD regression with many reforms.
+
+Fits the quadratic specification with partially treated and a separate trend for the
+partially treated on synthetic data with an increasing number of reforms, once with the
+dense design matrix (analysis_RDD_direct.build_design_matrix and fit_design) and once
+by partialling out the reform blocks (analysis_RDD_direct.flexible_trends_within), and
+checks that both give the same coefficients and standard errors of treated.
+
+Usage: python benchmarks/benchmark_within_estimator.py [n_obs]
+
+"""
+
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from nc_skills_step_public.analysis import analysis_RDD_direct as direct
+
+Y_VARS = [f"y{j}" for j in range(5)]
+N_REFORMS = [5, 15, 40]
+SPEC = {"order": 2, "partially_treated": True, "partially_treated_trend": True}
+
+
+def make_analysis_data(n_obs, n_reforms, seed=0):
+    """Create synthetic data with the columns used by the RDD regressions.
+
+    Args:
+        n_obs (int): Number of observations.
+        n_reforms (int): Number of reforms.
+        seed (int): Seed of the random number generator.
+
+    Returns:
+        data (pandas DataFrame): The synthetic data.
+
+    """
+    rng = np.random.default_rng(seed)
+    reform = rng.integers(0, n_reforms, n_obs)
+    rel_cohort = rng.integers(-5, 5, n_obs)
+    data = pd.DataFrame(
+        {
+            "country_reform": pd.Series(reform).map("Reform{:02d}".format),
+            "rel_cohort": rel_cohort,
+            "rel_cohort2": rel_cohort**2,
+            "treated": (rel_cohort >= 0).astype(float),
+            "partially_treated": ((reform % 4 == 0) & (rel_cohort >= 0))
+            * (rel_cohort < 3),
+            "siblings_age12": rng.poisson(3, n_obs).astype(float),
+        },
+    )
+    data["country_reform_brth_year"] = (
+        data["country_reform"] + "_" + data["rel_cohort"].astype(str)
+    )
+    for y_var in Y_VARS:
+        data[y_var] = 0.2 * data["treated"] + 0.01 * rel_cohort + rng.normal(size=n_obs)
+
+    return data
+
+
+def fit_dense(data):
+    """Fit all outcomes with the dense design matrix.
+
+    Args:
+        data (pandas DataFrame): The data set.
+
+    Returns:
+        (list): Coefficients and standard errors of treated per outcome.
+
+    """
+    design = direct.build_design_matrix(data, Y_VARS, **SPEC)
+
+    return [
+        (result["params"]["treated"], result["bse"]["treated"])
+        for result in direct.fit_design(design)
+    ]
+
+
+def fit_within(data):
+    """Fit all outcomes by partialling out the reform blocks.
+
+    Args:
+        data (pandas DataFrame): The data set.
+
+    Returns:
+        (list): Coefficients and standard errors of treated per outcome.
+
+    """
+    results = direct.flexible_trends_within(data, Y_VARS, **SPEC)
+
+    return [
+        (results[y_var]["params"]["treated"], results[y_var]["bse"]["treated"])
+        for y_var in Y_VARS
+    ]
+
+
+if __name__ == "__main__":
+    n_obs = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+
+    for n_reforms in N_REFORMS:
+        data = make_analysis_data(n_obs, n_reforms)
+        np.testing.assert_allclose(fit_within(data), fit_dense(data), rtol=1e-8)
+
+        for name, func in [("dense", fit_dense), ("within", fit_within)]:
+            seconds = min(
+                timeit.repeat(lambda func=func: func(data), number=1, repeat=3),
+            )
+            print(
+                f"{name:>6}: {seconds * 1000:8.1f} ms "
+                f"({n_obs} observations, {n_reforms} reforms)",
+            )
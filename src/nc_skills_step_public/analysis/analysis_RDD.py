@@ -4,6 +4,9 @@ import statsmodels.api as sm
 import statsmodels.formula.api as smf
 from patsy import dmatrices
 
+from nc_skills_step_public.analysis import analysis_RDD_direct as direct
+from nc_skills_step_public.analysis import regression_record as rec
+
 
 def linear_inflexible_trends(
     data,
@@ -12,6 +15,7 @@ def linear_inflexible_trends(
     partially_treated=False,
     partially_treated_trend=False,
     weights=None,
+    compact=False,
 ):
     """Run RDD regression with country-reform-fe and -birth-cohort-trends.
 
@@ -22,9 +26,11 @@ def linear_inflexible_trends(
         partially_treated (bool): If True: indicator for partially treated is added.
         partially_treated_trend (bool): If True: separate trend for partially treated is added.
         weights (string): Weights for WLS.
+        compact (bool): If True, a RegressionRecord is returned instead of the full
+            results, so that the model and the regression data are not kept alive.
 
     Returns:
-        results (OLSResults or WLSResults): The regression results.
+        results (OLSResults, WLSResults or RegressionRecord): The regression results.
 
     """
     if reform_type_dummy is False:
@@ -70,6 +76,9 @@ def linear_inflexible_trends(
         cov_kwds={"groups": reg_data["country_reform_brth_year"]},
     )
 
+    if compact is True:
+        return rec.RegressionRecord.from_results(results)
+
     return results
 
 
@@ -80,6 +89,7 @@ def linear_flexible_trends(
     partially_treated=False,
     partially_treated_trend=False,
     weights=None,
+    compact=False,
 ):
     """Run RDD regression allowing for different slopes before and after the cutoff.
 
@@ -90,9 +100,11 @@ def linear_flexible_trends(
         partially_treated (bool): If True: indicator for partially treated is added.
         partially_treated_trend (bool): If True: separate trend for partially treated is added.
         weights (string): Weights for WLS.
+        compact (bool): If True, a RegressionRecord is returned instead of the full
+            results, so that the model and the regression data are not kept alive.
 
     Returns:
-        results (OLSResults or WLSResults): The regression results.
+        results (OLSResults, WLSResults or RegressionRecord): The regression results.
 
     """
     if reform_type_dummy is False:
@@ -138,6 +150,9 @@ def linear_flexible_trends(
         cov_kwds={"groups": reg_data["country_reform_brth_year"]},
     )
 
+    if compact is True:
+        return rec.RegressionRecord.from_results(results)
+
     return results
 
 
@@ -148,6 +163,7 @@ def quadratic_flexible_trends(
     partially_treated=False,
     partially_treated_trend=False,
     weights=None,
+    compact=False,
 ):
     """Run RDD regression with quadratic age trends and different slopes at the cutoff.
 
@@ -158,9 +174,11 @@ def quadratic_flexible_trends(
         partially_treated (bool): If True: indicator for partially treated is added.
         partially_treated_trend (bool): If True: separate trend for partially treated is added.
         weights (string): Weights for WLS.
+        compact (bool): If True, a RegressionRecord is returned instead of the full
+            results, so that the model and the regression data are not kept alive.
 
     Returns:
-        results (OLSResults or WLSResults): The regression results.
+        results (OLSResults, WLSResults or RegressionRecord): The regression results.
 
     """
     if reform_type_dummy is False:
@@ -229,21 +247,27 @@ def quadratic_flexible_trends(
         cov_kwds={"groups": reg_data["country_reform_brth_year"]},
     )
 
+    if compact is True:
+        return rec.RegressionRecord.from_results(results)
+
     return results
 
 
 def cubic_flexible_trends(
     data,
     y_var,
+    compact=False,
 ):
     """Run RDD regression with cubic age trends and different slopes at the cutoff.
 
     Args:
         data (pandas DataFrame): The data set.
         y_var (string): Dependent variable.
+        compact (bool): If True, a RegressionRecord is returned instead of the full
+            results, so that the model and the regression data are not kept alive.
 
     Returns:
-        results (OLSResults): The regression results.
+        results (OLSResults or RegressionRecord): The regression results.
 
     """
     subset = [
@@ -280,21 +304,27 @@ def cubic_flexible_trends(
         cov_kwds={"groups": reg_data["country_reform_brth_year"]},
     )
 
+    if compact is True:
+        return rec.RegressionRecord.from_results(results)
+
     return results
 
 
 def quartic_flexible_trends(
     data,
     y_var,
+    compact=False,
 ):
     """Run RDD regression with quartic age trends and different slopes at the cutoff.
 
     Args:
         data (pandas DataFrame): The data set.
         y_var (string): Dependent variable.
+        compact (bool): If True, a RegressionRecord is returned instead of the full
+            results, so that the model and the regression data are not kept alive.
 
     Returns:
-        results (OLSResults): The regression results.
+        results (OLSResults or RegressionRecord): The regression results.
 
     """
     subset = [
@@ -334,4 +364,50 @@ def quartic_flexible_trends(
         cov_kwds={"groups": reg_data["country_reform_brth_year"]},
     )
 
+    if compact is True:
+        return rec.RegressionRecord.from_results(results)
+
     return results
+
+
+def flexible_trends_multiple_outcomes(
+    data,
+    y_vars,
+    order=1,
+    reform_type_dummy=False,
+    partially_treated=False,
+    partially_treated_trend=False,
+    weights=None,
+):
+    """Run RDD regressions with flexible trends for several dependent variables.
+
+    The right-hand side is identical for all dependent variables. The reform fixed
+    effects and trends are partialled out reform by reform, once per pattern of missing
+    values in the dependent variables, and only the shared regressors enter the final
+    solve (see analysis_RDD_direct.flexible_trends_within).
+
+    Args:
+        data (pandas DataFrame): The data set.
+        y_vars (list of strings): Dependent variables.
+        order (int): 1, 2, 3 or 4. Order of the polynomial cohort trends.
+        reform_type_dummy (bool): If True: indicator for unsuccessful reforms is added.
+        partially_treated (bool): If True: indicator for partially treated is added.
+        partially_treated_trend (bool): If True: separate trend for partially treated is added.
+        weights (string): Weights for WLS.
+
+    Returns:
+        results (dict): Keys are the dependent variables, values are dictionaries with
+            coefficients ("params"), clustered standard errors ("bse") and p-values
+            ("pvalues") of treated, treated:unsuccessful_reform, partially_treated and
+            siblings_age12, and the number of observations ("nobs").
+
+    """
+    return direct.flexible_trends_within(
+        data=data,
+        y_vars=y_vars,
+        order=order,
+        reform_type_dummy=reform_type_dummy,
+        partially_treated=partially_treated,
+        partially_treated_trend=partially_treated_trend,
+        weights=weights,
+    )
@@ -0,0 +1,548 @@
+"""RDD regressions with a directly built design matrix.
+
+The functions in this file estimate the same models as the functions with flexible
+trends in analysis_RDD.py. Instead of parsing a formula with patsy, the design matrix
+with the reform fixed effects and the reform-specific polynomial trends is built
+directly from NumPy arrays and solved with a QR decomposition. Standard errors are
+clustered and include the same small-sample correction as statsmodels.
+
+flexible_trends_within does not build the columns of the reform fixed effects and
+trends at all, but partials them out reform by reform. Its cost grows linearly in the
+number of reforms.
+
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import linalg, stats
+
+
+def flexible_trends_direct(
+    data,
+    y_var,
+    order=1,
+    reform_type_dummy=False,
+    partially_treated=False,
+    partially_treated_trend=False,
+    weights=None,
+    cluster="country_reform_brth_year",
+):
+    """Run RDD regression with reform-specific polynomial trends without patsy.
+
+    The model is identical to linear_flexible_trends (order=1),
+    quadratic_flexible_trends (order=2), cubic_flexible_trends (order=3, with
+    partially_treated=True) and quartic_flexible_trends (order=4, with
+    partially_treated=True) in analysis_RDD.py.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        y_var (string): Dependent variable.
+        order (int): Order of the polynomial cohort trends (1 to 4).
+        reform_type_dummy (bool): If True: indicator for unsuccessful reforms is added.
+        partially_treated (bool): If True: indicator for partially treated is added.
+        partially_treated_trend (bool): If True: separate trend for partially treated is added.
+        weights (string): Weights for WLS.
+        cluster (string): Variable defining the clusters.
+
+    Returns:
+        results (dict): Coefficients ("params"), clustered standard errors ("bse"),
+            p-values ("pvalues") as pandas Series and the number of observations
+            ("nobs").
+
+    """
+    design = build_design_matrix(
+        data=data,
+        y_vars=[y_var],
+        order=order,
+        reform_type_dummy=reform_type_dummy,
+        partially_treated=partially_treated,
+        partially_treated_trend=partially_treated_trend,
+        weights=weights,
+        cluster=cluster,
+    )
+
+    return fit_design(design)[0]
+
+
+def flexible_trends_within(
+    data,
+    y_vars,
+    order=1,
+    reform_type_dummy=False,
+    partially_treated=False,
+    partially_treated_trend=False,
+    weights=None,
+    cluster="country_reform_brth_year",
+):
+    """Run RDD regressions with flexible trends by partialling out the reform blocks.
+
+    The reform fixed effects and the reform-specific trends are non-zero only within
+    their own reform. By the Frisch-Waugh-Lovell theorem, the coefficients of the
+    shared regressors (treated, treated x unsuccessful_reform, partially_treated and
+    siblings_age12) follow from regressing the residuals of the dependent variables on
+    the residuals of the shared regressors, both residualized on the columns of their
+    own reform, one reform at a time. The design matrix with one block of columns per
+    reform is never built, so that time and memory grow linearly in the number of
+    reforms.
+
+    The coefficients, clustered standard errors and p-values of the shared regressors
+    are the same as those of flexible_trends_direct. The small-sample correction counts
+    the partialled out columns. Shared regressors which lie in the span of the block
+    columns (e.g. treated if the window is too short for the order of the trends) are
+    not identified. They get a zero coefficient, whereas statsmodels reports an
+    arbitrary minimum norm solution.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        y_vars (list of strings): Dependent variables.
+        order (int): Order of the polynomial cohort trends (1 to 4).
+        reform_type_dummy (bool): If True: indicator for unsuccessful reforms is added.
+        partially_treated (bool): If True: indicator for partially treated is added.
+        partially_treated_trend (bool): If True: separate trend for partially treated is added.
+        weights (string): Weights for WLS.
+        cluster (string): Variable defining the clusters.
+
+    Returns:
+        results (dict): Keys are the dependent variables, values are dictionaries with
+            the coefficients ("params"), clustered standard errors ("bse") and p-values
+            ("pvalues") of the shared regressors and the number of observations
+            ("nobs").
+
+    """
+    trend_vars = ["rel_cohort"] + [f"rel_cohort{p}" for p in range(2, order + 1)]
+    reg_data, reforms, reform_codes, cluster_codes = _regression_sample(
+        data=data,
+        trend_vars=trend_vars,
+        reform_type_dummy=reform_type_dummy,
+        partially_treated=partially_treated,
+        partially_treated_trend=partially_treated_trend,
+        weights=weights,
+        cluster=cluster,
+    )
+    treated = reg_data["treated"].to_numpy(dtype=float)
+
+    # Shared regressors, in the order of build_design_matrix.
+    shared = [treated]
+    names = ["treated"]
+    if reform_type_dummy is True:
+        shared.append(treated * reg_data["unsuccessful_reform"].to_numpy(dtype=float))
+        names.append("treated:unsuccessful_reform")
+    if partially_treated is True:
+        shared.append(reg_data["partially_treated"].to_numpy(dtype=float))
+        names.append("partially_treated")
+    shared.append(reg_data["siblings_age12"].to_numpy(dtype=float))
+    names.append("siblings_age12")
+
+    # Columns of one reform block: constant, trends, treated x trends and the trend of
+    # the partially treated.
+    trends = [reg_data[var].to_numpy(dtype=float) for var in trend_vars]
+    block = [np.ones(len(reg_data)), *trends, *(treated * trend for trend in trends)]
+    if partially_treated_trend is True:
+        block.append(reg_data["partially_treated"].to_numpy(dtype=float) * trends[0])
+
+    X = np.column_stack(shared)
+    Z = np.column_stack(block)
+    Y = reg_data[y_vars].to_numpy(dtype=float, na_value=np.nan)
+    if weights is not None:
+        sqrt_weights = np.sqrt(reg_data[weights].to_numpy(dtype=float))[:, None]
+        X, Z, Y = X * sqrt_weights, Z * sqrt_weights, Y * sqrt_weights
+
+    # Number of columns of the full design matrix, for the small-sample correction.
+    n_params = X.shape[1] + len(reforms) * Z.shape[1]
+    not_missing = ~np.isnan(Y)
+
+    # Group the dependent variables by their pattern of missing values.
+    patterns = {}
+    for j in range(not_missing.shape[1]):
+        patterns.setdefault(not_missing[:, j].tobytes(), []).append(j)
+
+    results = {}
+    for outcomes in patterns.values():
+        rows = not_missing[:, outcomes[0]]
+        X_within, Y_within = _partial_out_blocks(
+            Z=Z[rows],
+            reform_codes=reform_codes[rows],
+            arrays=[X[rows], Y[np.ix_(rows, outcomes)]],
+        )
+        # Shared regressors in the span of the block columns are not identified.
+        identified = np.linalg.norm(X_within, axis=0) > np.sqrt(
+            np.finfo(float).eps,
+        ) * np.linalg.norm(X[rows], axis=0)
+        params = np.zeros((X.shape[1], len(outcomes)))
+        bse = np.zeros((X.shape[1], len(outcomes)))
+        params[identified], bse[identified] = _fit_ols_clustered(
+            X=X_within[:, identified],
+            Y=Y_within,
+            cluster_codes=cluster_codes[rows],
+            n_params=n_params,
+        )
+        for i, j in enumerate(outcomes):
+            results[y_vars[j]] = _results_dict(
+                params=params[:, i],
+                bse=bse[:, i],
+                names=names,
+                nobs=int(rows.sum()),
+            )
+
+    return {y_var: results[y_var] for y_var in y_vars}
+
+
+def build_design_matrix(
+    data,
+    y_vars,
+    order=1,
+    reform_type_dummy=False,
+    partially_treated=False,
+    partially_treated_trend=False,
+    weights=None,
+    cluster="country_reform_brth_year",
+):
+    """Build the design matrix of the RDD regression with flexible trends.
+
+    Rows with missing regressors are dropped. Missing values in the dependent variables
+    are kept (as NaN), so that several outcomes can share one design matrix.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        y_vars (list of strings): Dependent variables.
+        order (int): Order of the polynomial cohort trends (1 to 4).
+        reform_type_dummy (bool): If True: indicator for unsuccessful reforms is added.
+        partially_treated (bool): If True: indicator for partially treated is added.
+        partially_treated_trend (bool): If True: separate trend for partially treated is added.
+        weights (string): Weights for WLS. Rows are scaled by the root of the weights.
+        cluster (string): Variable defining the clusters.
+
+    Returns:
+        design (dict): The design matrix ("X"), the dependent variables ("Y"), the
+            column names ("names"), integer cluster codes ("cluster_codes"), integer
+            reform codes ("reform_codes"), the reforms ("reforms") and the index of
+            the used rows ("index").
+
+    """
+    trend_vars = ["rel_cohort"] + [f"rel_cohort{p}" for p in range(2, order + 1)]
+    reg_data, reforms, reform_codes, cluster_codes = _regression_sample(
+        data=data,
+        trend_vars=trend_vars,
+        reform_type_dummy=reform_type_dummy,
+        partially_treated=partially_treated,
+        partially_treated_trend=partially_treated_trend,
+        weights=weights,
+        cluster=cluster,
+    )
+
+    n_obs = len(reg_data)
+    treated = reg_data["treated"].to_numpy(dtype=float)
+
+    reform_dummies = np.zeros((n_obs, len(reforms)))
+    reform_dummies[np.arange(n_obs), reform_codes] = 1
+
+    columns = [treated[:, None]]
+    names = ["treated"]
+
+    if reform_type_dummy is True:
+        columns.append(
+            (treated * reg_data["unsuccessful_reform"].to_numpy(dtype=float))[:, None],
+        )
+        names.append("treated:unsuccessful_reform")
+
+    if partially_treated is True:
+        columns.append(reg_data["partially_treated"].to_numpy(dtype=float)[:, None])
+        names.append("partially_treated")
+
+    columns.append(reg_data["siblings_age12"].to_numpy(dtype=float)[:, None])
+    names.append("siblings_age12")
+
+    columns.append(reform_dummies)
+    names += [f"country_reform[{reform}]" for reform in reforms]
+
+    trends = [
+        reg_data[var].to_numpy(dtype=float)[:, None] * reform_dummies
+        for var in trend_vars
+    ]
+    columns += trends
+    names += [
+        f"{var}:country_reform[{reform}]" for var in trend_vars for reform in reforms
+    ]
+
+    columns += [treated[:, None] * trend for trend in trends]
+    names += [
+        f"treated:{var}:country_reform[{reform}]"
+        for var in trend_vars
+        for reform in reforms
+    ]
+
+    if partially_treated_trend is True:
+        columns.append(
+            reg_data["partially_treated"].to_numpy(dtype=float)[:, None] * trends[0],
+        )
+        names += [
+            f"partially_treated:country_reform[{reform}]:rel_cohort"
+            for reform in reforms
+        ]
+
+    X = np.hstack(columns)
+    Y = reg_data[y_vars].to_numpy(dtype=float, na_value=np.nan)
+
+    if weights is not None:
+        sqrt_weights = np.sqrt(reg_data[weights].to_numpy(dtype=float))[:, None]
+        X = X * sqrt_weights
+        Y = Y * sqrt_weights
+
+    return {
+        "X": X,
+        "Y": Y,
+        "names": names,
+        "cluster_codes": cluster_codes,
+        "reform_codes": reform_codes,
+        "reforms": reforms,
+        "index": reg_data.index,
+    }
+
+
+def fit_design(design):
+    """Fit the RDD regression for all dependent variables of a design.
+
+    Dependent variables with the same pattern of missing values share one
+    factorization of the design matrix and are solved as a multi-column right-hand
+    side. The clustered covariance matrices of all these outcomes are computed in one
+    vectorized pass.
+
+    Args:
+        design (dict): The design, see build_design_matrix.
+
+    Returns:
+        results (list of dicts): The regression results, in the order of the columns
+            of design["Y"].
+
+    """
+    not_missing = ~np.isnan(design["Y"])
+
+    # Group the dependent variables by their pattern of missing values.
+    patterns = {}
+    for j in range(not_missing.shape[1]):
+        patterns.setdefault(not_missing[:, j].tobytes(), []).append(j)
+
+    results = [None] * not_missing.shape[1]
+    for outcomes in patterns.values():
+        rows = not_missing[:, outcomes[0]]
+        params, bse = _fit_ols_clustered(
+            X=design["X"][rows],
+            Y=design["Y"][np.ix_(rows, outcomes)],
+            cluster_codes=design["cluster_codes"][rows],
+        )
+        for i, j in enumerate(outcomes):
+            results[j] = _results_dict(
+                params=params[:, i],
+                bse=bse[:, i],
+                names=design["names"],
+                nobs=int(rows.sum()),
+            )
+
+    return results
+
+
+def cluster_sums(values, cluster_codes):
+    """Sum values within clusters.
+
+    Args:
+        values (numpy.ndarray): Values to be summed along the first axis.
+        cluster_codes (numpy.ndarray): Integer cluster codes for the first axis.
+
+    Returns:
+        sums (numpy.ndarray): Sums per cluster, ordered by cluster code.
+
+    """
+    order = np.argsort(cluster_codes, kind="stable")
+    sorted_codes = cluster_codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+
+    return np.add.reduceat(values[order], starts, axis=0)
+
+
+def _fit_ols_clustered(X, Y, cluster_codes, n_params=None):
+    """Solve the least squares problem and compute clustered standard errors.
+
+    If X has full column rank, a QR decomposition is used. Otherwise, the minimum norm
+    solution based on the pseudo-inverse is computed, as in statsmodels.
+
+    Args:
+        X (numpy.ndarray): Design matrix (n x k).
+        Y (numpy.ndarray): Dependent variables (n x m).
+        cluster_codes (numpy.ndarray): Integer cluster codes (n).
+        n_params (int): Number of parameters for the small-sample correction. If None,
+            the number of columns of X.
+
+    Returns:
+        params (numpy.ndarray): Coefficients (k x m).
+        bse (numpy.ndarray): Clustered standard errors (k x m).
+
+    """
+    bread, params = _bread_and_params(X=X, Y=Y)
+    resid = Y - X @ params
+
+    # Cluster sums of the scores for all outcomes at once (G x k x m).
+    cluster_scores = cluster_sums(X[:, :, None] * resid[:, None, :], cluster_codes)
+    bse = clustered_standard_errors(
+        bread=bread,
+        cluster_scores=cluster_scores,
+        n_obs=X.shape[0],
+        n_params=n_params,
+    )
+
+    return params, bse
+
+
+def clustered_standard_errors(bread, cluster_scores, n_obs, n_params=None):
+    """Compute clustered standard errors from the bread and the cluster scores.
+
+    The small-sample correction is the same as in statsmodels.
+
+    Args:
+        bread (numpy.ndarray): (X'X)^-1 (k x k).
+        cluster_scores (numpy.ndarray): Sums of the scores x_i * e_i within clusters
+            for every dependent variable (G x k x m).
+        n_obs (int): Number of observations.
+        n_params (int): Number of parameters for the small-sample correction. If None,
+            k. Larger than k if columns were partialled out (see
+            flexible_trends_within).
+
+    Returns:
+        bse (numpy.ndarray): Clustered standard errors (k x m).
+
+    """
+    n_clusters = cluster_scores.shape[0]
+    if n_params is None:
+        n_params = cluster_scores.shape[1]
+
+    meat = np.einsum("gkm,glm->mkl", cluster_scores, cluster_scores)
+    cov = np.einsum("ij,mjl,lk->mik", bread, meat, bread)
+    cov *= (n_clusters / (n_clusters - 1)) * ((n_obs - 1) / (n_obs - n_params))
+
+    return np.sqrt(np.diagonal(cov, axis1=1, axis2=2)).T
+
+
+def _regression_sample(
+    data,
+    trend_vars,
+    reform_type_dummy,
+    partially_treated,
+    partially_treated_trend,
+    weights,
+    cluster,
+):
+    """Drop rows with missing regressors and code the reforms and clusters.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        trend_vars (list of strings): The trend variables (rel_cohort, ...).
+        reform_type_dummy, partially_treated, partially_treated_trend, weights, cluster:
+            See build_design_matrix.
+
+    Returns:
+        reg_data (pandas DataFrame): The rows without missing regressors.
+        reforms (numpy.ndarray): The reforms.
+        reform_codes (numpy.ndarray): Integer reform codes (index into reforms).
+        cluster_codes (numpy.ndarray): Integer cluster codes.
+
+    """
+    subset = ["treated", *trend_vars, "country_reform", "siblings_age12"]
+    if reform_type_dummy is True:
+        subset += ["unsuccessful_reform"]
+    if partially_treated is True or partially_treated_trend is True:
+        subset += ["partially_treated"]
+    if weights is not None:
+        subset += [weights]
+
+    # Drop rows with missing regressors.
+    reg_data = data.dropna(subset=subset)
+
+    reforms, reform_codes = np.unique(
+        reg_data["country_reform"].to_numpy(dtype=str),
+        return_inverse=True,
+    )
+    _, cluster_codes = np.unique(
+        reg_data[cluster].to_numpy(dtype=str),
+        return_inverse=True,
+    )
+
+    return reg_data, reforms, reform_codes, cluster_codes
+
+
+def _partial_out_blocks(Z, reform_codes, arrays):
+    """Residualize arrays on the columns of their reform block, reform by reform.
+
+    Within every reform, the arrays are projected off an orthonormal basis of the
+    block columns. Zero or collinear block columns (e.g. the trend of the partially
+    treated in reforms without partially treated cohorts) do not enter the basis.
+
+    Args:
+        Z (numpy.ndarray): Columns of one reform block for every row (n x w).
+        reform_codes (numpy.ndarray): Integer reform codes (n).
+        arrays (list of numpy.ndarrays): Arrays with n rows.
+
+    Returns:
+        residuals (list of numpy.ndarrays): The residualized arrays.
+
+    """
+    residuals = [np.array(array, dtype=float) for array in arrays]
+    order = np.argsort(reform_codes, kind="stable")
+    sorted_codes = reform_codes[order]
+    starts = np.flatnonzero(sorted_codes[1:] != sorted_codes[:-1]) + 1
+
+    for rows in np.split(order, starts):
+        basis = linalg.orth(Z[rows])
+        for residual in residuals:
+            residual[rows] -= basis @ (basis.T @ residual[rows])
+
+    return residuals
+
+
+def _bread_and_params(X, Y):
+    """Compute (X'X)^-1 and the least squares coefficients.
+
+    Args:
+        X (numpy.ndarray): Design matrix (n x k).
+        Y (numpy.ndarray): Dependent variables (n x m).
+
+    Returns:
+        bread (numpy.ndarray): (X'X)^-1, or pinv(X) pinv(X)' if X is rank deficient.
+        params (numpy.ndarray): Coefficients (k x m).
+
+    """
+    Q, R = linalg.qr(X, mode="economic")
+    diag_R = np.abs(np.diag(R))
+    tol = diag_R.max() * max(X.shape) * np.finfo(float).eps
+
+    if np.all(diag_R > tol):
+        R_inv = linalg.solve_triangular(R, np.eye(R.shape[0]))
+        bread = R_inv @ R_inv.T
+        params = linalg.solve_triangular(R, Q.T @ Y)
+    else:
+        X_pinv = np.linalg.pinv(X)
+        bread = X_pinv @ X_pinv.T
+        params = X_pinv @ Y
+
+    return bread, params
+
+
+def _results_dict(params, bse, names, nobs):
+    """Collect the results of one regression.
+
+    P-values are based on the normal distribution, as in statsmodels with clustered
+    standard errors.
+
+    Args:
+        params (numpy.ndarray): Coefficients.
+        bse (numpy.ndarray): Standard errors.
+        names (list of strings): Names of the regressors.
+        nobs (int): Number of observations.
+
+    Returns:
+        results (dict): The regression results.
+
+    """
+    params = pd.Series(params, index=names)
+    bse = pd.Series(bse, index=names)
+    pvalues = pd.Series(2 * stats.norm.sf(np.abs(params / bse)), index=names)
+
+    return {"params": params, "bse": bse, "pvalues": pvalues, "nobs": nobs}
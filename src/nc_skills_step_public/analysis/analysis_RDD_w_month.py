@@ -1,11 +1,14 @@
 import statsmodels.formula.api as smf
 
+from nc_skills_step_public.analysis import regression_record as rec
+
 
 def linear_inflexible_trends_w_month(
     data,
     y_var,
     partially_treated=False,
     partially_treated_trend=False,
+    compact=False,
 ):
     """Run RDD regression with country-reform-fe and -birth-month-trends.
 
@@ -14,9 +17,11 @@ def linear_inflexible_trends_w_month(
         y_var (string): Dependent variable.
         partially_treated (bool): If True: indicator for partially treated is added.
         partially_treated_trend (bool): If True: separate trend for partially treated is added.
+        compact (bool): If True, a RegressionRecord is returned instead of the full
+            results, so that the model and the regression data are not kept alive.
 
     Returns:
-        results (OLSResults): The regression results.
+        results (OLSResults or RegressionRecord): The regression results.
 
     """
     subset = [
@@ -43,6 +48,9 @@ def linear_inflexible_trends_w_month(
         cov_kwds={"groups": reg_data["country_reform_w_month_brth_year"]},
     )
 
+    if compact is True:
+        return rec.RegressionRecord.from_results(results)
+
     return results
 
 
@@ -51,6 +59,7 @@ def linear_flexible_trends_w_month(
     y_var,
     partially_treated=False,
     partially_treated_trend=False,
+    compact=False,
 ):
     """Run RDD regression allowing for different slopes before and after the cutoff.
 
@@ -59,9 +68,11 @@ def linear_flexible_trends_w_month(
         y_var (string): Dependent variable.
         partially_treated (bool): If True: indicator for partially treated is added.
         partially_treated_trend (bool): If True: separate trend for partially treated is added.
+        compact (bool): If True, a RegressionRecord is returned instead of the full
+            results, so that the model and the regression data are not kept alive.
 
     Returns:
-        results (OLSResults): The regression results.
+        results (OLSResults or RegressionRecord): The regression results.
 
     """
     subset = [
@@ -92,6 +103,9 @@ def linear_flexible_trends_w_month(
         cov_kwds={"groups": reg_data["country_reform_w_month_brth_year"]},
     )
 
+    if compact is True:
+        return rec.RegressionRecord.from_results(results)
+
     return results
 
 
@@ -100,6 +114,7 @@ def quadratic_inflexible_trends_w_month(
     y_var,
     partially_treated=False,
     partially_treated_trend=False,
+    compact=False,
 ):
     """Run RDD regression with quadratic age trends and the same slope at the cutoff.
 
@@ -108,9 +123,11 @@ def quadratic_inflexible_trends_w_month(
         y_var (string): Dependent variable.
         partially_treated (bool): If True: indicator for partially treated is added.
         partially_treated_trend (bool): If True: separate trend for partially treated is added.
+        compact (bool): If True, a RegressionRecord is returned instead of the full
+            results, so that the model and the regression data are not kept alive.
 
     Returns:
-        results (OLSResults): The regression results.
+        results (OLSResults or RegressionRecord): The regression results.
 
     """
     subset = [
@@ -146,6 +163,9 @@ def quadratic_inflexible_trends_w_month(
         cov_kwds={"groups": reg_data["country_reform_w_month_brth_year"]},
     )
 
+    if compact is True:
+        return rec.RegressionRecord.from_results(results)
+
     return results
 
 
@@ -154,6 +174,7 @@ def quadratic_flexible_trends_w_month(
     y_var,
     partially_treated=False,
     partially_treated_trend=False,
+    compact=False,
 ):
     """Run RDD regression with quadratic age trends and different slopes at the cutoff.
 
@@ -162,9 +183,11 @@ def quadratic_flexible_trends_w_month(
         y_var (string): Dependent variable.
         partially_treated (bool): If True: indicator for partially treated is added.
         partially_treated_trend (bool): If True: separate trend for partially treated is added.
+        compact (bool): If True, a RegressionRecord is returned instead of the full
+            results, so that the model and the regression data are not kept alive.
 
     Returns:
-        results (OLSResults): The regression results.
+        results (OLSResults or RegressionRecord): The regression results.
 
     """
     subset = [
@@ -202,4 +225,7 @@ def quadratic_flexible_trends_w_month(
         cov_kwds={"groups": reg_data["country_reform_w_month_brth_year"]},
     )
 
+    if compact is True:
+        return rec.RegressionRecord.from_results(results)
+
     return results
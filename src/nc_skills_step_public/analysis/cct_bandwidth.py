@@ -0,0 +1,726 @@
+"""MSE-optimal bandwidths for a discrete running variable from cell statistics.
+
+This is a NumPy implementation of the mserd and msetwo selectors of rdrobust.rdbwselect
+(Calonico, Cattaneo, and Titiunik, 2014) for sharp designs with the defaults of
+rdbwselect (vce="nn", masspoints="adjust", scaleregul=1).
+
+The running variable (e.g. rel_cohort) only takes a few distinct values (mass points).
+The kernel weights, the polynomial bases and the nearest neighbor residuals of
+rdbwselect are the same for all observations at a mass point. Every step of the
+selection is therefore a function of
+
+- the number of observations and the sums of the outcomes and covariates in each
+  (mass point, cluster) cell, and
+- the sums of squares and cross products of the outcomes and covariates at each mass
+  point.
+
+The data is aggregated to these cells once. The selection itself only works on cells,
+so its cost does not depend on the number of observations. Outcomes with the same
+missing values share the cells and are selected together.
+
+"""
+
+import numpy as np
+import pandas as pd
+
+from nc_skills_step_public.analysis import analysis_RDD_direct as direct
+
+# Constants of the rule of thumb pilot bandwidth in rdbwselect.
+KERNEL_CONSTANTS = {"uniform": 1.843, "triangular": 2.576, "epanechnikov": 2.34}
+
+KERNEL_NAMES = {
+    "uni": "uniform",
+    "uniform": "uniform",
+    "tri": "triangular",
+    "triangular": "triangular",
+    "epa": "epanechnikov",
+    "epanechnikov": "epanechnikov",
+}
+
+POINT_KEYS = ["x", "n", "sy", "syy", "sz", "szz", "szy"]
+CELL_KEYS = ["cell_point", "cell_cluster", "cell_n", "cell_sy", "cell_sz"]
+OUTCOME_KEYS = ["sy", "syy", "szy", "cell_sy"]
+
+
+def cct_bandwidths(
+    y,
+    x,
+    c=0,
+    p=1,
+    deriv=0,
+    covs=None,
+    kernel="tri",
+    bwselect="mserd",
+    cluster=None,
+    nnmatch=3,
+    scaleregul=1,
+    masspoints="adjust",
+    bwcheck=None,
+    bwrestrict=True,
+    stdvars=False,
+):
+    """Select the optimal bandwidths of several outcomes.
+
+    The arguments have the same meaning as in rdrobust.rdbwselect. As there,
+    observations with a missing outcome, running variable, covariate or cluster are
+    dropped.
+
+    Args:
+        y (pandas DataFrame): The outcomes, one per column.
+        x (pandas Series): The running variable (aligned with y).
+        c (float): The cutoff.
+        p (int): Order of the local polynomial. The bias is estimated with order p + 1.
+        deriv (int): Order of the derivative of the regression function.
+        covs (pandas DataFrame): Covariates. If None, no covariates are used.
+        kernel (string): "uniform", "triangular" or "epanechnikov".
+        bwselect (string): "mserd" (one common bandwidth) or "msetwo" (one bandwidth
+            on each side of the cutoff).
+        cluster (pandas Series): The clusters for the variance. If None, no
+            clustering.
+        nnmatch (int): Minimum number of neighbors of the nearest neighbor residuals.
+        scaleregul (float): Scaling factor of the regularization term.
+        masspoints (string): "adjust" (bwcheck of 10 if the running variable has mass
+            points, and the rule of thumb pilot bandwidth uses the number of mass
+            points instead of observations), "check" or "off".
+        bwcheck (int): Minimum number of mass points on each side within the pilot
+            bandwidths. If None, no minimum (unless set by masspoints).
+        bwrestrict (bool): Restrict the bandwidths to the range of the running variable.
+        stdvars (bool): Select the bandwidths for the standardized running variable.
+
+    Returns:
+        bws (dict): Keys are the outcomes, values are tables with the columns of the
+            bws table of rdbwselect (pandas DataFrames).
+
+    Raises:
+        ValueError: If bwselect is not supported, or if a bandwidth contains fewer mass
+            points than its local polynomial needs (where rdbwselect fails).
+
+    """
+    if bwselect not in ["mserd", "msetwo"]:
+        raise ValueError(f"bwselect must be 'mserd' or 'msetwo', not {bwselect!r}.")
+    kernel = KERNEL_NAMES[kernel.lower()]
+
+    shared = pd.concat([x.rename("x"), covs], axis=1) if covs is not None else x
+    kept = shared.notna().to_numpy().reshape(len(x), -1).all(axis=1)
+    if cluster is not None:
+        kept &= cluster.notna().to_numpy()
+        cluster_codes = pd.factorize(cluster)[0]
+    else:
+        cluster_codes = np.zeros(len(x), dtype=int)
+
+    x_values = x.to_numpy(dtype=float)
+    z_values = np.zeros((len(x), 0)) if covs is None else covs.to_numpy(dtype=float)
+    y_values = y.to_numpy(dtype=float)
+
+    # Outcomes with the same missing values use the same observations.
+    observed = ~np.isnan(y_values) & kept[:, None]
+    patterns = _missing_patterns(observed)
+
+    selected = np.empty((y_values.shape[1], 4))
+    for columns in patterns:
+        rows = observed[:, columns[0]]
+        cells = mass_point_cells(
+            x=x_values[rows],
+            y=y_values[rows][:, columns],
+            z=z_values[rows],
+            cluster_codes=cluster_codes[rows],
+        )
+        selected[columns] = _select(
+            left=_subset(cells, cells["x"] < c),
+            right=_subset(cells, cells["x"] >= c),
+            clustered=cluster is not None,
+            c=c,
+            p=p,
+            deriv=deriv,
+            kernel=kernel,
+            bwselect=bwselect,
+            nnmatch=nnmatch,
+            scaleregul=scaleregul,
+            masspoints=masspoints,
+            bwcheck=bwcheck,
+            bwrestrict=bwrestrict,
+            stdvars=stdvars,
+        )
+
+    return {
+        y_var: pd.DataFrame(
+            [selected[j]],
+            index=[bwselect],
+            columns=["h (left)", "h (right)", "b (left)", "b (right)"],
+        )
+        for j, y_var in enumerate(y.columns)
+    }
+
+
+def mass_point_cells(x, y, z, cluster_codes):
+    """Aggregate the observations to mass points and (mass point, cluster) cells.
+
+    Args:
+        x (numpy.ndarray): The running variable, shape (n,).
+        y (numpy.ndarray): The outcomes, shape (n, m).
+        z (numpy.ndarray): The covariates, shape (n, d). d may be zero.
+        cluster_codes (numpy.ndarray): Integer cluster codes, shape (n,).
+
+    Returns:
+        cells (dict): Per mass point (in ascending order): the values ("x"), the
+            numbers of observations ("n"), the sums of the outcomes ("sy"), of their
+            squares ("syy") and of the covariates ("sz"), and the cross products of the
+            covariates with themselves ("szz") and with the outcomes ("szy"). Per cell:
+            the index of its mass point ("cell_point"), its cluster code
+            ("cell_cluster"), the number of observations ("cell_n") and the sums of the
+            outcomes ("cell_sy") and covariates ("cell_sz").
+
+    """
+    points, point_codes = np.unique(x, return_inverse=True)
+    order = np.argsort(point_codes, kind="stable")
+    bounds = np.r_[0, np.cumsum(np.bincount(point_codes, minlength=len(points)))]
+    y_sorted, z_sorted = y[order], z[order]
+
+    # Cross products per mass point: one small matrix product per mass point.
+    szz = np.empty((len(points), z.shape[1], z.shape[1]))
+    szy = np.empty((len(points), z.shape[1], y.shape[1]))
+    for k in range(len(points)):
+        z_k = z_sorted[bounds[k] : bounds[k + 1]]
+        szz[k] = z_k.T @ z_k
+        szy[k] = z_k.T @ y_sorted[bounds[k] : bounds[k + 1]]
+
+    n_clusters = cluster_codes.max() + 1
+    cell_ids, cell_codes = np.unique(
+        point_codes * n_clusters + cluster_codes,
+        return_inverse=True,
+    )
+
+    return {
+        "x": points,
+        "n": np.diff(bounds),
+        "sy": direct.cluster_sums(y, point_codes),
+        "syy": direct.cluster_sums(y**2, point_codes),
+        "sz": direct.cluster_sums(z, point_codes),
+        "szz": szz,
+        "szy": szy,
+        "cell_point": cell_ids // n_clusters,
+        "cell_cluster": cell_ids % n_clusters,
+        "cell_n": np.bincount(cell_codes),
+        "cell_sy": direct.cluster_sums(y, cell_codes),
+        "cell_sz": direct.cluster_sums(z, cell_codes),
+    }
+
+
+def _select(
+    left,
+    right,
+    clustered,
+    c,
+    p,
+    deriv,
+    kernel,
+    bwselect,
+    nnmatch,
+    scaleregul,
+    masspoints,
+    bwcheck,
+    bwrestrict,
+    stdvars,
+):
+    """Select the bandwidths of the outcomes of one set of cells (see rdbwselect).
+
+    Args:
+        left (dict): Cells below the cutoff, see mass_point_cells.
+        right (dict): Cells at or above the cutoff, see mass_point_cells.
+        clustered (bool): Whether the variance is clustered.
+        c, p, deriv, kernel, bwselect, nnmatch, scaleregul, masspoints, bwcheck,
+            bwrestrict, stdvars: See cct_bandwidths.
+
+    Returns:
+        (numpy.ndarray): h (left), h (right), b (left) and b (right) of every outcome,
+            shape (m, 4).
+
+    """
+    q = p + 1
+    n = np.r_[left["n"], right["n"]]
+    n_obs = n.sum()
+
+    x = np.r_[left["x"], right["x"]]
+    x_mean = n @ x / n_obs
+    x_std = np.sqrt(n @ (x - x_mean) ** 2 / (n_obs - 1))
+    x_sd = 1
+    if stdvars:
+        # The bandwidths are selected for x / x_sd and scaled back. The outcomes are
+        # not standardized: the bandwidths do not depend on their scale.
+        x_sd, x_std = x_std, 1
+        left, right = {**left, "x": left["x"] / x_sd}, {**right, "x": right["x"] / x_sd}
+        x, c = x / x_sd, c / x_sd
+
+    x_iq = _quantile(x, n, 0.75) - _quantile(x, n, 0.25)
+    n_pilot = n_obs
+
+    if masspoints in ["check", "adjust"]:
+        mass = max(
+            1 - len(left["x"]) / left["n"].sum(),
+            1 - len(right["x"]) / right["n"].sum(),
+        )
+        if mass >= 0.1 and masspoints == "adjust" and bwcheck is None:
+            bwcheck = 10
+        if masspoints == "adjust":
+            # The rule of thumb uses the number of mass points.
+            n_pilot = len(x)
+
+    c_bw = KERNEL_CONSTANTS[kernel] * min(x_std, x_iq / 1.349) * n_pilot ** (-1 / 5)
+
+    bw_max_l, bw_max_r = abs(c - x.min()), abs(c - x.max())
+    bw_max = max(bw_max_l, bw_max_r)
+    if bwcheck is not None:
+        # Distance to the bwcheck-th mass point closest to the cutoff.
+        bw_min_l = abs(left["x"][::-1][min(bwcheck, len(left["x"])) - 1] - c) + 1e-8
+        bw_min_r = abs(right["x"][min(bwcheck, len(right["x"])) - 1] - c) + 1e-8
+    else:
+        bw_min_l = bw_min_r = 0
+
+    def capped(h, bw_max):
+        return np.minimum(h, bw_max) if bwrestrict else h
+
+    def pilot(h, bw_max, bw_min):
+        # As in rdbwselect, only the pilot bandwidths (c and d) have a minimum.
+        return np.maximum(capped(h, bw_max), bw_min)
+
+    c_bw = pilot(c_bw, bw_max, max(bw_min_l, bw_min_r))
+
+    def terms(side, o, nu, o_B, h_B, scale):
+        return _bias_and_variance(
+            side=side,
+            clustered=clustered,
+            c=c,
+            o=o,
+            nu=nu,
+            o_B=o_B,
+            h_V=c_bw,
+            h_B=h_B,
+            scale=scale,
+            kernel=kernel,
+            nnmatch=nnmatch,
+        )
+
+    # The bias of the pilot uses the distance from the cutoff to the outermost point.
+    d_l = terms(left, q + 1, q + 1, q + 2, abs(c - left["x"].min()), 0)
+    d_r = terms(right, q + 1, q + 1, q + 2, abs(c - right["x"].max()), 0)
+
+    if bwselect == "mserd":
+        d_bw = pilot(
+            ((d_l["V"] + d_r["V"]) / (d_r["B"] - d_l["B"]) ** 2) ** d_l["rate"],
+            bw_max,
+            max(bw_min_l, bw_min_r),
+        )
+        b_l = terms(left, q, p + 1, q + 1, d_bw, scaleregul)
+        b_r = terms(right, q, p + 1, q + 1, d_bw, scaleregul)
+        b_bw = capped(_common_bandwidth(b_l, b_r, scaleregul), bw_max)
+        h_l = terms(left, p, deriv, q, b_bw, scaleregul)
+        h_r = terms(right, p, deriv, q, b_bw, scaleregul)
+        h_bw = capped(_common_bandwidth(h_l, h_r, scaleregul), bw_max)
+
+        return x_sd * np.column_stack([h_bw, h_bw, b_bw, b_bw])
+
+    d_bw_l = pilot((d_l["V"] / d_l["B"] ** 2) ** d_l["rate"], bw_max_l, bw_min_l)
+    d_bw_r = pilot((d_r["V"] / d_r["B"] ** 2) ** d_l["rate"], bw_max_r, bw_min_r)
+    b_l = terms(left, q, p + 1, q + 1, d_bw_l, scaleregul)
+    b_r = terms(right, q, p + 1, q + 1, d_bw_r, scaleregul)
+    b_bw_l = capped(_side_bandwidth(b_l, scaleregul), bw_max_l)
+    b_bw_r = capped(_side_bandwidth(b_r, scaleregul), bw_max_r)
+    h_l = terms(left, p, deriv, q, b_bw_l, scaleregul)
+    h_r = terms(right, p, deriv, q, b_bw_r, scaleregul)
+    h_bw_l = capped(_side_bandwidth(h_l, scaleregul), bw_max_l)
+    h_bw_r = capped(_side_bandwidth(h_r, scaleregul), bw_max_r)
+
+    return x_sd * np.column_stack([h_bw_l, h_bw_r, b_bw_l, b_bw_r])
+
+
+def _common_bandwidth(left, right, scaleregul):
+    """Compute the common MSE-optimal bandwidth of both sides (mserd).
+
+    Args:
+        left (dict): Terms of the left side, see _bias_and_variance.
+        right (dict): Terms of the right side, see _bias_and_variance.
+        scaleregul (float): Scaling factor of the regularization term.
+
+    Returns:
+        (numpy.ndarray): The bandwidth of every outcome.
+
+    """
+    return (
+        (left["V"] + right["V"])
+        / ((right["B"] - left["B"]) ** 2 + scaleregul * (right["R"] + left["R"]))
+    ) ** left["rate"]
+
+
+def _side_bandwidth(terms, scaleregul):
+    """Compute the MSE-optimal bandwidth of one side (msetwo).
+
+    Args:
+        terms (dict): Terms of the side, see _bias_and_variance.
+        scaleregul (float): Scaling factor of the regularization term.
+
+    Returns:
+        (numpy.ndarray): The bandwidth of every outcome.
+
+    """
+    return (terms["V"] / (terms["B"] ** 2 + scaleregul * terms["R"])) ** terms["rate"]
+
+
+def _bias_and_variance(
+    side,
+    clustered,
+    c,
+    o,
+    nu,
+    o_B,
+    h_V,
+    h_B,
+    scale,
+    kernel,
+    nnmatch,
+):
+    """Compute the variance, bias and regularization terms of one side (rdrobust_bw).
+
+    The variance is estimated with a local polynomial of order o and bandwidth h_V, the
+    bias with order o_B and bandwidth h_B. The covariate coefficients are estimated
+    within h_V and used for both.
+
+    Args:
+        side (dict): Cells of one side, see mass_point_cells.
+        clustered (bool): Whether the variance is clustered.
+        c (float): The cutoff.
+        o (int): Order of the local polynomial.
+        nu (int): Order of the derivative.
+        o_B (int): Order of the local polynomial of the bias.
+        h_V (float): Bandwidth of the variance.
+        h_B (float or numpy.ndarray): Bandwidth of the bias (per outcome).
+        scale (float): Scaling factor of the regularization term. If zero, no
+            regularization term is computed.
+        kernel (string): The kernel function.
+        nnmatch (int): Minimum number of neighbors of the nearest neighbor residuals.
+
+    Returns:
+        (dict): The variance ("V"), bias ("B") and regularization ("R") terms of every
+            outcome, and the rate of the bandwidth ("rate").
+
+    Raises:
+        ValueError: If a window has too few mass points for its local polynomial.
+
+    """
+    n_outcomes = side["sy"].shape[1]
+    h_B = np.broadcast_to(h_B, (n_outcomes,))
+
+    window = _window(side, c=c, h=h_V, kernel=kernel)
+    _check_mass_points(window, o, h_V)
+    basis = (window["x"] - c)[:, None] ** np.arange(o + 1)
+    inv_gram = np.linalg.inv(_gram(window, basis))
+    gamma = _covariate_coefficients(window, basis, inv_gram)
+    variance = _sandwich(window, basis, inv_gram, gamma, clustered, nnmatch)
+
+    v = basis.T @ (window["n"] * window["w"] * ((window["x"] - c) / h_V) ** (o + 1))
+    b_const = (h_V ** np.arange(o + 1) * (inv_gram @ v))[nu]
+
+    bias = np.empty(n_outcomes)
+    regularization = np.zeros(n_outcomes)
+    # Outcomes with the same bias bandwidth share the bias regression.
+    for h in np.unique(h_B):
+        outcomes = h_B == h
+        window_B = _window(side, c=c, h=h, kernel=kernel, outcomes=outcomes)
+        _check_mass_points(window_B, o_B, h)
+        basis_B = (window_B["x"] - c)[:, None] ** np.arange(o_B + 1)
+        inv_gram_B = np.linalg.inv(_gram(window_B, basis_B))
+        row = inv_gram_B[o + 1] @ (basis_B * window_B["w"][:, None]).T
+        bias[outcomes] = (
+            row @ window_B["sy"] - (row @ window_B["sz"]) @ gamma[:, outcomes]
+        )
+        if scale > 0:
+            variance_B = _sandwich(
+                window_B,
+                basis_B,
+                inv_gram_B,
+                gamma[:, outcomes],
+                clustered,
+                nnmatch,
+            )
+            regularization[outcomes] = 3 * b_const**2 * variance_B[:, o + 1, o + 1]
+
+    return {
+        "V": (2 * nu + 1) * h_V ** (2 * nu + 1) * variance[:, nu, nu],
+        "B": np.sqrt(2 * (o + 1 - nu)) * b_const * bias,
+        "R": scale * 2 * (o + 1 - nu) * regularization,
+        "rate": 1 / (2 * o + 3),
+    }
+
+
+def _check_mass_points(window, order, h):
+    """Check that a window has enough mass points for a local polynomial.
+
+    With fewer mass points than coefficients, the polynomial is not identified.
+    rdbwselect fails in this case, and the inverse of a nearly singular matrix would
+    give arbitrary (or NaN) bandwidths.
+
+    Args:
+        window (dict): The cells within the bandwidth, see _window.
+        order (int): Order of the local polynomial.
+        h (float): The bandwidth.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the window has fewer than order + 1 mass points.
+
+    """
+    if len(window["x"]) < order + 1:
+        raise ValueError(
+            f"Only {len(window['x'])} mass points within the bandwidth {h:.4g} on one "
+            f"side of the cutoff, but the local polynomial of order {order} needs "
+            f"{order + 1}.",
+        )
+
+
+def _window(cells, c, h, kernel, outcomes=None):
+    """Select the mass points with positive kernel weight and add the weights.
+
+    Args:
+        cells (dict): Cells, see mass_point_cells.
+        c (float): The cutoff.
+        h (float): The bandwidth.
+        kernel (string): The kernel function.
+        outcomes (numpy.ndarray): Boolean mask of the outcomes to keep. If None, all
+            outcomes are kept.
+
+    Returns:
+        (dict): The cells of the mass points within the bandwidth, with their kernel
+            weights ("w").
+
+    """
+    u = (cells["x"] - c) / h
+    inside = np.abs(u) <= 1
+    if kernel == "uniform":
+        weights = 0.5 * inside / h
+    elif kernel == "triangular":
+        weights = (1 - np.abs(u)) * inside / h
+    else:
+        weights = 0.75 * (1 - u**2) * inside / h
+
+    keep = weights > 0
+    window = _subset(cells, keep)
+    window["w"] = weights[keep]
+    if outcomes is not None:
+        for key in OUTCOME_KEYS:
+            window[key] = window[key][..., outcomes]
+
+    return window
+
+
+def _subset(cells, keep):
+    """Select mass points and their cells.
+
+    Args:
+        cells (dict): Cells, see mass_point_cells.
+        keep (numpy.ndarray): Boolean mask of the mass points to keep.
+
+    Returns:
+        (dict): The cells of the kept mass points.
+
+    """
+    cells_kept = keep[cells["cell_point"]]
+    subset = {key: cells[key][keep] for key in POINT_KEYS}
+    subset.update({key: cells[key][cells_kept] for key in CELL_KEYS})
+    subset["cell_point"] = (np.cumsum(keep) - 1)[subset["cell_point"]]
+
+    return subset
+
+
+def _gram(window, basis):
+    """Compute the weighted Gram matrix R'WR of the polynomial basis.
+
+    Args:
+        window (dict): Cells within the bandwidth, see _window.
+        basis (numpy.ndarray): Polynomial basis of the mass points.
+
+    Returns:
+        (numpy.ndarray): The Gram matrix.
+
+    """
+    return (basis * (window["n"] * window["w"])[:, None]).T @ basis
+
+
+def _covariate_coefficients(window, basis, inv_gram):
+    """Estimate the coefficients of the covariates by partialling out the polynomial.
+
+    Args:
+        window (dict): Cells within the bandwidth, see _window.
+        basis (numpy.ndarray): Polynomial basis of the mass points.
+        inv_gram (numpy.ndarray): Inverse of the Gram matrix of the basis.
+
+    Returns:
+        (numpy.ndarray): The coefficients, shape (d, m).
+
+    """
+    weighted = basis * window["w"][:, None]
+    u_y = weighted.T @ window["sy"]
+    u_z = weighted.T @ window["sz"]
+    zwz = np.einsum("k,kde->de", window["w"], window["szz"]) - u_z.T @ inv_gram @ u_z
+    zwy = np.einsum("k,kdm->dm", window["w"], window["szy"]) - u_z.T @ inv_gram @ u_y
+
+    # rdbwselect drops collinear covariates, the pseudo inverse has the same effect.
+    return np.linalg.pinv(zwz, rcond=1e-5) @ zwy
+
+
+def _sandwich(window, basis, inv_gram, gamma, clustered, nnmatch):
+    """Compute the variance of the local polynomial coefficients (rdrobust_vce).
+
+    The residuals are the nearest neighbor residuals of the covariate adjusted outcome
+    y - z * gamma. All observations at a mass point have the same neighbors, so the sum
+    of the residuals of a cell is a linear function of the sums of the cell and of the
+    neighboring mass points.
+
+    Args:
+        window (dict): Cells within the bandwidth, see _window.
+        basis (numpy.ndarray): Polynomial basis of the mass points.
+        inv_gram (numpy.ndarray): Inverse of the Gram matrix of the basis.
+        gamma (numpy.ndarray): Coefficients of the covariates, shape (d, m).
+        clustered (bool): Whether the variance is clustered.
+        nnmatch (int): Minimum number of neighbors of the nearest neighbor residuals.
+
+    Returns:
+        (numpy.ndarray): The variance matrices, shape (m, o + 1, o + 1).
+
+    """
+    n = window["n"]
+    lower, upper = _nearest_neighbors(window["x"], n, nnmatch)
+    n_neighbors = _range_sums(n, lower, upper) - 1
+    own = np.sqrt((n_neighbors + 1) / n_neighbors)[:, None]
+    other = (1 / np.sqrt(n_neighbors * (n_neighbors + 1)))[:, None]
+
+    adjusted = window["sy"] - window["sz"] @ gamma
+    neighbor_sums = _range_sums(adjusted, lower, upper)
+    weighted = basis * window["w"][:, None]
+
+    if clustered:
+        point = window["cell_point"]
+        cell_residuals = (
+            own[point] * (window["cell_sy"] - window["cell_sz"] @ gamma)
+            - other[point] * window["cell_n"][:, None] * neighbor_sums[point]
+        )
+        scores = direct.cluster_sums(
+            weighted[point][:, :, None] * cell_residuals[:, None, :],
+            window["cell_cluster"],
+        )
+        meat = np.einsum("gkm,glm->mkl", scores, scores)
+        n_obs, n_clusters, k = n.sum(), len(scores), basis.shape[1]
+        meat *= (n_obs - 1) / (n_obs - k) * n_clusters / (n_clusters - 1)
+    else:
+        squares = (
+            window["syy"]
+            - 2 * np.einsum("kdm,dm->km", window["szy"], gamma)
+            + np.einsum("dm,kde,em->km", gamma, window["szz"], gamma)
+        )
+        squared_residuals = (
+            own**2 * squares
+            - 2 * own * other * neighbor_sums * adjusted
+            + n[:, None] * other**2 * neighbor_sums**2
+        )
+        meat = np.einsum("pk,pl,pm->mkl", weighted, weighted, squared_residuals)
+
+    return inv_gram @ meat @ inv_gram
+
+
+def _nearest_neighbors(x, n, nnmatch):
+    """Find the neighbors of the nearest neighbor residuals of every mass point.
+
+    As in rdrobust, the neighbors of an observation are all other observations at its
+    mass point, extended by whole mass points (the closer side first, both sides if
+    equally close) until there are at least nnmatch of them.
+
+    Args:
+        x (numpy.ndarray): The mass points in ascending order.
+        n (numpy.ndarray): The numbers of observations.
+        nnmatch (int): Minimum number of neighbors.
+
+    Returns:
+        lower (numpy.ndarray): Index of the first mass point of the neighbors.
+        upper (numpy.ndarray): Index of the last mass point of the neighbors.
+
+    """
+    target = min(nnmatch, n.sum() - 1)
+    lower = np.arange(len(x))
+    upper = np.arange(len(x))
+
+    for k in range(len(x)):
+        found = n[k] - 1
+        while found < target:
+            if lower[k] == 0:
+                upper[k] += 1
+                found += n[upper[k]]
+            elif upper[k] == len(x) - 1:
+                lower[k] -= 1
+                found += n[lower[k]]
+            else:
+                distance_left = x[k] - x[lower[k] - 1]
+                distance_right = x[upper[k] + 1] - x[k]
+                if distance_left >= distance_right:
+                    upper[k] += 1
+                    found += n[upper[k]]
+                if distance_left <= distance_right:
+                    lower[k] -= 1
+                    found += n[lower[k]]
+
+    return lower, upper
+
+
+def _range_sums(values, lower, upper):
+    """Sum values over ranges of mass points.
+
+    Args:
+        values (numpy.ndarray): Values per mass point (first axis).
+        lower (numpy.ndarray): First index of every range.
+        upper (numpy.ndarray): Last index of every range.
+
+    Returns:
+        (numpy.ndarray): The sums.
+
+    """
+    cumulative = np.concatenate([np.zeros_like(values[:1]), np.cumsum(values, axis=0)])
+
+    return cumulative[upper + 1] - cumulative[lower]
+
+
+def _quantile(x, n, prob):
+    """Compute a quantile of the observations (linear interpolation, as numpy).
+
+    Args:
+        x (numpy.ndarray): The mass points in ascending order.
+        n (numpy.ndarray): The numbers of observations.
+        prob (float): The probability.
+
+    Returns:
+        (float): The quantile.
+
+    """
+    position = (n.sum() - 1) * prob
+    below = int(np.floor(position))
+    ends = np.cumsum(n)
+    lower = x[np.searchsorted(ends, below, side="right")]
+    upper = x[np.searchsorted(ends, min(below + 1, ends[-1] - 1), side="right")]
+
+    return lower + (position - below) * (upper - lower)
+
+
+def _missing_patterns(observed):
+    """Group the outcomes by their observed rows.
+
+    Args:
+        observed (numpy.ndarray): Boolean, whether each outcome is observed, shape
+            (n, m).
+
+    Returns:
+        (list): Lists of outcome indices with the same observed rows.
+
+    """
+    groups = {}
+    for j in range(observed.shape[1]):
+        groups.setdefault(observed[:, j].tobytes(), []).append(j)
+
+    return list(groups.values())
@@ -0,0 +1,221 @@
+"""Optimal bandwidths (Calonico, Cattaneo, and Titiunik, 2014) for many outcomes.
+
+The running variable, the covariates and the clusters are the same for all outcomes.
+They are prepared once (sorted by the running variable, outcomes without missing
+values) and sent to each worker process once. The outcomes are then distributed over
+the processes.
+
+Each result is the full bws table of rdrobust.rdbwselect. It is cached on disk under a
+fingerprint of the outcome, the running variable, the covariates, the clusters and the
+options of the selection (and the version of the selector), so that adding an outcome
+only requires one more selection.
+
+With selector="cells", the bandwidths are not selected by rdbwselect but from cell
+statistics of the discrete running variable (see cct_bandwidth.py). All outcomes are
+then selected in one call in the main process.
+
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+from pathlib import Path
+
+import pandas as pd
+import rdrobust as rdr
+
+from nc_skills_step_public.analysis import cct_bandwidth as cct
+
+# Set in each worker process by _set_bandwidth_data.
+_worker = {}
+
+
+def select_bandwidths(
+    data,
+    y_vars,
+    running="rel_cohort",
+    covs=None,
+    cluster="country_reform_brth_year",
+    p=1,
+    kernel="uniform",
+    bwselect="mserd",
+    cache_dir=None,
+    n_workers=None,
+    selector="rdbwselect",
+):
+    """Select the optimal bandwidths for several outcomes.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        y_vars (list of strings): The outcomes.
+        running (string): The running variable.
+        covs (list of strings): Covariates. If None, no covariates are used.
+        cluster (string): The clusters for the variance. If None, no clustering.
+        p (int): Order of the local polynomial.
+        kernel (string): Kernel function, see rdrobust.rdbwselect.
+        bwselect (string): Bandwidth selection procedure, see rdrobust.rdbwselect.
+        cache_dir (str or pathlib.Path): Directory of the cache. If None, nothing is
+            cached.
+        n_workers (int): Number of processes. If None, all available cores are used.
+        selector (string): "rdbwselect" (rdrobust) or "cells" (see
+            cct_bandwidth.cct_bandwidths, only mserd and msetwo).
+
+    Returns:
+        bws (dict): Keys are the outcomes, values are the bws tables of rdbwselect
+            (pandas DataFrames).
+
+    """
+    options = {"p": p, "kernel": kernel, "bwselect": bwselect}
+    covs = [] if covs is None else list(covs)
+    shared = _shared_data(data=data, running=running, covs=covs, cluster=cluster)
+    shared_key = _fingerprint(
+        shared["x"],
+        shared["covs"],
+        shared["cluster"],
+        repr(sorted(options.items())),
+        selector,
+        # rdrobust has no __version__ attribute.
+        metadata.version("rdrobust") if selector == "rdbwselect" else "",
+        # Fixes of the cell selector must not be hidden by the cache.
+        Path(cct.__file__).read_text() if selector == "cells" else "",
+    )
+
+    keys = {
+        y_var: _fingerprint(shared_key, y_var, data.loc[shared["index"], y_var])
+        for y_var in y_vars
+    }
+    bws = {}
+    if cache_dir is not None:
+        for y_var in y_vars:
+            path = Path(cache_dir) / f"{keys[y_var]}.pkl"
+            if path.exists():
+                bws[y_var] = pd.read_pickle(path)
+
+    to_select = [y_var for y_var in y_vars if y_var not in bws]
+    outcomes = [data.loc[shared["index"], y_var] for y_var in to_select]
+
+    if n_workers is None:
+        n_workers = os.cpu_count()
+
+    if selector == "cells" and to_select:
+        selected = list(
+            cct.cct_bandwidths(
+                y=pd.concat(outcomes, axis=1),
+                x=shared["x"],
+                covs=shared["covs"],
+                cluster=shared["cluster"],
+                **options,
+            ).values(),
+        )
+    elif n_workers == 1 or len(to_select) <= 1:
+        _set_bandwidth_data(shared, options)
+        try:
+            selected = list(map(_select_bandwidth, outcomes))
+        finally:
+            # Do not keep the shared data alive in the main process.
+            _worker.clear()
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(n_workers, len(to_select)),
+            initializer=_set_bandwidth_data,
+            initargs=(shared, options),
+        ) as executor:
+            selected = list(executor.map(_select_bandwidth, outcomes))
+
+    for y_var, table in zip(to_select, selected):
+        bws[y_var] = table
+        if cache_dir is not None:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            table.to_pickle(Path(cache_dir) / f"{keys[y_var]}.pkl")
+
+    return {y_var: bws[y_var] for y_var in y_vars}
+
+
+def _shared_data(data, running, covs, cluster):
+    """Prepare the data which is the same for all outcomes.
+
+    Observations with a missing running variable, covariate or cluster are dropped (as
+    rdbwselect would), and the observations are sorted by the running variable.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        running (string): The running variable.
+        covs (list of strings): Covariates.
+        cluster (string): The clusters. If None, no clustering.
+
+    Returns:
+        shared (dict): The index of the kept observations ("index"), the running
+            variable ("x"), the covariates ("covs") and the clusters ("cluster").
+
+    """
+    columns = [running, *covs] + ([] if cluster is None else [cluster])
+    kept = data[columns].dropna().sort_values(running, kind="stable")
+
+    return {
+        "index": kept.index,
+        "x": kept[running],
+        "covs": kept[covs] if covs else None,
+        "cluster": None if cluster is None else kept[cluster],
+    }
+
+
+def _set_bandwidth_data(shared, options):
+    """Make the shared data and the options available in a worker.
+
+    Args:
+        shared (dict): See _shared_data.
+        options (dict): Order, kernel and selection procedure.
+
+    Returns:
+        None
+
+    """
+    _worker["shared"] = shared
+    _worker["options"] = options
+
+
+def _select_bandwidth(y):
+    """Select the bandwidths for one outcome.
+
+    Args:
+        y (pandas Series): The outcome (aligned with the shared data).
+
+    Returns:
+        (pandas DataFrame): The bws table of rdbwselect.
+
+    """
+    shared = _worker["shared"]
+    out = rdr.rdbwselect(
+        y=y,
+        x=shared["x"],
+        covs=shared["covs"],
+        cluster=shared["cluster"],
+        **_worker["options"],
+    )
+
+    return out.bws
+
+
+def _fingerprint(*parts):
+    """Hash strings and pandas objects into one key.
+
+    Args:
+        *parts (str, pandas Series or pandas DataFrame): The parts. None is allowed.
+
+    Returns:
+        (string): The key (hexadecimal).
+
+    """
+    key = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, pd.Series | pd.DataFrame):
+            names = part.columns if isinstance(part, pd.DataFrame) else [part.name]
+            key.update(repr(list(names)).encode())
+            key.update(
+                pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes(),
+            )
+        else:
+            key.update(repr(part).encode())
+
+    return key.hexdigest()
@@ -0,0 +1,388 @@
+"""Randomization inference for the RDD treatment effect.
+
+The treatment is reassigned many times, either by drawing a new pivotal cohort for
+every reform (scheme "cutoff") or by permuting the treatment status of the birth
+cohorts within every reform (scheme "cohort"). The randomization p-value is the share
+of draws with an absolute treatment coefficient at least as large as the observed one.
+
+Under scheme "cutoff", every draw is a placebo discontinuity at the drawn pivotal
+cohorts: as in the placebo test, the relative cohort is re-centred at the drawn cutoff
+of each reform before it is interacted with the treatment.
+
+Only the columns which depend on the treatment (the treatment indicator and its
+interactions with the reform-specific trends) change between draws. The other
+regressors span the same space whatever the centring of the relative cohort, so they
+are partialled out once (Frisch-Waugh-Lovell), and every draw only requires the
+residualization of the few treatment columns and a small least squares solve. Draws
+are split into batches with their own seeded random number streams, so that the
+results do not depend on the number of worker processes.
+
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import linalg
+
+from nc_skills_step_public.analysis import analysis_RDD_direct as direct
+
+# Set in each worker process by _set_skeleton.
+_worker = {}
+
+
+def randomization_inference(
+    data,
+    y_vars,
+    order=1,
+    partially_treated=False,
+    partially_treated_trend=False,
+    scheme="cutoff",
+    n_draws=1000,
+    seed=0,
+    n_workers=None,
+    batch_size=100,
+):
+    """Compute randomization p-values of the treatment effect for several outcomes.
+
+    Args:
+        data (pandas DataFrame): The data set (e.g. from select_sample_for_analysis).
+        y_vars (list of strings): Dependent variables.
+        order (int): Order of the polynomial cohort trends (1 to 4).
+        partially_treated (bool): If True: indicator for partially treated is added.
+        partially_treated_trend (bool): If True: separate trend for partially treated is added.
+        scheme (string): "cutoff" or "cohort", see module docstring.
+        n_draws (int): Number of random reassignments of the treatment.
+        seed (int): Seed of the random number generator.
+        n_workers (int): Number of worker processes. If 1, the draws are computed in the
+            current process. If None, all available cores are used.
+        batch_size (int): Number of draws per batch (and random number stream).
+
+    Returns:
+        results (dict): Keys are the dependent variables, values are dictionaries with
+            the observed treatment coefficient ("coefficient"), the randomization
+            p-value ("pvalue") and the coefficients of all draws ("draws").
+
+    """
+    if scheme not in ("cutoff", "cohort"):
+        raise ValueError(f"Unknown scheme {scheme}. Use 'cutoff' or 'cohort'.")
+
+    skeleton = build_permutation_skeleton(
+        data=data,
+        y_vars=y_vars,
+        order=order,
+        partially_treated=partially_treated,
+        partially_treated_trend=partially_treated_trend,
+    )
+    observed = treatment_coefficients(
+        skeleton=skeleton,
+        cell_treated=skeleton["cells"]["treated"],
+    )
+    draws = permutation_draws(
+        skeleton=skeleton,
+        scheme=scheme,
+        n_draws=n_draws,
+        seed=seed,
+        n_workers=n_workers,
+        batch_size=batch_size,
+    )
+    pvalues = (1 + (np.abs(draws) >= np.abs(observed)).sum(axis=0)) / (n_draws + 1)
+
+    return {
+        y_var: {
+            "coefficient": observed[j],
+            "pvalue": pvalues[j],
+            "draws": draws[:, j],
+        }
+        for j, y_var in enumerate(y_vars)
+    }
+
+
+def build_permutation_skeleton(
+    data,
+    y_vars,
+    order=1,
+    partially_treated=False,
+    partially_treated_trend=False,
+):
+    """Precompute everything that does not change between treatment reassignments.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        y_vars (list of strings): Dependent variables.
+        order (int): Order of the polynomial cohort trends (1 to 4).
+        partially_treated (bool): If True: indicator for partially treated is added.
+        partially_treated_trend (bool): If True: separate trend for partially treated is added.
+
+    Returns:
+        skeleton (dict): The cells, i.e. reform x relative cohort, ("cells"), the
+            number of reforms ("n_reforms"), the order of the trends ("order"), the
+            number of outcomes ("n_outcomes") and one entry per pattern of missing
+            values in the outcomes ("groups"). Each group holds the outcomes, the cell,
+            reform and relative cohort of the used rows, an orthonormal basis of the
+            fixed regressors and the residualized outcomes.
+
+    """
+    design = direct.build_design_matrix(
+        data=data,
+        y_vars=y_vars,
+        order=order,
+        partially_treated=partially_treated,
+        partially_treated_trend=partially_treated_trend,
+    )
+    names = design["names"]
+    rel_cohort = data.loc[design["index"], "rel_cohort"].to_numpy(dtype=float)
+    treated = data.loc[design["index"], "treated"].to_numpy(dtype=float)
+
+    # Columns which change with the treatment are built for every draw, see
+    # _treatment_columns.
+    fixed = [j for j, name in enumerate(names) if not name.startswith("treated")]
+
+    cell_keys, cell_codes = np.unique(
+        np.column_stack([design["reform_codes"], rel_cohort]),
+        axis=0,
+        return_inverse=True,
+    )
+    cell_codes = cell_codes.ravel()
+    cell_reform = cell_keys[:, 0].astype(int)
+    cell_cohort = cell_keys[:, 1]
+    cells = {
+        "reform": cell_reform,
+        "cohort": cell_cohort,
+        "treated": direct.cluster_sums(treated, cell_codes) > 0,
+        # A new pivotal cohort needs at least one earlier cohort as control group.
+        "cutoffs": [
+            cell_cohort[cell_reform == r][1:] for r in range(len(design["reforms"]))
+        ],
+    }
+
+    not_missing = ~np.isnan(design["Y"])
+    patterns = {}
+    for j in range(not_missing.shape[1]):
+        patterns.setdefault(not_missing[:, j].tobytes(), []).append(j)
+
+    groups = []
+    for outcomes in patterns.values():
+        rows = not_missing[:, outcomes[0]]
+        Q = _orthonormal_basis(design["X"][np.ix_(rows, fixed)])
+        Y = design["Y"][np.ix_(rows, outcomes)]
+        groups.append(
+            {
+                "outcomes": outcomes,
+                "cell_codes": cell_codes[rows],
+                "reform_codes": design["reform_codes"][rows],
+                "rel_cohort": rel_cohort[rows],
+                "Q": Q,
+                "Y_res": Y - Q @ (Q.T @ Y),
+            },
+        )
+
+    return {
+        "cells": cells,
+        "groups": groups,
+        "n_reforms": len(design["reforms"]),
+        "order": order,
+        "n_outcomes": len(y_vars),
+    }
+
+
+def treatment_coefficients(skeleton, cell_treated, cutoffs=None):
+    """Estimate the treatment coefficient for a given assignment of the treatment.
+
+    Args:
+        skeleton (dict): See build_permutation_skeleton.
+        cell_treated (numpy.ndarray): Boolean treatment status of every cell.
+        cutoffs (numpy.ndarray): Relative cohort at which the trends interacted with
+            the treatment are centred, per reform. If None, they are centred at the
+            actual cutoff (0).
+
+    Returns:
+        coefficients (numpy.ndarray): Treatment coefficient of every outcome.
+
+    """
+    if cutoffs is None:
+        cutoffs = np.zeros(skeleton["n_reforms"])
+
+    coefficients = np.empty(skeleton["n_outcomes"])
+
+    for group in skeleton["groups"]:
+        treated = cell_treated[group["cell_codes"]].astype(float)
+        D = treated[:, None] * _treatment_columns(
+            group=group,
+            cutoffs=cutoffs,
+            n_reforms=skeleton["n_reforms"],
+            order=skeleton["order"],
+        )
+        D_res = D - group["Q"] @ (group["Q"].T @ D)
+        # Minimum norm solution, as statsmodels for rank deficient designs.
+        params = np.linalg.lstsq(D_res, group["Y_res"], rcond=None)[0]
+        coefficients[group["outcomes"]] = params[0]
+
+    return coefficients
+
+
+def permutation_draws(
+    skeleton,
+    scheme="cutoff",
+    n_draws=1000,
+    seed=0,
+    n_workers=None,
+    batch_size=100,
+):
+    """Estimate the treatment coefficients for random reassignments of the treatment.
+
+    Args:
+        skeleton (dict): See build_permutation_skeleton.
+        scheme (string): "cutoff" or "cohort", see module docstring.
+        n_draws (int): Number of random reassignments of the treatment.
+        seed (int): Seed of the random number generator.
+        n_workers (int): Number of worker processes. If 1, the draws are computed in the
+            current process. If None, all available cores are used.
+        batch_size (int): Number of draws per batch (and random number stream).
+
+    Returns:
+        draws (numpy.ndarray): Treatment coefficients (n_draws x outcomes).
+
+    """
+    batch_sizes = [
+        min(batch_size, n_draws - start) for start in range(0, n_draws, batch_size)
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(batch_sizes))
+    schemes = [scheme] * len(batch_sizes)
+
+    if n_workers is None:
+        n_workers = os.cpu_count()
+
+    if n_workers == 1:
+        _set_skeleton(skeleton)
+        try:
+            batches = list(map(_permutation_batch, seeds, batch_sizes, schemes))
+        finally:
+            _worker.clear()
+    else:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_set_skeleton,
+            initargs=(skeleton,),
+        ) as executor:
+            batches = list(
+                executor.map(_permutation_batch, seeds, batch_sizes, schemes),
+            )
+
+    return np.vstack(batches)
+
+
+def _set_skeleton(skeleton):
+    """Make the skeleton available in a worker process.
+
+    Args:
+        skeleton (dict): See build_permutation_skeleton.
+
+    Returns:
+        None
+
+    """
+    _worker["skeleton"] = skeleton
+
+
+def _permutation_batch(seed, n_draws, scheme):
+    """Estimate the treatment coefficients for one batch of draws.
+
+    Args:
+        seed (numpy.random.SeedSequence): Seed of the batch.
+        n_draws (int): Number of draws in the batch.
+        scheme (string): "cutoff" or "cohort".
+
+    Returns:
+        draws (numpy.ndarray): Treatment coefficients (n_draws x outcomes).
+
+    """
+    skeleton = _worker["skeleton"]
+    rng = np.random.default_rng(seed)
+
+    draws = np.empty((n_draws, skeleton["n_outcomes"]))
+    for i in range(n_draws):
+        cell_treated, cutoffs = _draw_cell_treatment(
+            rng=rng,
+            cells=skeleton["cells"],
+            scheme=scheme,
+        )
+        draws[i] = treatment_coefficients(
+            skeleton=skeleton,
+            cell_treated=cell_treated,
+            cutoffs=cutoffs,
+        )
+
+    return draws
+
+
+def _draw_cell_treatment(rng, cells, scheme):
+    """Draw a new treatment status for every cell.
+
+    Args:
+        rng (numpy.random.Generator): The random number generator.
+        cells (dict): The cells, see build_permutation_skeleton.
+        scheme (string): "cutoff" or "cohort".
+
+    Returns:
+        cell_treated (numpy.ndarray): Boolean treatment status of every cell.
+        cutoffs (numpy.ndarray): The drawn cutoff of every reform, None under scheme
+            "cohort" (the trends stay centred at the actual cutoff).
+
+    """
+    if scheme == "cutoff":
+        cutoffs = np.array([rng.choice(candidates) for candidates in cells["cutoffs"]])
+        cell_treated = cells["cohort"] >= cutoffs[cells["reform"]]
+
+    elif scheme == "cohort":
+        # Cells are sorted by reform: shuffle the treatment status within reforms.
+        shuffled = np.lexsort((rng.random(len(cells["reform"])), cells["reform"]))
+        cell_treated = cells["treated"][shuffled]
+        cutoffs = None
+
+    return cell_treated, cutoffs
+
+
+def _treatment_columns(group, cutoffs, n_reforms, order):
+    """Build the regressors which are multiplied by the treatment.
+
+    These are a constant and the reform-specific polynomial trends in the relative
+    cohort, re-centred at the cutoff of every reform.
+
+    Args:
+        group (dict): A group of the skeleton, see build_permutation_skeleton.
+        cutoffs (numpy.ndarray): Cutoff (relative cohort) of every reform.
+        n_reforms (int): Number of reforms.
+        order (int): Order of the polynomial cohort trends.
+
+    Returns:
+        base (numpy.ndarray): The columns (rows x (1 + order * reforms)).
+
+    """
+    reform_codes = group["reform_codes"]
+    centred = group["rel_cohort"] - cutoffs[reform_codes]
+    n_obs = len(centred)
+
+    base = np.zeros((n_obs, 1 + order * n_reforms))
+    base[:, 0] = 1
+    for p in range(1, order + 1):
+        base[np.arange(n_obs), 1 + (p - 1) * n_reforms + reform_codes] = centred**p
+
+    return base
+
+
+def _orthonormal_basis(Z):
+    """Get an orthonormal basis of the column space of Z.
+
+    Args:
+        Z (numpy.ndarray): Matrix (n x k), possibly rank deficient.
+
+    Returns:
+        Q (numpy.ndarray): Orthonormal basis (n x rank).
+
+    """
+    Q, R, _ = linalg.qr(Z, mode="economic", pivoting=True)
+    diag_R = np.abs(np.diag(R))
+    rank = int((diag_R > diag_R.max() * max(Z.shape) * np.finfo(float).eps).sum())
+
+    return Q[:, :rank]
@@ -0,0 +1,146 @@
+"""Compact records of regression results.
+
+The results of statsmodels keep references to the model, its design matrices and the
+regression data. The tables and plots only read the coefficients, standard errors,
+p-values and the number of observations. A RegressionRecord stores only these, as NumPy
+arrays, and offers the same attributes as the statsmodels results (params, bse, pvalues,
+nobs and conf_int). It can also be indexed like the result dictionaries of
+analysis_RDD_direct.py and window_cube.py, so that large grids of regressions can be
+held in memory without keeping the data of every fit alive.
+
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+FIELDS = ("params", "bse", "pvalues", "nobs")
+
+
+class RegressionRecord:
+    """Coefficients, standard errors, p-values and number of observations of one fit.
+
+    Attributes:
+        y_var (string): The dependent variable.
+        names (tuple of strings): The names of the regressors.
+        nobs (int): Number of observations.
+        df_resid (float): Residual degrees of freedom if inference is based on the t
+            distribution, None if it is based on the normal distribution (as with
+            clustered standard errors).
+
+    """
+
+    __slots__ = ("y_var", "names", "nobs", "df_resid", "_params", "_bse", "_pvalues")
+
+    def __init__(self, y_var, names, params, bse, pvalues, nobs, df_resid=None):
+        self.y_var = y_var
+        self.names = tuple(names)
+        self.nobs = int(nobs)
+        self.df_resid = df_resid
+        self._params = np.asarray(params, dtype=float)
+        self._bse = np.asarray(bse, dtype=float)
+        self._pvalues = np.asarray(pvalues, dtype=float)
+
+    @classmethod
+    def from_results(cls, results, regressors=None):
+        """Create a record from statsmodels results.
+
+        Args:
+            results (RegressionResults): The results of statsmodels.
+            regressors (list of strings): The regressors to keep. If None, all are kept.
+
+        Returns:
+            (RegressionRecord): The record.
+
+        """
+        return cls._from_series(
+            y_var=results.model.endog_names,
+            series=[results.params, results.bse, results.pvalues],
+            nobs=results.nobs,
+            regressors=regressors,
+            df_resid=results.df_resid if results.use_t else None,
+        )
+
+    @classmethod
+    def from_dict(cls, result, y_var, regressors=None):
+        """Create a record from a dictionary with the regression results.
+
+        Args:
+            result (dict): The results (see analysis_RDD_direct.flexible_trends_direct).
+            y_var (string): The dependent variable.
+            regressors (list of strings): The regressors to keep. If None, all are kept.
+
+        Returns:
+            (RegressionRecord): The record.
+
+        """
+        return cls._from_series(
+            y_var=y_var,
+            series=[result["params"], result["bse"], result["pvalues"]],
+            nobs=result["nobs"],
+            regressors=regressors,
+        )
+
+    @classmethod
+    def _from_series(cls, y_var, series, nobs, regressors, df_resid=None):
+        """Create a record from the params, bse and pvalues Series."""
+        if regressors is not None:
+            series = [values[regressors] for values in series]
+        params, bse, pvalues = series
+
+        return cls(
+            y_var=y_var,
+            names=params.index,
+            params=params.to_numpy(),
+            bse=bse.to_numpy(),
+            pvalues=pvalues.to_numpy(),
+            nobs=nobs,
+            df_resid=df_resid,
+        )
+
+    @property
+    def params(self):
+        """pandas Series: The coefficients."""
+        return pd.Series(self._params, index=list(self.names))
+
+    @property
+    def bse(self):
+        """pandas Series: The standard errors."""
+        return pd.Series(self._bse, index=list(self.names))
+
+    @property
+    def pvalues(self):
+        """pandas Series: The p-values."""
+        return pd.Series(self._pvalues, index=list(self.names))
+
+    def conf_int(self, alpha=0.05):
+        """Compute confidence intervals as statsmodels.
+
+        Args:
+            alpha (float): The significance level.
+
+        Returns:
+            (pandas DataFrame): Lower (column 0) and upper (column 1) bounds.
+
+        """
+        if self.df_resid is None:
+            quantile = stats.norm.ppf(1 - alpha / 2)
+        else:
+            quantile = stats.t.ppf(1 - alpha / 2, self.df_resid)
+
+        margin = quantile * self._bse
+
+        return pd.DataFrame(
+            {0: self._params - margin, 1: self._params + margin},
+            index=list(self.names),
+        )
+
+    def __getitem__(self, name):
+        """Get params, bse, pvalues or nobs as from a result dictionary."""
+        if name not in FIELDS:
+            raise KeyError(name)
+
+        return getattr(self, name)
+
+    def __repr__(self):
+        return f"RegressionRecord(y_var={self.y_var!r}, nobs={self.nobs})"
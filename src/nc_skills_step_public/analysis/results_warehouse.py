@@ -0,0 +1,343 @@
+"""Results warehouse: one SQLite database with the estimates of the regressions.
+
+Every row holds the coefficient, standard error, p-value and number of observations of
+one regressor in one fit, together with the run time of the fit and the time the row
+was written. Rows are keyed by the dependent variable ("outcome"), the specification,
+the sample, the fingerprint of the stored analysis data set (see
+columnar_store.read_fingerprint) and the regressor, so that results of different runs
+and data versions can be queried side by side.
+Writing a row with an existing key replaces it.
+
+Several tasks write to the same database, so it cannot be the product of one task.
+Instead, every task which writes rows produces a marker file with the fingerprints of
+the rows it wrote (see write_rows). A task which queries the warehouse depends on the
+markers of the tasks which write the rows and restricts the query to their
+fingerprints (see read_fingerprints).
+
+"""
+
+import json
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+KEY = ["outcome", "specification", "sample", "fingerprint", "regressor"]
+# Value of the fingerprint criterion which selects the most recently written one.
+NEWEST = "newest"
+COLUMNS = [*KEY, "coef", "se", "pvalue", "nobs", "seconds", "written"]
+
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS results (
+    outcome TEXT NOT NULL,
+    specification TEXT NOT NULL,
+    sample TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    regressor TEXT NOT NULL,
+    coef REAL,
+    se REAL,
+    pvalue REAL,
+    nobs INTEGER,
+    seconds REAL,
+    written TEXT,
+    PRIMARY KEY (outcome, specification, sample, fingerprint, regressor)
+)
+"""
+
+
+def timed(func, **kwargs):
+    """Call a function and measure its run time.
+
+    Args:
+        func (callable): The function, e.g. an RDD regression.
+        **kwargs: The keyword arguments of the function.
+
+    Returns:
+        result: The return value of the function.
+        seconds (float): The run time in seconds.
+
+    """
+    start = time.perf_counter()
+    result = func(**kwargs)
+
+    return result, time.perf_counter() - start
+
+
+def result_rows(
+    result,
+    outcome,
+    specification,
+    sample,
+    fingerprint,
+    seconds=None,
+    regressors=None,
+):
+    """Convert the results of one fit to rows of the warehouse.
+
+    Args:
+        result (OLSResults, RegressionRecord or dict): The regression results (see
+            analysis_RDD.py, regression_record.py and analysis_RDD_direct.py).
+        outcome (string): The dependent variable.
+        specification (string): Name of the specification.
+        sample (string): Name of the sample.
+        fingerprint (string): Fingerprint of the data, see
+            columnar_store.read_fingerprint.
+        seconds (float): Run time of the call which produced the result. Outcomes
+            which are fitted in one call share it.
+        regressors (list of strings): The regressors to store. If None, all are stored.
+
+    Returns:
+        rows (list of dicts): One row per regressor.
+
+    """
+    params, bse, pvalues, nobs = (
+        result[name] if isinstance(result, dict) else getattr(result, name)
+        for name in ["params", "bse", "pvalues", "nobs"]
+    )
+    if regressors is None:
+        regressors = list(params.index)
+
+    return [
+        {
+            "outcome": outcome,
+            "specification": specification,
+            "sample": sample,
+            "fingerprint": fingerprint,
+            "regressor": regressor,
+            "coef": float(params[regressor]),
+            "se": float(bse[regressor]),
+            "pvalue": float(pvalues[regressor]),
+            "nobs": int(nobs),
+            "seconds": seconds,
+        }
+        for regressor in regressors
+    ]
+
+
+def write_rows(path, rows, marker=None):
+    """Write rows to the warehouse, replacing rows with the same key.
+
+    Args:
+        path (str or pathlib.Path): Path of the SQLite database. It is created if it
+            does not exist.
+        rows (list of dicts): The rows, see result_rows.
+        marker (str or pathlib.Path): Path of the marker file of the writing task. If
+            not None, the fingerprints and the number of the rows are written to it
+            after the rows (see read_fingerprints).
+
+    Returns:
+        None
+
+    """
+    written = datetime.now(timezone.utc).isoformat()
+    statement = (
+        f"INSERT OR REPLACE INTO results ({', '.join(COLUMNS)}) "
+        f"VALUES ({', '.join(':' + col for col in COLUMNS)})"
+    )
+    connection = _connect(path)
+    try:
+        with connection:
+            connection.executemany(
+                statement,
+                [{**row, "written": written} for row in rows],
+            )
+    finally:
+        connection.close()
+
+    if marker is not None:
+        Path(marker).parent.mkdir(parents=True, exist_ok=True)
+        Path(marker).write_text(
+            json.dumps(
+                {
+                    "fingerprints": sorted({row["fingerprint"] for row in rows}),
+                    "rows": len(rows),
+                },
+                indent=4,
+            ),
+        )
+
+
+def read_fingerprints(markers):
+    """Read the fingerprints of the rows written by one or several tasks.
+
+    Args:
+        markers (list of str or pathlib.Path): Paths of the marker files, see
+            write_rows.
+
+    Returns:
+        (list of strings): The fingerprints, sorted.
+
+    """
+    return sorted(
+        {
+            fingerprint
+            for marker in markers
+            for fingerprint in json.loads(Path(marker).read_text())["fingerprints"]
+        },
+    )
+
+
+def query_results(path, latest=True, **criteria):
+    """Query rows of the warehouse.
+
+    Args:
+        path (str or pathlib.Path): Path of the SQLite database.
+        latest (bool): If True, only the most recently written row of every outcome,
+            specification, sample and regressor is returned. Without a fingerprint
+            criterion, rows of different data versions can be mixed.
+        **criteria: Columns of the key and the required value or list of values, e.g.
+            specification="order1_common_trend", regressor=["treated"]. The
+            fingerprint can also be NEWEST: only rows with the fingerprint of the most
+            recently written row which meets the other criteria are returned.
+
+    Returns:
+        (pandas DataFrame): The rows.
+
+    """
+    unknown = set(criteria) - set(KEY)
+    if unknown:
+        raise ValueError(f"Unknown columns: {sorted(unknown)}.")
+
+    newest = criteria.get("fingerprint") == NEWEST
+    if newest:
+        del criteria["fingerprint"]
+
+    conditions, values = [], []
+    for col, value in criteria.items():
+        value = [value] if isinstance(value, str) else list(value)
+        conditions.append(f"{col} IN ({', '.join('?' * len(value))})")
+        values += value
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    connection = _connect(path)
+    try:
+        rows = pd.read_sql_query(
+            f"SELECT * FROM results{where}",
+            connection,
+            params=values,
+        )
+    finally:
+        connection.close()
+
+    rows = rows.sort_values("written", kind="stable")
+    if newest and len(rows) > 0:
+        rows = rows.query(f"fingerprint == '{rows['fingerprint'].iloc[-1]}'")
+    if latest:
+        rows = rows.drop_duplicates(
+            subset=[col for col in KEY if col != "fingerprint"],
+            keep="last",
+        )
+
+    return rows.reset_index(drop=True)
+
+
+def query_in_order(path, keys, regressor, fingerprint=NEWEST):
+    """Query the latest estimates of one regressor for a list of fits.
+
+    Args:
+        path (str or pathlib.Path): Path of the SQLite database.
+        keys (list of tuples): (outcome, specification, sample) of the fits.
+        regressor (string): The regressor.
+        fingerprint (string or list of strings): The fingerprint(s) of the data, or
+            NEWEST (see query_results).
+
+    Returns:
+        (pandas DataFrame): The rows, in the order of keys and indexed by them.
+
+    Raises:
+        KeyError: If a fit is not in the warehouse.
+
+    """
+    rows = query_results(
+        path,
+        outcome=sorted({key[0] for key in keys}),
+        specification=sorted({key[1] for key in keys}),
+        sample=sorted({key[2] for key in keys}),
+        regressor=regressor,
+        fingerprint=fingerprint,
+    ).set_index(["outcome", "specification", "sample"])
+
+    return rows.loc[keys]
+
+
+def main_results_keys(y_vars, columns, trend):
+    """Keys of the fits of the main results tables.
+
+    Args:
+        y_vars (list of strings): The dependent variables.
+        columns (list of tuples): (years, order) of the columns of the table.
+        trend (string): "common_trend" or "separate_trends".
+
+    Returns:
+        (list of tuples): (outcome, specification, sample) of every dependent variable
+            and column, in this order.
+
+    """
+    return [
+        (y_var, f"order{order}_{trend}", f"{n_years}y")
+        for y_var in y_vars
+        for n_years, order in columns
+    ]
+
+
+def main_results_estimates(
+    path,
+    y_vars,
+    columns,
+    trend,
+    regressor="treated",
+    fingerprint=NEWEST,
+):
+    """Query the estimates of the main results tables.
+
+    Args:
+        path (str or pathlib.Path): Path of the SQLite database.
+        y_vars (list of strings): The dependent variables.
+        columns (list of tuples): (years, order) of the columns of the table.
+        trend (string): "common_trend" or "separate_trends".
+        regressor (string): The regressor.
+        fingerprint (string or list of strings): The fingerprint(s) of the data, or
+            NEWEST (see query_results).
+
+    Returns:
+        (pandas DataFrame): The name of the fit ("dep_vars", the dependent variable and
+            the number of the column, e.g. "risk_0"), the coefficient ("params") and the
+            p-value ("pvalues"), ordered by dependent variable and column.
+
+    """
+    rows = query_in_order(
+        path,
+        keys=main_results_keys(y_vars, columns, trend),
+        regressor=regressor,
+        fingerprint=fingerprint,
+    )
+
+    return pd.DataFrame(
+        {
+            "dep_vars": [
+                f"{y_var}_{i}" for y_var in y_vars for i in range(len(columns))
+            ],
+            "params": rows["coef"].to_numpy(),
+            "pvalues": rows["pvalue"].to_numpy(),
+        },
+    )
+
+
+def _connect(path):
+    """Open the database and create the results table if it does not exist.
+
+    Args:
+        path (str or pathlib.Path): Path of the SQLite database.
+
+    Returns:
+        (sqlite3.Connection): The connection.
+
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    # Tasks running in parallel wait for each other's writes.
+    connection = sqlite3.connect(path, timeout=60)
+    connection.execute(CREATE_TABLE)
+
+    return connection
@@ -1,4 +1,28 @@
-"""Sample restrictions used for the analysis."""
+"""Sample restrictions used for the analysis.
+
+The boolean row masks for the single restrictions (age, reform membership, time window
+and non-missing dependent variables) are computed once per data set and kept in a
+small cache. The samples are then selected with one combined mask instead of copying
+and filtering the full data set step by step.
+
+The selected samples are returned with the data types expected by the regression
+functions (see compact_schema.to_model_dtypes).
+
+Note: Data sets are identified by object identity. If columns of a data set are
+changed in place after a sample was selected, call clear_sample_cache().
+
+"""
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from nc_skills_step_public.data_management import compact_schema as schema
+
+# Maximum number of masks kept in the cache.
+MAX_CACHED_MASKS = 256
+
+_mask_cache = OrderedDict()
 
 
 def select_sample_for_analysis(data, y_vars, n_years, reform_list):
@@ -11,19 +35,19 @@ def select_sample_for_analysis(data, y_vars, n_years, reform_list):
         reform_list (list of strings): The reforms to include.
 
     Returns:
-        data_copy (pandas DataFrame): The selected sample.
+        (pandas DataFrame): The selected sample.
 
     """
-    data_copy = data.copy()
-    data_copy = data_copy.query("age > 23").dropna(subset=y_vars)
+    mask = _combine_masks(
+        data=data,
+        y_vars=y_vars,
+        reform_col="country_reform",
+        reform_list=reform_list,
+        window_col="rel_cohort",
+        window=range(-n_years, n_years),
+    )
 
-    # Restrict to the desired reforms.
-    data_copy = data_copy[data_copy["country_reform"].isin(reform_list)]
-
-    # Restrict to the desired time window.
-    data_copy = data_copy[data_copy["rel_cohort"].isin(range(-n_years, n_years))]
-
-    return data_copy
+    return schema.to_model_dtypes(data[mask])
 
 
 def select_sample_for_analysis_months_based(data, y_vars, n_months, reform_list):
@@ -36,19 +60,19 @@ def select_sample_for_analysis_months_based(data, y_vars, n_months, reform_list)
         reform_list (list of strings): The reforms to include.
 
     Returns:
-        data_copy (pandas DataFrame): The selected sample.
+        (pandas DataFrame): The selected sample.
 
     """
-    data_copy = data.copy()
-    data_copy = data_copy.query("age > 23").dropna(subset=y_vars)
-
-    # Restrict to the desired reforms.
-    data_copy = data_copy[data_copy["country_reform_w_month"].isin(reform_list)]
-
-    # Restrict to the desired time window.
-    data_copy = data_copy[data_copy["rel_month"].isin(range(-n_months, n_months))]
+    mask = _combine_masks(
+        data=data,
+        y_vars=y_vars,
+        reform_col="country_reform_w_month",
+        reform_list=reform_list,
+        window_col="rel_month",
+        window=range(-n_months, n_months),
+    )
 
-    return data_copy
+    return schema.to_model_dtypes(data[mask])
 
 
 def select_sample_for_placebo_test(data, y_vars, n_years, reform_list, placebo_year):
@@ -62,25 +86,19 @@ def select_sample_for_placebo_test(data, y_vars, n_years, reform_list, placebo_y
         placebo_year (int): Indicates the placebo variable.
 
     Returns:
-        data_copy (pandas DataFrame): The selected sample.
+        (pandas DataFrame): The selected sample.
 
     """
-    data_copy = data.copy()
-    data_copy = data_copy.query("age > 23").dropna(subset=y_vars)
-
-    # Restrict to the desired reforms.
-    data_copy = data_copy[
-        data_copy["country_reform_placebo" + str(placebo_year)].isin(reform_list)
-    ]
-
-    # Restrict to the desired time window.
-    data_copy = data_copy[
-        data_copy["rel_placebo_cohort" + str(placebo_year)].isin(
-            range(-n_years, n_years),
-        )
-    ]
+    mask = _combine_masks(
+        data=data,
+        y_vars=y_vars,
+        reform_col="country_reform_placebo" + str(placebo_year),
+        reform_list=reform_list,
+        window_col="rel_placebo_cohort" + str(placebo_year),
+        window=range(-n_years, n_years),
+    )
 
-    return data_copy
+    return schema.to_model_dtypes(data[mask])
 
 
 def select_sample_for_robustness_check_wo_piv_cohorts(
@@ -100,21 +118,19 @@ def select_sample_for_robustness_check_wo_piv_cohorts(
         reform_list (list of strings): The reforms to include.
 
     Returns:
-        data_copy (pandas DataFrame): The selected sample.
+        (pandas DataFrame): The selected sample.
 
     """
-    data_copy = data.copy()
-    data_copy = data_copy.query("age > 23").dropna(subset=y_vars)
-
-    # Restrict to the desired reforms.
-    data_copy = data_copy[data_copy["country_reform"].isin(reform_list)]
-
-    # Restrict to the desired time window.
-    data_copy = data_copy[
-        data_copy["rel_cohort"].isin([*range(-n_years - 1, -1), *range(0, n_years)])
-    ]
+    mask = _combine_masks(
+        data=data,
+        y_vars=y_vars,
+        reform_col="country_reform",
+        reform_list=reform_list,
+        window_col="rel_cohort",
+        window=[*range(-n_years - 1, -1), *range(0, n_years)],
+    )
 
-    return data_copy
+    return schema.to_model_dtypes(data[mask])
 
 
 def select_sample_for_robustness_check_wo_age_restriction(
@@ -132,16 +148,127 @@ def select_sample_for_robustness_check_wo_age_restriction(
         reform_list (list of strings): The reforms to include.
 
     Returns:
-        data_copy (pandas DataFrame): The selected sample.
+        (pandas DataFrame): The selected sample.
+
+    """
+    mask = _combine_masks(
+        data=data,
+        y_vars=y_vars,
+        reform_col="country_reform",
+        reform_list=reform_list,
+        window_col="rel_cohort",
+        window=range(-n_years, n_years),
+        age_restriction=False,
+    )
+
+    return schema.to_model_dtypes(data[mask])
+
+
+def clear_sample_cache():
+    """Remove all cached row masks.
+
+    Returns:
+        None
+
+    """
+    _mask_cache.clear()
+
+
+def _combine_masks(
+    data,
+    y_vars,
+    reform_col,
+    reform_list,
+    window_col,
+    window,
+    age_restriction=True,
+):
+    """Combine the cached row masks of the single sample restrictions.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        y_vars (list of strings): The dependent variables.
+        reform_col (string): The column identifying the relevant reform.
+        reform_list (list of strings): The reforms to include.
+        window_col (string): The running variable defining the time window.
+        window (range or list): The values of the running variable to include.
+        age_restriction (bool): If True, only individuals older than 23 are included.
+
+    Returns:
+        mask (numpy.ndarray): Boolean row mask of the selected sample.
+
+    """
+    mask = _cached_mask(
+        data=data,
+        key=("isin", reform_col, tuple(reform_list)),
+        compute=lambda: _isin_mask(data[reform_col], reform_list),
+    ) & _cached_mask(
+        data=data,
+        key=("isin", window_col, tuple(window)),
+        compute=lambda: _isin_mask(data[window_col], window),
+    )
+
+    if age_restriction is True:
+        mask = mask & _cached_mask(
+            data=data,
+            key=("age > 23",),
+            compute=lambda: (data["age"] > 23).to_numpy(
+                dtype=bool,
+                na_value=False,
+            ),
+        )
+
+    for y_var in y_vars:
+        mask = mask & _cached_mask(
+            data=data,
+            key=("notna", y_var),
+            compute=lambda y_var=y_var: data[y_var].notna().to_numpy(),
+        )
+
+    return mask
+
+
+def _isin_mask(series, values):
+    """Get the row mask of a column taking one of the values.
+
+    Args:
+        series (pandas Series): The column (also categorical or nullable integer).
+        values (list or range): The values to include.
+
+    Returns:
+        (numpy.ndarray): Boolean row mask, False for missing values.
 
     """
-    data_copy = data.copy()
-    data_copy = data_copy.dropna(subset=y_vars)
+    return series.isin(values).to_numpy(dtype=bool, na_value=False)
+
+
+def _cached_mask(data, key, compute):
+    """Get a row mask from the cache or compute and store it.
+
+    The least recently used masks are evicted once the cache holds more than
+    MAX_CACHED_MASKS masks.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        key (tuple): Identifies the restriction.
+        compute (callable): Computes the mask if it is not in the cache.
+
+    Returns:
+        mask (numpy.ndarray): Boolean row mask.
+
+    """
+    full_key = (id(data), len(data), *key)
+    entry = _mask_cache.get(full_key)
+
+    # The id of a data set which no longer exists can be reused by a new one.
+    if entry is not None and entry[0]() is data:
+        _mask_cache.move_to_end(full_key)
+        return entry[1]
 
-    # Restrict to the desired reforms.
-    data_copy = data_copy[data_copy["country_reform"].isin(reform_list)]
+    mask = np.asarray(compute(), dtype=bool)
+    _mask_cache[full_key] = (weakref.ref(data), mask)
 
-    # Restrict to the desired time window.
-    data_copy = data_copy[data_copy["rel_cohort"].isin(range(-n_years, n_years))]
+    while len(_mask_cache) > MAX_CACHED_MASKS:
+        _mask_cache.popitem(last=False)
 
-    return data_copy
+    return mask
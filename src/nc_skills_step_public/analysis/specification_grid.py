@@ -0,0 +1,192 @@
+"""Run grids of RDD specifications in parallel.
+
+A specification is a dictionary with the keys "y_var", "n_years", "order",
+"partially_treated" and "partially_treated_trend". Optional keys are "sample", the
+name of a function in select_sample_for_analysis.py, and "sample_y_vars", the
+dependent variables which must be non-missing in the sample (default: [y_var]).
+
+The columns needed for the regressions are copied once into shared memory. Worker
+processes attach to this block instead of receiving a pickled copy of the data with
+every job. Results are returned in the order of the specifications.
+
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from nc_skills_step_public.analysis import analysis_RDD_direct as direct
+from nc_skills_step_public.analysis import select_sample_for_analysis as sel
+
+REGRESSORS = [
+    "age",
+    "treated",
+    "partially_treated",
+    "rel_cohort",
+    "rel_cohort2",
+    "rel_cohort3",
+    "rel_cohort4",
+    "siblings_age12",
+]
+LABELS = ["country_reform", "country_reform_brth_year"]
+
+# Set in each worker process by _attach_shared_data.
+_worker = {}
+
+
+def run_specification_grid(data, specifications, reform_list, n_workers=None):
+    """Estimate a grid of RDD specifications.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        specifications (list of dicts): The specifications (see module docstring).
+        reform_list (list of strings): The reforms to include.
+        n_workers (int): Number of worker processes. If 1, the grid is run in the
+            current process. If None, all available cores are used.
+
+    Returns:
+        results (list of dicts): The regression results (see
+            analysis_RDD_direct.flexible_trends_direct), in the order of the
+            specifications.
+
+    """
+    return list(
+        iter_specification_grid(
+            data=data,
+            specifications=specifications,
+            reform_list=reform_list,
+            n_workers=n_workers,
+        ),
+    )
+
+
+def iter_specification_grid(data, specifications, reform_list, n_workers=None):
+    """Estimate a grid of RDD specifications and yield the results one by one.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        specifications (list of dicts): The specifications (see module docstring).
+        reform_list (list of strings): The reforms to include.
+        n_workers (int): Number of worker processes. If 1, the grid is run in the
+            current process. If None, all available cores are used.
+
+    Yields:
+        results (dict): The regression results, in the order of the specifications.
+
+    """
+    y_vars = list(
+        dict.fromkeys(
+            y_var
+            for spec in specifications
+            for y_var in [spec["y_var"], *spec.get("sample_y_vars", [])]
+        ),
+    )
+    numeric_cols = [col for col in REGRESSORS if col in data] + y_vars
+
+    if n_workers is None:
+        n_workers = os.cpu_count()
+
+    if n_workers == 1:
+        _worker["data"] = data[numeric_cols + LABELS]
+        try:
+            for spec in specifications:
+                yield _run_specification(spec=spec, reform_list=reform_list)
+        finally:
+            # Do not keep the data alive after the grid.
+            _worker.clear()
+        return
+
+    block = data[numeric_cols].to_numpy(dtype=float, na_value=np.nan)
+    categories = {}
+    codes = []
+    for col in LABELS:
+        categorical = pd.Categorical(data[col])
+        categories[col] = list(categorical.categories)
+        codes.append(categorical.codes)
+    block = np.column_stack([block, *codes]).astype(float)
+
+    shm = shared_memory.SharedMemory(create=True, size=block.nbytes)
+    try:
+        shared_block = np.ndarray(block.shape, dtype=block.dtype, buffer=shm.buf)
+        shared_block[:] = block
+        del block
+
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_attach_shared_data,
+            initargs=(shm.name, shared_block.shape, numeric_cols, categories),
+        ) as executor:
+            yield from executor.map(
+                _run_specification,
+                specifications,
+                [reform_list] * len(specifications),
+            )
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _attach_shared_data(name, shape, numeric_cols, categories):
+    """Attach a worker process to the data in shared memory.
+
+    Args:
+        name (string): Name of the shared memory block.
+        shape (tuple): Shape of the data block.
+        numeric_cols (list of strings): Names of the numeric columns.
+        categories (dict): Keys are the label columns, values are their categories.
+
+    Returns:
+        None
+
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    block = np.ndarray(shape, dtype=float, buffer=shm.buf)
+
+    data = pd.DataFrame(
+        block[:, : len(numeric_cols)],
+        columns=numeric_cols,
+        copy=False,
+    )
+    for i, col in enumerate(categories):
+        data[col] = pd.Categorical.from_codes(
+            block[:, len(numeric_cols) + i].astype(int),
+            categories=categories[col],
+        )
+
+    # Keep a reference to the shared memory, so that the buffer stays valid.
+    _worker["shm"] = shm
+    _worker["data"] = data
+
+
+def _run_specification(spec, reform_list):
+    """Select the sample and estimate one specification.
+
+    Args:
+        spec (dict): The specification.
+        reform_list (list of strings): The reforms to include.
+
+    Returns:
+        results (dict): The regression results.
+
+    """
+    select_sample = getattr(
+        sel,
+        spec.get("sample", "select_sample_for_analysis"),
+    )
+    reg_data = select_sample(
+        data=_worker["data"],
+        y_vars=spec.get("sample_y_vars", [spec["y_var"]]),
+        n_years=spec["n_years"],
+        reform_list=reform_list,
+    )
+
+    return direct.flexible_trends_direct(
+        data=reg_data,
+        y_var=spec["y_var"],
+        order=spec["order"],
+        partially_treated=spec.get("partially_treated", False),
+        partially_treated_trend=spec.get("partially_treated_trend", False),
+    )
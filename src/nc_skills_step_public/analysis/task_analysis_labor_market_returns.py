@@ -1,11 +1,12 @@
 """Analyze skills' labor market returns within the studied countries."""
 
-import pandas as pd
 import pytask
 from statsmodels.iolib.summary2 import summary_col
 
 from nc_skills_step_public.analysis import analysis_other_regressions as reg
 from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.data_management import columnar_store as store
+from nc_skills_step_public.data_management import compact_schema as schema
 
 # Preparation.
 set_of_regressors1 = ["years_educ", "female", "age", "age2"]
@@ -73,7 +74,9 @@ for y_var in ["ln_earnings_h_usd", "emp"]:
         {
             "scripts": ["analysis_other_regressions.py"],
             "global_info": SRC / "global_info.py",
-            "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+            "columnar_store": SRC / "data_management" / "columnar_store.py",
+            "compact_schema": SRC / "data_management" / "compact_schema.py",
+            "data": BLD / "python" / "data" / "step_reforms_final.parquet",
         },
     )
     @pytask.mark.task(id=y_var, kwargs=kwargs)
@@ -83,9 +86,9 @@ for y_var in ["ln_earnings_h_usd", "emp"]:
         employment.
 
         """
-        data = pd.read_pickle(depends_on["data"])
+        data = store.read_analysis_data(depends_on["data"])
 
-        data = data.query("age > 23")
+        data = schema.to_model_dtypes(data.query("age > 23"))
         # Restrict to the desired countries.
         data = data[data["country"].isin(["Bolivia", "Columbia", "Ghana", "Vietnam"])]
 
@@ -157,4 +160,4 @@ for y_var in ["ln_earnings_h_usd", "emp"]:
         with open(produces["main"], "w") as file:
             file.writelines(latex_table)
         with open(produces["main_short"], "w") as file:
-            file.writelines(latex_table_short)
\ No newline at end of file
+            file.writelines(latex_table_short)
@@ -1,6 +1,6 @@
 """Analyze the effect on literacy test scores."""
 
-import pandas as pd
+import numpy as np
 import pylatex as pl
 import pytask
 
@@ -9,6 +9,7 @@ from nc_skills_step_public.analysis import analysis_RDD as reg
 from nc_skills_step_public.analysis import plausible_values_method as pvm
 from nc_skills_step_public.analysis import select_sample_for_analysis as sel
 from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.data_management import columnar_store as store
 from nc_skills_step_public.final import latex_table_literacy_scores as tab
 
 plausible_values = [
@@ -50,12 +51,14 @@ for type in "fully_only", "partially", "partially_trend":
         {
             "scripts": [
                 "analysis_RDD.py",
+                "analysis_RDD_direct.py",
                 "select_sample_for_analysis.py",
                 "plausible_values_method.py",
             ],
             "global_info": SRC / "global_info.py",
             "latex_tables": SRC / "final" / "latex_table_literacy_scores.py",
-            "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+            "columnar_store": SRC / "data_management" / "columnar_store.py",
+            "data": BLD / "python" / "data" / "step_reforms_final.parquet",
         },
     )
     @pytask.mark.task(id=type, kwargs=kwargs)
@@ -65,7 +68,7 @@ for type in "fully_only", "partially", "partially_trend":
         scores.
 
         """
-        data = pd.read_pickle(depends_on["data"])
+        data = store.read_analysis_data(depends_on["data"])
 
         if type == "fully_only":
             reform_list = [
@@ -106,114 +109,73 @@ for type in "fully_only", "partially", "partially_trend":
             reform_list=reform_list,
         )
 
-        # Run regressions for each of the 10 plausible values.
-
-        model_names = [
-            "5Y linear",
-            "5Y quadratic",
-            "3Y linear",
-            "3Y quadratic",
-            "10Y linear",
-            "10Y quadratic",
-            "10Y cubic",
-        ]
-        coefs = {model: [] for model in model_names}
-        sampl_vars = {model: [] for model in model_names}
-        coefs2 = {model: [] for model in model_names}
-        sampl_vars2 = {model: [] for model in model_names}
-
-        for i in range(1, 11):
-            results_3lin = reg.linear_flexible_trends(
-                data=reg_data_3y,
-                y_var=f"PVLIT{i}_s",
-                reform_type_dummy=False,
-                partially_treated=partially_treated,
-                partially_treated_trend=partially_treated_trend,
-            )
-            results_3quad = reg.quadratic_flexible_trends(
-                data=reg_data_3y,
-                y_var=f"PVLIT{i}_s",
-                reform_type_dummy=False,
-                partially_treated=partially_treated,
-                partially_treated_trend=partially_treated_trend,
-            )
-            results_5lin = reg.linear_flexible_trends(
-                data=reg_data_5y,
-                y_var=f"PVLIT{i}_s",
-                reform_type_dummy=False,
-                partially_treated=partially_treated,
-                partially_treated_trend=partially_treated_trend,
-            )
-            results_5quad = reg.quadratic_flexible_trends(
-                data=reg_data_5y,
-                y_var=f"PVLIT{i}_s",
-                reform_type_dummy=False,
-                partially_treated=partially_treated,
-                partially_treated_trend=partially_treated_trend,
-            )
-            results_10lin = reg.linear_flexible_trends(
-                data=reg_data_10y,
-                y_var=f"PVLIT{i}_s",
-                reform_type_dummy=False,
-                partially_treated=partially_treated,
-                partially_treated_trend=partially_treated_trend,
-            )
-            results_10quad = reg.quadratic_flexible_trends(
-                data=reg_data_10y,
-                y_var=f"PVLIT{i}_s",
+        # Run regressions for all 10 plausible values at once. The plausible values only
+        # differ in the dependent variable, so they share one design matrix.
+        specifications = {
+            "5Y linear": (reg_data_5y, 1),
+            "5Y quadratic": (reg_data_5y, 2),
+            "3Y linear": (reg_data_3y, 1),
+            "3Y quadratic": (reg_data_3y, 2),
+            "10Y linear": (reg_data_10y, 1),
+            "10Y quadratic": (reg_data_10y, 2),
+            "10Y cubic": (reg_data_10y, 3),
+        }
+        model_names = list(specifications)
+
+        # Rows are plausible values, columns are models.
+        coefs = np.empty((len(plausible_values), len(model_names)))
+        sampl_vars = np.empty((len(plausible_values), len(model_names)))
+        coefs2 = np.empty((len(plausible_values), len(model_names)))
+        sampl_vars2 = np.empty((len(plausible_values), len(model_names)))
+        nobs = {}
+
+        for j, model in enumerate(model_names):
+            reg_data, order = specifications[model]
+
+            # The cubic specification always includes the partially treated indicator
+            # (see analysis_RDD.cubic_flexible_trends).
+            results = reg.flexible_trends_multiple_outcomes(
+                data=reg_data,
+                y_vars=plausible_values,
+                order=order,
                 reform_type_dummy=False,
-                partially_treated=partially_treated,
-                partially_treated_trend=partially_treated_trend,
-            )
-            results_10cub = reg.cubic_flexible_trends(
-                data=reg_data_10y,
-                y_var=f"PVLIT{i}_s",
+                partially_treated=partially_treated if order < 3 else True,
+                partially_treated_trend=partially_treated_trend if order < 3 else False,
             )
 
-            results = [
-                results_5lin,
-                results_5quad,
-                results_3lin,
-                results_3quad,
-                results_10lin,
-                results_10quad,
-                results_10cub,
-            ]
-
-            for j, model in enumerate(model_names):
-                coefs[model].append(results[j].params["treated"])
-                sampl_vars[model].append(results[j].bse["treated"] ** 2)
+            for i, pv in enumerate(plausible_values):
+                coefs[i, j] = results[pv]["params"]["treated"]
+                sampl_vars[i, j] = results[pv]["bse"]["treated"] ** 2
 
                 if partially_treated is True:
-                    coefs2[model].append(results[j].params["partially_treated"])
-                    sampl_vars2[model].append(results[j].bse["partially_treated"] ** 2)
+                    coefs2[i, j] = results[pv]["params"]["partially_treated"]
+                    sampl_vars2[i, j] = results[pv]["bse"]["partially_treated"] ** 2
 
-                elif partially_treated is False:
-                    pass
+            nobs[model] = results[plausible_values[-1]]["nobs"]
 
         # Store number of observations:
         N = {
-            "3 years": results_3lin.nobs,
-            "5 years": results_5lin.nobs,
-            "10 years": results_10lin.nobs,
+            "3 years": nobs["3Y linear"],
+            "5 years": nobs["5Y linear"],
+            "10 years": nobs["10Y linear"],
         }
 
         # Treated
         final_coefs, final_std_errors = pvm.plausible_values_method(
             coefs=coefs,
             sampl_vars=sampl_vars,
-            model_names=model_names,
-            n=10,
         )
+        final_coefs = dict(zip(model_names, final_coefs))
+        final_std_errors = dict(zip(model_names, final_std_errors))
 
         if partially_treated is True:
             # Partially treated
             final_coefs2, final_std_errors2 = pvm.plausible_values_method(
                 coefs=coefs2,
                 sampl_vars=sampl_vars2,
-                model_names=model_names,
-                n=10,
             )
+            final_coefs2 = dict(zip(model_names, final_coefs2))
+            final_std_errors2 = dict(zip(model_names, final_std_errors2))
         elif partially_treated is False:
             pass
 
@@ -11,16 +11,19 @@ from nc_skills_step_public import global_info as gl
 from nc_skills_step_public.analysis import analysis_RDD as reg
 from nc_skills_step_public.analysis import select_sample_for_analysis as sel
 from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.data_management import columnar_store as store
 from nc_skills_step_public.final import latex_tables_with_regression_results as tab
 
 
 @pytask.mark.depends_on(
     {
         "reg_functions": SRC / "analysis" / "analysis_RDD.py",
+        "regression_record": SRC / "analysis" / "regression_record.py",
         "select_sample": SRC / "analysis" / "select_sample_for_analysis.py",
         "latex_tables": SRC / "final" / "latex_tables_with_regression_results.py",
         "global_info": SRC / "global_info.py",
-        "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+        "columnar_store": SRC / "data_management" / "columnar_store.py",
+        "data": BLD / "python" / "data" / "step_reforms_final.parquet",
         "optimal_bandwidth": BLD / "python" / "data" / "optimal_bandwidth_CCT.pkl",
     },
 )
@@ -48,7 +51,7 @@ def task_analysis_with_optimal_bandwidth_CCT(depends_on, produces):
     results_dict = {key: None for key in y_vars}
     dep_var_names = {key: gl.nice_variable_names[key] for key in y_vars}
 
-    data = pd.read_pickle(depends_on["data"])
+    data = store.read_analysis_data(depends_on["data"])
     h_df = pd.read_pickle(depends_on["optimal_bandwidth"])
 
     for y_var in y_vars:
@@ -65,6 +68,7 @@ def task_analysis_with_optimal_bandwidth_CCT(depends_on, produces):
                 y_var=y_var,
                 reform_type_dummy=False,
                 partially_treated=True,
+                compact=True,
             ),
         ]
 
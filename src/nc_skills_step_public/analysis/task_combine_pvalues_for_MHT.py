@@ -1,42 +1,52 @@
-"""Combine data from excel files with p-values into one excel file.
+"""Combine the p-values of the main results into one excel file.
 
-This combined data is then used for Multiple Hypothesis Testing correction.
+The p-values are queried from the results warehouse. The excel file is the input of
+the Stata do-file for the Multiple Hypothesis Testing correction (see
+task_run_do_file.py).
 
 """
 
-
 import pandas as pd
 import pytask
 
-from nc_skills_step_public.config import BLD
+from nc_skills_step_public import global_info as gl
+from nc_skills_step_public.analysis import results_warehouse as wh
+from nc_skills_step_public.config import BLD, RESULTS_WAREHOUSE, SRC
+
+GROUPS = ["ncogn_skills", "preferences_binary"]
 
 
 @pytask.mark.depends_on(
     {
-        "ncogn_skills": BLD
-        / "python"
-        / "data"
-        / "pvalues"
-        / "common_trend"
-        / "pvalues_ncogn_skills.xlsx",
-        "preferences_binary": BLD
-        / "python"
-        / "data"
-        / "pvalues"
-        / "common_trend"
-        / "pvalues_preferences_binary.xlsx",
+        "scripts": ["results_warehouse.py"],
+        "global_info": SRC / "global_info.py",
+        # Markers of the rows written to the warehouse by the main results tables.
+        **{
+            group: BLD
+            / "python"
+            / "results"
+            / "with_partially_treated"
+            / "common_trend"
+            / f"results_with_partially_treated_{group}.json"
+            for group in GROUPS
+        },
     },
 )
 @pytask.mark.produces(
     BLD / "python" / "data" / "pvalues" / "common_trend" / "pvalues_combined.xlsx",
 )
 def task_combine_pvalues_for_MHT(depends_on, produces):
-    """Combine data from excel files with p-values into one excel file."""
-    ncogn_skills = pd.read_excel(depends_on["ncogn_skills"], header=None)
-    preferences_binary = pd.read_excel(depends_on["preferences_binary"], header=None)
-
-    combined = pd.concat([ncogn_skills, preferences_binary], axis=0)
-    combined.columns = ["dep_vars", "params", "pvalues"]
+    """Combine the p-values of the main results into one excel file."""
+    y_vars = [
+        y_var for group in GROUPS for y_var in gl.groups_of_dependent_variables[group]
+    ]
+    combined = wh.main_results_estimates(
+        RESULTS_WAREHOUSE,
+        y_vars=y_vars,
+        columns=gl.main_table_columns,
+        trend="common_trend",
+        fingerprint=wh.read_fingerprints([depends_on[group] for group in GROUPS]),
+    )
 
     # Export DataFrames to Excel using ExcelWriter
     with pd.ExcelWriter(produces) as excel_writer:
@@ -5,13 +5,14 @@ The correlations are between non-cognitive skills and outcomes or characteristic
 """
 
 import numpy as np
-import pandas as pd
 import pytask
 from scipy.stats import pearsonr
 
 from nc_skills_step_public import global_info as gl
 from nc_skills_step_public.analysis import select_sample_for_analysis as sel
 from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.data_management import columnar_store as store
+from nc_skills_step_public.data_management import compact_schema as schema
 from nc_skills_step_public.final import latex_tables_with_regression_results as tab
 
 for sample in "full", "ten_years":
@@ -30,17 +31,18 @@ for sample in "full", "ten_years":
         {
             "scripts": ["select_sample_for_analysis.py"],
             "latex_tables": SRC / "final" / "latex_tables_with_regression_results.py",
-            "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+            "columnar_store": SRC / "data_management" / "columnar_store.py",
+            "compact_schema": SRC / "data_management" / "compact_schema.py",
+            "data": BLD / "python" / "data" / "step_reforms_final.parquet",
         },
     )
     @pytask.mark.task(id=sample, kwargs=kwargs)
     def task_correlation_table(depends_on, sample, produces):
         "Correlation between non-cognitive skills and outcomes or characteristics."
-        data = pd.read_pickle(depends_on["data"])
+        data = store.read_analysis_data(depends_on["data"])
 
         if sample == "full":
-            data_sel = data.copy()
-            data_sel = data_sel.query("age > 23")
+            data_sel = schema.to_model_dtypes(data.query("age > 23"))
             # Restrict to the desired countries.
             data_sel = data_sel[
                 data_sel["country"].isin(["Bolivia", "Columbia", "Ghana", "Vietnam"])
@@ -6,24 +6,41 @@ Package is based on Calonico, Cattaneo, and Titiunik (2014).
 
 import pandas as pd
 import pytask
-import rdrobust as rdr
 
 from nc_skills_step_public import global_info as gl
+from nc_skills_step_public.analysis import optimal_bandwidth as ob
 from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.data_management import columnar_store as store
+from nc_skills_step_public.data_management import compact_schema as schema
 
 
 @pytask.mark.depends_on(
     {
+        "scripts": ["optimal_bandwidth.py", "cct_bandwidth.py"],
         "global_info": SRC / "global_info.py",
-        "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+        "columnar_store": SRC / "data_management" / "columnar_store.py",
+        "compact_schema": SRC / "data_management" / "compact_schema.py",
+        "data": BLD / "python" / "data" / "step_reforms_final.parquet",
+    },
+)
+@pytask.mark.produces(
+    {
+        "h": BLD / "python" / "data" / "optimal_bandwidth_CCT.pkl",
+        "bws": BLD / "python" / "data" / "optimal_bandwidth_CCT_bws.pkl",
     },
 )
-@pytask.mark.produces(BLD / "python" / "data" / "optimal_bandwidth_CCT.pkl")
 def task_optimal_bandwidth_CCT(depends_on, produces):
-    """Estimate the optimal bandwidth."""
-    data = pd.read_pickle(depends_on["data"])
+    """Estimate the optimal bandwidth.
+
+    The outcomes are distributed over processes, and the bws table of every outcome is
+    cached (see optimal_bandwidth.py). With gl.bandwidth_selector = "cells", all
+    outcomes are selected at once from cell statistics of rel_cohort (see
+    cct_bandwidth.py).
 
-    data = data.query("age > 23")
+    """
+    data = store.read_analysis_data(depends_on["data"])
+
+    data = schema.to_model_dtypes(data.query("age > 23"))
 
     # Restrict to the desired reforms.
     data = data[data["country_reform"].isin(gl.reforms_final)]
@@ -34,30 +51,32 @@ def task_optimal_bandwidth_CCT(depends_on, produces):
     # Concatenate the indicator variables with the original DataFrame
     data_with_dummies = pd.concat([data, dummies], axis=1)
 
+    bws = ob.select_bandwidths(
+        data=data_with_dummies,
+        y_vars=gl.dependent_variables,
+        running="rel_cohort",
+        covs=[
+            "cr_Bolivia1994",
+            "cr_Colombia1991",
+            "cr_Vietnam1991",
+            "cr_Ghana1961",
+            "cr_Ghana1987",
+            "siblings_age12",
+            "partially_treated",
+        ],
+        cluster="country_reform_brth_year",
+        p=1,
+        kernel="uniform",
+        bwselect="mserd",
+        cache_dir=BLD / "python" / "cache" / "bandwidths",
+        selector=gl.bandwidth_selector,
+    )
+
     # Prepare the final data set.
     h_df = pd.DataFrame(columns=["h (left)", "h (right)"])
-
     for y_var in gl.dependent_variables:
-        out = rdr.rdbwselect(
-            y=data_with_dummies[y_var],
-            x=data_with_dummies["rel_cohort"],
-            p=1,
-            kernel="uniform",
-            bwselect="mserd",
-            cluster=data_with_dummies["country_reform_brth_year"],
-            covs=data_with_dummies[
-                [
-                    "cr_Bolivia1994",
-                    "cr_Colombia1991",
-                    "cr_Vietnam1991",
-                    "cr_Ghana1961",
-                    "cr_Ghana1987",
-                    "siblings_age12",
-                    "partially_treated",
-                ]
-            ],
-        )
-        opt_h = out.bws[["h (left)", "h (right)"]].values.round(0)
+        opt_h = bws[y_var][["h (left)", "h (right)"]].values.round(0)
         h_df.loc[y_var, :] = opt_h
 
-    h_df.to_pickle(produces)
+    h_df.to_pickle(produces["h"])
+    pd.concat(bws, names=["y_var"]).to_pickle(produces["bws"])
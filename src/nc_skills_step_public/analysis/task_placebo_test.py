@@ -1,12 +1,13 @@
 """Placebo test."""
 
-import pandas as pd
 import pytask
 
 from nc_skills_step_public import global_info as gl
 from nc_skills_step_public.analysis import analysis_other_regressions as reg
+from nc_skills_step_public.analysis import results_warehouse as wh
 from nc_skills_step_public.analysis import select_sample_for_analysis as sel
-from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.config import BLD, RESULTS_WAREHOUSE, SRC
+from nc_skills_step_public.data_management import columnar_store as store
 from nc_skills_step_public.final import latex_tables_with_regression_results as tab
 
 # Placebo Test 1: Shifting all pivotal cohorts.
@@ -21,24 +22,15 @@ y_vars = (
         "scripts": [
             "analysis_other_regressions.py",
             "select_sample_for_analysis.py",
+            "results_warehouse.py",
         ],
         "global_info": SRC / "global_info.py",
-        "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+        "columnar_store": SRC / "data_management" / "columnar_store.py",
+        "data": BLD / "python" / "data" / "step_reforms_final.parquet",
     },
 )
 @pytask.mark.produces(
     {
-        **{
-            "txt"
-            + y_var
-            + i: BLD
-            / "python"
-            / "tables"
-            / "placebo_test"
-            / f"results_{y_var}_placebo_test_{i}.txt"
-            for y_var in y_vars
-            for i in gl.placebo_years.values()
-        },
         **{"tex": BLD / "python" / "tables" / "placebo_test" / "placebo_test.tex"},
         **{
             "tex_multiple": BLD
@@ -47,6 +39,8 @@ y_vars = (
             / "placebo_test"
             / "multiple_placebo_test.tex",
         },
+        # Marker of the rows written to the results warehouse.
+        "warehouse": BLD / "python" / "results" / "placebo_test" / "placebo_test.json",
     },
 )
 def task_placebo_test(depends_on, produces):
@@ -54,9 +48,31 @@ def task_placebo_test(depends_on, produces):
     results_dict = {key: [None] * len(gl.placebo_years) for key in y_vars}
     dep_var_names = {key: gl.nice_variable_names[key] for key in y_vars}
 
-    data = pd.read_pickle(depends_on["data"])
+    # Load only the columns needed for the placebo regressions and only individuals
+    # who belong to one of the reforms for at least one placebo cutoff.
+    placebo_columns = [
+        col
+        for i in gl.placebo_years.values()
+        for col in [
+            "placebo" + i,
+            "rel_placebo_cohort" + i,
+            "country_reform_placebo" + i,
+            "country_reform_placebo" + i + "_brth_year",
+        ]
+    ]
+    data = store.read_analysis_data(
+        depends_on["data"],
+        columns=["age", "siblings_age12", *y_vars, *placebo_columns],
+        filters=[
+            [("country_reform_placebo" + i, "in", gl.reforms_final)]
+            for i in gl.placebo_years.values()
+        ],
+    )
 
-    for i in gl.placebo_years.values():
+    fingerprint = store.read_fingerprint(depends_on["data"])
+    rows = []
+
+    for shift, i in gl.placebo_years.items():
         reg_data_5y = sel.select_sample_for_placebo_test(
             data=data,
             y_vars=y_vars,
@@ -71,15 +87,22 @@ def task_placebo_test(depends_on, produces):
             # Rename the placebo-"treated" indicator to use the function creating a latex table.
             reg_data_5y = reg_data_5y.rename(columns={"placebo" + i: "placebo"})
 
-            results_dict[y_var][eval(i)] = reg.placebo_test(
+            results_dict[y_var][eval(i)], seconds = wh.timed(
+                reg.placebo_test,
                 data=reg_data_5y,
                 y_var=y_var,
                 placebo_year=i,
             )
+            rows += wh.result_rows(
+                result=results_dict[y_var][eval(i)],
+                outcome=y_var,
+                specification="placebo_test",
+                sample=f"5y_shift{shift:+d}",
+                fingerprint=fingerprint,
+                seconds=seconds,
+            )
 
-            table = results_dict[y_var][eval(i)].summary().as_text()
-            with open(produces["txt" + y_var + i], "w") as file:
-                file.writelines(table)
+    wh.write_rows(RESULTS_WAREHOUSE, rows, marker=produces["warehouse"])
 
     placebo5_dict = {key: [value[-1]] for key, value in results_dict.items()}
     tab.create_placebo_test_table(
@@ -5,7 +5,6 @@ The predictions are based on the treatment effects of the reforms and the correl
 """
 
 import numpy as np
-import pandas as pd
 import pytask
 import statsmodels.formula.api as smf
 
@@ -13,6 +12,8 @@ from nc_skills_step_public import global_info as gl
 from nc_skills_step_public.analysis import analysis_RDD as reg
 from nc_skills_step_public.analysis import select_sample_for_analysis as sel
 from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.data_management import columnar_store as store
+from nc_skills_step_public.data_management import compact_schema as schema
 
 skills = {
     "all_skills": ["years_educ"]
@@ -35,16 +36,18 @@ for skill_set in skills:
         {
             "scripts": ["analysis_RDD.py", "select_sample_for_analysis.py"],
             "global_info": SRC / "global_info.py",
-            "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+            "columnar_store": SRC / "data_management" / "columnar_store.py",
+            "compact_schema": SRC / "data_management" / "compact_schema.py",
+            "data": BLD / "python" / "data" / "step_reforms_final.parquet",
         },
     )
     @pytask.mark.task(id=skill_set, kwargs=kwargs)
     def task_predict_wage_change(depends_on, skill_set, produces):
         """Use wage correlations and treatment effects to predict wage change."""
-        data = pd.read_pickle(depends_on["data"])
+        data = store.read_analysis_data(depends_on["data"])
 
         # Get the correlations of skills with wages using ALL skills.
-        data_wage_returns = data.query("age > 23").copy()
+        data_wage_returns = schema.to_model_dtypes(data.query("age > 23"))
         data_wage_returns = data_wage_returns[
             data_wage_returns["country"].isin(
                 ["Bolivia", "Columbia", "Ghana", "Vietnam"],
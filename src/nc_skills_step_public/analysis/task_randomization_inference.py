@@ -0,0 +1,91 @@
+"""Randomization inference and wild cluster bootstrap for the treatment effect.
+
+The main specification (5 years window, linear trends, partially treated indicator) is
+estimated for many random reassignments of the pivotal cohorts and for many
+permutations of the treatment status across birth cohorts. In addition, wild cluster
+bootstrap p-values account for the small number of clusters.
+
+"""
+
+import pytask
+
+from nc_skills_step_public import global_info as gl
+from nc_skills_step_public.analysis import randomization_inference as ri
+from nc_skills_step_public.analysis import select_sample_for_analysis as sel
+from nc_skills_step_public.analysis import wild_cluster_bootstrap as wcb
+from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.data_management import columnar_store as store
+from nc_skills_step_public.final import latex_tables_with_regression_results as tab
+
+groups = ["years_educ", "cogn_skills", "ncogn_skills", "preferences_binary"]
+
+
+@pytask.mark.depends_on(
+    {
+        "scripts": [
+            "randomization_inference.py",
+            "wild_cluster_bootstrap.py",
+            "analysis_RDD_direct.py",
+            "select_sample_for_analysis.py",
+        ],
+        "latex_tables": SRC / "final" / "latex_tables_with_regression_results.py",
+        "global_info": SRC / "global_info.py",
+        "columnar_store": SRC / "data_management" / "columnar_store.py",
+        "data": BLD / "python" / "data" / "step_reforms_final.parquet",
+    },
+)
+@pytask.mark.produces(
+    BLD / "python" / "tables" / "randomization_inference" / "randomization_pvalues.tex",
+)
+def task_randomization_inference(depends_on, produces):
+    """Randomization and wild cluster bootstrap p-values of the treatment effect."""
+    y_vars = [
+        y_var for group in groups for y_var in gl.groups_of_dependent_variables[group]
+    ]
+    dep_var_names = {key: gl.nice_variable_names[key] for key in y_vars}
+    results = {key: {} for key in y_vars}
+
+    data = store.read_analysis_data(
+        depends_on["data"],
+        reform_list=gl.reforms_final,
+    )
+
+    for group in groups:
+        dep_vars = gl.groups_of_dependent_variables[group]
+        reg_data_5y = sel.select_sample_for_analysis(
+            data=data,
+            y_vars=dep_vars,
+            n_years=5,
+            reform_list=gl.reforms_final,
+        )
+
+        for scheme in "cutoff", "cohort":
+            group_results = ri.randomization_inference(
+                data=reg_data_5y,
+                y_vars=dep_vars,
+                order=1,
+                partially_treated=True,
+                scheme=scheme,
+                n_draws=gl.n_randomization_draws,
+                seed=gl.randomization_seed,
+            )
+            for y_var in dep_vars:
+                results[y_var][scheme] = group_results[y_var]
+
+        bootstrap_results = wcb.wild_cluster_bootstrap(
+            data=reg_data_5y,
+            y_vars=dep_vars,
+            order=1,
+            partially_treated=True,
+            n_boot=gl.n_bootstrap_draws,
+            weight_type="webb",
+            seed=gl.randomization_seed,
+        )
+        for y_var in dep_vars:
+            results[y_var]["wild_bootstrap"] = bootstrap_results[y_var]
+
+    tab.create_table_with_randomization_pvalues(
+        file=str(produces).replace(".tex", ""),
+        results=results,
+        dep_var_names=dep_var_names,
+    )
@@ -6,13 +6,14 @@ cutoff.
 """
 
 
-import pandas as pd
 import pytask
 
 from nc_skills_step_public import global_info as gl
 from nc_skills_step_public.analysis import analysis_RDD as reg
 from nc_skills_step_public.analysis import select_sample_for_analysis as sel
+from nc_skills_step_public.analysis import specification_grid as spec_grid
 from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.data_management import columnar_store as store
 from nc_skills_step_public.final import latex_tables_with_regression_results as tab
 
 for group in ("ncogn_skills", "preferences_binary"):
@@ -29,11 +30,13 @@ for group in ("ncogn_skills", "preferences_binary"):
         {
             "scripts": [
                 "select_sample_for_analysis.py",
-                "analysis_RDD.py",
+                "analysis_RDD_direct.py",
+                "specification_grid.py",
             ],
             "latex_table": SRC / "final" / "latex_tables_with_regression_results.py",
             "global_info": SRC / "global_info.py",
-            "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+            "columnar_store": SRC / "data_management" / "columnar_store.py",
+            "data": BLD / "python" / "data" / "step_reforms_final.parquet",
         },
     )
     @pytask.mark.task(id=group, kwargs=kwargs)
@@ -47,80 +50,30 @@ for group in ("ncogn_skills", "preferences_binary"):
         results_dict = {key: None for key in dep_vars}
         dep_var_names = {key: gl.nice_variable_names[key] for key in dep_vars}
 
-        data = pd.read_pickle(depends_on["data"])
-
-        # 3 years
-        reg_data_3y = sel.select_sample_for_analysis(
-            data=data,
-            y_vars=dep_vars,
-            n_years=3,
-            reform_list=gl.reforms_final,
-        )
-        # 5 years
-        reg_data_5y = sel.select_sample_for_analysis(
-            data=data,
-            y_vars=dep_vars,
-            n_years=5,
-            reform_list=gl.reforms_final,
-        )
-        # 10 years
-        reg_data_10y = sel.select_sample_for_analysis(
+        data = store.read_analysis_data(depends_on["data"])
+
+        # (years, order) of the columns. The sample is selected on all dependent
+        # variables of the group.
+        columns = [(10, 2), (10, 3), (10, 4), (3, 2), (3, 3), (5, 2), (5, 3), (5, 4)]
+        specifications = [
+            {
+                "y_var": y_var,
+                "sample_y_vars": dep_vars,
+                "n_years": n_years,
+                "order": order,
+                "partially_treated": True,
+            }
+            for y_var in dep_vars
+            for n_years, order in columns
+        ]
+        results = spec_grid.run_specification_grid(
             data=data,
-            y_vars=dep_vars,
-            n_years=10,
+            specifications=specifications,
             reform_list=gl.reforms_final,
         )
 
-        for y_var in dep_vars:
-            results_3y_2 = reg.quadratic_flexible_trends(
-                data=reg_data_3y,
-                y_var=y_var,
-                reform_type_dummy=False,
-                partially_treated=True,
-            )
-            results_3y_3 = reg.cubic_flexible_trends(
-                data=reg_data_3y,
-                y_var=y_var,
-            )
-            results_5y_2 = reg.quadratic_flexible_trends(
-                data=reg_data_5y,
-                y_var=y_var,
-                reform_type_dummy=False,
-                partially_treated=True,
-            )
-            results_5y_3 = reg.cubic_flexible_trends(
-                data=reg_data_5y,
-                y_var=y_var,
-            )
-            results_5y_4 = reg.quartic_flexible_trends(
-                data=reg_data_5y,
-                y_var=y_var,
-            )
-            results_10y_2 = reg.quadratic_flexible_trends(
-                data=reg_data_10y,
-                y_var=y_var,
-                reform_type_dummy=False,
-                partially_treated=True,
-            )
-            results_10y_3 = reg.cubic_flexible_trends(
-                data=reg_data_10y,
-                y_var=y_var,
-            )
-            results_10y_4 = reg.quartic_flexible_trends(
-                data=reg_data_10y,
-                y_var=y_var,
-            )
-
-            results_dict[y_var] = [
-                results_10y_2,
-                results_10y_3,
-                results_10y_4,
-                results_3y_2,
-                results_3y_3,
-                results_5y_2,
-                results_5y_3,
-                results_5y_4,
-            ]
+        for i, y_var in enumerate(dep_vars):
+            results_dict[y_var] = results[i * len(columns) : (i + 1) * len(columns)]
 
         column_headers = [
             "quad.",
@@ -159,10 +112,12 @@ for group in ("ncogn_skills", "preferences_binary"):
             "scripts": [
                 "select_sample_for_analysis.py",
                 "analysis_RDD.py",
+                "regression_record.py",
             ],
             "latex_table": SRC / "final" / "latex_tables_with_regression_results.py",
             "global_info": SRC / "global_info.py",
-            "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+            "columnar_store": SRC / "data_management" / "columnar_store.py",
+            "data": BLD / "python" / "data" / "step_reforms_final.parquet",
         },
     )
     @pytask.mark.task(id=group, kwargs=kwargs)
@@ -176,7 +131,7 @@ for group in ("ncogn_skills", "preferences_binary"):
         results_dict = {key: None for key in dep_vars}
         dep_var_names = {key: gl.nice_variable_names[key] for key in dep_vars}
 
-        data = pd.read_pickle(depends_on["data"])
+        data = store.read_analysis_data(depends_on["data"])
 
         # 3 years
         reg_data_3y = sel.select_sample_for_analysis(
@@ -206,18 +161,21 @@ for group in ("ncogn_skills", "preferences_binary"):
                 y_var=y_var,
                 reform_type_dummy=False,
                 partially_treated=True,
+                compact=True,
             )
             results_5y = reg.linear_inflexible_trends(
                 data=reg_data_5y,
                 y_var=y_var,
                 reform_type_dummy=False,
                 partially_treated=True,
+                compact=True,
             )
             results_10y = reg.linear_inflexible_trends(
                 data=reg_data_10y,
                 y_var=y_var,
                 reform_type_dummy=False,
                 partially_treated=True,
+                compact=True,
             )
 
             results_dict[y_var] = [results_5y, results_3y, results_10y]
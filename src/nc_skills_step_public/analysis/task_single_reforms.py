@@ -3,13 +3,14 @@
 Partially treated individuals are included.
 
 """
-import pandas as pd
 import pytask
 
 from nc_skills_step_public import global_info as gl
 from nc_skills_step_public.analysis import analysis_other_regressions as reg
+from nc_skills_step_public.analysis import results_warehouse as wh
 from nc_skills_step_public.analysis import select_sample_for_analysis as sel
-from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.config import BLD, RESULTS_WAREHOUSE, SRC
+from nc_skills_step_public.data_management import columnar_store as store
 from nc_skills_step_public.final import latex_tables_with_regression_results as tab
 
 y_vars = (
@@ -23,26 +24,16 @@ y_vars = (
         "scripts": [
             "analysis_other_regressions.py",
             "select_sample_for_analysis.py",
+            "results_warehouse.py",
         ],
         "global_info": SRC / "global_info.py",
         "latex_tables": SRC / "final" / "latex_tables_with_regression_results.py",
-        "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+        "columnar_store": SRC / "data_management" / "columnar_store.py",
+        "data": BLD / "python" / "data" / "step_reforms_final.parquet",
     },
 )
 @pytask.mark.produces(
     {
-        **{
-            "txt"
-            + y_var
-            + reform: BLD
-            / "python"
-            / "tables"
-            / "with_partially_treated"
-            / "single_reforms"
-            / f"results_{y_var}_{reform}.txt"
-            for y_var in y_vars
-            for reform in gl.reforms_final
-        },
         **{
             "tex": BLD
             / "python"
@@ -51,6 +42,13 @@ y_vars = (
             / "single_reforms"
             / "results_single_reforms.tex",
         },
+        # Marker of the rows written to the results warehouse.
+        "warehouse": BLD
+        / "python"
+        / "results"
+        / "with_partially_treated"
+        / "single_reforms"
+        / "results_single_reforms.json",
     },
 )
 def task_single_reforms_analysis(depends_on, produces):
@@ -58,7 +56,7 @@ def task_single_reforms_analysis(depends_on, produces):
     results_dict = {key: [None] * len(gl.reforms_final) for key in y_vars}
     dep_var_names = {key: gl.nice_variable_names[key] for key in y_vars}
 
-    data = pd.read_pickle(depends_on["data"])
+    data = store.read_analysis_data(depends_on["data"])
 
     reg_data_5y = sel.select_sample_for_analysis(
         data=data,
@@ -67,6 +65,9 @@ def task_single_reforms_analysis(depends_on, produces):
         reform_list=gl.reforms_final,
     )
 
+    fingerprint = store.read_fingerprint(depends_on["data"])
+    rows = []
+
     for _i, reform in enumerate(gl.reforms_final):
         partially_treated = reform == "Vietnam1991"
 
@@ -75,15 +76,22 @@ def task_single_reforms_analysis(depends_on, produces):
                 f"country_reform == '{reform}'",
             ).copy()
 
-            results_dict[y_var][_i] = reg.linear_flexible_trends_single_reform(
+            results_dict[y_var][_i], seconds = wh.timed(
+                reg.linear_flexible_trends_single_reform,
                 data=reg_data_5y_single_reform,
                 y_var=y_var,
                 partially_treated=partially_treated,
             )
+            rows += wh.result_rows(
+                result=results_dict[y_var][_i],
+                outcome=y_var,
+                specification="linear_single_reform",
+                sample=f"5y_{reform}",
+                fingerprint=fingerprint,
+                seconds=seconds,
+            )
 
-            table = results_dict[y_var][_i].summary().as_text()
-            with open(produces["txt" + y_var + reform], "w") as file:
-                file.writelines(table)
+    wh.write_rows(RESULTS_WAREHOUSE, rows, marker=produces["warehouse"])
 
     tab.create_tabular_tex_code_with_reg_results(
         file=str(produces["tex"]).replace(".tex", ""),
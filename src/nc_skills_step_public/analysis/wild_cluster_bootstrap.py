@@ -0,0 +1,280 @@
+"""Wild cluster bootstrap for the RDD regressions with few clusters.
+
+The restricted wild cluster bootstrap (WCR) imposes the null hypothesis that the
+coefficient of interest is zero, multiplies the restricted residuals of every cluster
+by a random weight and compares the bootstrap t-statistics with the observed one.
+
+The bootstrap coefficient and the cluster scores of a draw are linear in the cluster
+weights. Hence, the cluster-level sums are computed once and all draws of a batch are
+evaluated with one matrix product instead of refitting the model. The model is the
+same as in analysis_RDD.py (see analysis_RDD_direct.build_design_matrix).
+
+"""
+
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from nc_skills_step_public.analysis import analysis_RDD_direct as direct
+
+WEBB_WEIGHTS = np.array(
+    [-np.sqrt(1.5), -1, -np.sqrt(0.5), np.sqrt(0.5), 1, np.sqrt(1.5)],
+)
+
+# Set in each worker process by _set_bootstrap_data. Threads share the sums directly and
+# do not use it, so that concurrent calls do not overwrite each other's sums.
+_worker = {}
+
+
+def wild_cluster_bootstrap(
+    data,
+    y_vars,
+    order=1,
+    reform_type_dummy=False,
+    partially_treated=False,
+    partially_treated_trend=False,
+    weights=None,
+    regressor="treated",
+    n_boot=9999,
+    weight_type="rademacher",
+    seed=0,
+    batch_size=1000,
+    n_workers=1,
+    executor="thread",
+):
+    """Compute wild cluster bootstrap p-values for several outcomes.
+
+    Standard errors are clustered on country_reform_brth_year.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        y_vars (list of strings): Dependent variables.
+        order (int): Order of the polynomial cohort trends (1 to 4).
+        reform_type_dummy (bool): If True: indicator for unsuccessful reforms is added.
+        partially_treated (bool): If True: indicator for partially treated is added.
+        partially_treated_trend (bool): If True: separate trend for partially treated is added.
+        weights (string): Weights for WLS.
+        regressor (string): The coefficient to be tested.
+        n_boot (int): Number of bootstrap draws.
+        weight_type (string): "rademacher" or "webb".
+        seed (int): Seed of the random number generator.
+        batch_size (int): Number of draws evaluated in one matrix product.
+        n_workers (int): Number of threads or processes. If None, all available cores
+            are used.
+        executor (string): "thread" or "process".
+
+    Returns:
+        results (dict): Keys are the dependent variables, values are dictionaries with
+            the coefficient ("coefficient"), the clustered standard error ("bse"),
+            the t-statistic ("tvalue"), the bootstrap p-value ("pvalue"), the number of
+            observations ("nobs") and the number of clusters ("n_clusters").
+
+    """
+    if weight_type not in ("rademacher", "webb"):
+        raise ValueError(f"Unknown weight type {weight_type}.")
+    if executor not in ("thread", "process"):
+        raise ValueError(f"Unknown executor {executor}. Use 'thread' or 'process'.")
+
+    design = direct.build_design_matrix(
+        data=data,
+        y_vars=y_vars,
+        order=order,
+        reform_type_dummy=reform_type_dummy,
+        partially_treated=partially_treated,
+        partially_treated_trend=partially_treated_trend,
+        weights=weights,
+    )
+    j = design["names"].index(regressor)
+
+    not_missing = ~np.isnan(design["Y"])
+    patterns = {}
+    for i in range(not_missing.shape[1]):
+        patterns.setdefault(not_missing[:, i].tobytes(), []).append(i)
+
+    results = {}
+    for outcomes in patterns.values():
+        rows = not_missing[:, outcomes[0]]
+        sums = bootstrap_cluster_sums(
+            X=design["X"][rows],
+            Y=design["Y"][np.ix_(rows, outcomes)],
+            cluster_codes=np.unique(
+                design["cluster_codes"][rows],
+                return_inverse=True,
+            )[1],
+            j=j,
+        )
+        exceed = _count_exceedances(
+            sums=sums,
+            n_boot=n_boot,
+            weight_type=weight_type,
+            seed=seed,
+            batch_size=batch_size,
+            n_workers=n_workers,
+            executor=executor,
+        )
+        for i, outcome in enumerate(outcomes):
+            results[y_vars[outcome]] = {
+                "coefficient": sums["coefficient"][i],
+                "bse": sums["bse"][i],
+                "tvalue": sums["tvalue"][i],
+                "pvalue": exceed[i] / n_boot,
+                "nobs": int(rows.sum()),
+                "n_clusters": sums["scores"].shape[0],
+            }
+
+    return {y_var: results[y_var] for y_var in y_vars}
+
+
+def bootstrap_cluster_sums(X, Y, cluster_codes, j):
+    """Precompute the cluster-level sums of the restricted wild cluster bootstrap.
+
+    With cluster weights v, the bootstrap coefficient of regressor j is s'v and its
+    cluster scores are C v, where C = diag(s) - A (X'X)^-1 S'. Here, s are the cluster
+    sums of the restricted residuals weighted by row j of (X'X)^-1 X', A are the cluster
+    sums of these weights times X and S are the cluster sums of the restricted scores.
+
+    Args:
+        X (numpy.ndarray): Design matrix (n x k).
+        Y (numpy.ndarray): Dependent variables (n x m) without missing values.
+        cluster_codes (numpy.ndarray): Integer cluster codes 0, ..., G - 1 (n).
+        j (int): Column of the tested regressor.
+
+    Returns:
+        sums (dict): The coefficients ("coefficient"), standard errors ("bse") and
+            t-statistics ("tvalue") of regressor j, the vectors s ("coefficient_sums",
+            G x m), the matrices C ("scores", G x G x m) and the small sample
+            correction ("correction").
+
+    """
+    n_obs, n_params = X.shape
+    bread, params = direct._bread_and_params(X=X, Y=Y)
+    weights_j = X @ bread[j]
+
+    # Restricted model: regressor j is excluded.
+    X_restricted = np.delete(X, j, axis=1)
+    params_restricted = np.linalg.lstsq(X_restricted, Y, rcond=None)[0]
+    resid_restricted = Y - X_restricted @ params_restricted
+
+    s = direct.cluster_sums(weights_j[:, None] * resid_restricted, cluster_codes)
+    A = direct.cluster_sums(weights_j[:, None] * X, cluster_codes)
+    S = direct.cluster_sums(X[:, :, None] * resid_restricted[:, None, :], cluster_codes)
+    n_clusters = s.shape[0]
+
+    scores = -np.einsum("gk,kl,hlm->ghm", A, bread, S)
+    scores[np.arange(n_clusters), np.arange(n_clusters)] += s
+
+    correction = (n_clusters / (n_clusters - 1)) * ((n_obs - 1) / (n_obs - n_params))
+    resid = Y - X @ params
+    bse = np.sqrt(
+        correction
+        * (direct.cluster_sums(weights_j[:, None] * resid, cluster_codes) ** 2).sum(0),
+    )
+
+    return {
+        "coefficient": params[j],
+        "bse": bse,
+        "tvalue": params[j] / bse,
+        "coefficient_sums": s,
+        "scores": scores,
+        "correction": correction,
+    }
+
+
+def _count_exceedances(
+    sums,
+    n_boot,
+    weight_type,
+    seed,
+    batch_size,
+    n_workers,
+    executor,
+):
+    """Count bootstrap t-statistics which are at least as large as the observed ones.
+
+    Args:
+        sums (dict): See bootstrap_cluster_sums.
+        n_boot (int): Number of bootstrap draws.
+        weight_type (string): "rademacher" or "webb".
+        seed (int): Seed of the random number generator.
+        batch_size (int): Number of draws evaluated in one matrix product.
+        n_workers (int): Number of threads or processes.
+        executor (string): "thread" or "process".
+
+    Returns:
+        exceed (numpy.ndarray): Number of draws with |t*| >= |t| for every outcome.
+
+    """
+    batch_sizes = [
+        min(batch_size, n_boot - start) for start in range(0, n_boot, batch_size)
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(batch_sizes))
+    weight_types = [weight_type] * len(batch_sizes)
+
+    if n_workers is None:
+        n_workers = os.cpu_count()
+
+    if n_workers == 1:
+        batch = functools.partial(_bootstrap_batch, sums=sums)
+        counts = list(map(batch, seeds, batch_sizes, weight_types))
+    elif executor == "thread":
+        batch = functools.partial(_bootstrap_batch, sums=sums)
+        with ThreadPoolExecutor(max_workers=n_workers) as pool_executor:
+            counts = list(pool_executor.map(batch, seeds, batch_sizes, weight_types))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_set_bootstrap_data,
+            initargs=(sums,),
+        ) as pool_executor:
+            counts = list(
+                pool_executor.map(_bootstrap_batch, seeds, batch_sizes, weight_types),
+            )
+
+    return np.sum(counts, axis=0)
+
+
+def _set_bootstrap_data(sums):
+    """Make the precomputed sums available in a worker process.
+
+    Args:
+        sums (dict): See bootstrap_cluster_sums.
+
+    Returns:
+        None
+
+    """
+    _worker["sums"] = sums
+
+
+def _bootstrap_batch(seed, n_draws, weight_type, sums=None):
+    """Evaluate one batch of bootstrap draws.
+
+    Args:
+        seed (numpy.random.SeedSequence): Seed of the batch.
+        n_draws (int): Number of draws in the batch.
+        weight_type (string): "rademacher" or "webb".
+        sums (dict): See bootstrap_cluster_sums. If None, the sums set in the worker
+            process by _set_bootstrap_data are used.
+
+    Returns:
+        exceed (numpy.ndarray): Number of draws with |t*| >= |t| for every outcome.
+
+    """
+    if sums is None:
+        sums = _worker["sums"]
+    rng = np.random.default_rng(seed)
+    n_clusters = sums["scores"].shape[0]
+
+    if weight_type == "rademacher":
+        v = rng.choice(np.array([-1.0, 1.0]), size=(n_clusters, n_draws))
+    elif weight_type == "webb":
+        v = rng.choice(WEBB_WEIGHTS, size=(n_clusters, n_draws))
+
+    # Bootstrap coefficients and cluster scores of all draws (B x m, G x B x m).
+    coefficients = v.T @ sums["coefficient_sums"]
+    scores = np.einsum("ghm,hb->gbm", sums["scores"], v)
+    bse = np.sqrt(sums["correction"] * (scores**2).sum(axis=0))
+
+    return (np.abs(coefficients / bse) >= np.abs(sums["tvalue"])).sum(axis=0)
@@ -0,0 +1,524 @@
+"""Sufficient statistics of the RDD regressions for nested time windows.
+
+The main tables fit the same specification on the 3, 5 and 10 year windows around the
+cutoff (see select_sample_for_analysis.py). These samples are nested. Within a cell of
+observations with the same reform, relative cohort and cluster, every column of the
+design matrix (see analysis_RDD_direct.build_design_matrix) is a row feature (a
+constant, treated, partially_treated, siblings_age12 and optionally treated x
+unsuccessful_reform) times a constant of the cell: the fixed effects and trends only
+depend on the reform and the relative cohort. Hence X'X, X'y and the cluster scores of
+every window and trend order follow from the sums of the cross products of the
+features (F'F) and of the features with the outcomes (F'y) in each cell.
+
+The cube stores these sums once per cell. A window is fitted by summing the cells within
+it, without touching the observations again. Memory scales with the number of cells
+instead of the number of observations. The results are the same as those of
+analysis_RDD_direct.flexible_trends_direct on the selected samples.
+
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+from scipy import linalg
+
+from nc_skills_step_public.analysis import analysis_RDD_direct as direct
+from nc_skills_step_public.analysis import select_sample_for_analysis as sel
+
+FEATURES = ["const", "treated", "partially_treated", "siblings_age12"]
+
+
+def build_window_cube(
+    data,
+    y_vars,
+    max_years,
+    reform_list,
+    reform_type_dummy=False,
+    cluster="country_reform_brth_year",
+):
+    """Aggregate the sample of the widest window to cells.
+
+    The sample is selected as in select_sample_for_analysis (all y_vars non-missing).
+    Rows with a missing regressor (including partially_treated) are dropped.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        y_vars (list of strings): The dependent variables.
+        max_years (int): Widest window, in years before and after the cutoff.
+        reform_list (list of strings): The reforms to include.
+        reform_type_dummy (bool): If True, treated x unsuccessful_reform is stored as
+            well, so that specifications with the indicator for unsuccessful reforms
+            can be fitted.
+        cluster (string): Variable defining the clusters.
+
+    Returns:
+        cube (dict): The dependent variables ("y_vars"), the row features
+            ("features"), the reforms ("reforms") and per cell: the reform code
+            ("cell_reform"), the relative cohort ("cell_cohort"), the cluster code
+            ("cell_cluster"), the number of observations ("n"), F'F ("ff") and F'y
+            ("fy").
+
+    """
+    features = FEATURES + (["treated:unsuccessful_reform"] if reform_type_dummy else [])
+    sample = sel.select_sample_for_analysis(
+        data=data,
+        y_vars=y_vars,
+        n_years=max_years,
+        reform_list=reform_list,
+    )
+    regressors = ["treated", "rel_cohort", "country_reform", *FEATURES[2:]]
+    if reform_type_dummy:
+        regressors.append("unsuccessful_reform")
+    sample = sample.dropna(subset=regressors)
+
+    reforms, reform_codes = np.unique(
+        sample["country_reform"].to_numpy(dtype=str),
+        return_inverse=True,
+    )
+    _, cluster_codes = np.unique(
+        sample[cluster].to_numpy(dtype=str),
+        return_inverse=True,
+    )
+    cohorts = sample["rel_cohort"].to_numpy(dtype=float)
+
+    cells, cell_codes = np.unique(
+        np.column_stack([reform_codes, cohorts, cluster_codes]),
+        axis=0,
+        return_inverse=True,
+    )
+    cell_codes = cell_codes.reshape(-1)
+
+    treated = sample["treated"].to_numpy(dtype=float)
+    columns = [np.ones(len(sample)), treated] + [
+        sample[col].to_numpy(dtype=float) for col in FEATURES[2:]
+    ]
+    if reform_type_dummy:
+        columns.append(treated * sample["unsuccessful_reform"].to_numpy(dtype=float))
+    F = np.column_stack(columns)
+    Y = sample[y_vars].to_numpy(dtype=float, na_value=np.nan)
+
+    return {
+        "y_vars": list(y_vars),
+        "features": features,
+        "reforms": reforms,
+        "cell_reform": cells[:, 0].astype(int),
+        "cell_cohort": cells[:, 1],
+        "cell_cluster": cells[:, 2].astype(int),
+        "n": np.bincount(cell_codes),
+        "ff": direct.cluster_sums(F[:, :, None] * F[:, None, :], cell_codes),
+        "fy": direct.cluster_sums(F[:, :, None] * Y[:, None, :], cell_codes),
+    }
+
+
+def fit_window(
+    cube,
+    n_years,
+    order=1,
+    reform_type_dummy=False,
+    partially_treated=False,
+    partially_treated_trend=False,
+):
+    """Fit the RDD regression with flexible trends on one window of the cube.
+
+    The window contains the relative cohorts -n_years to n_years - 1, as in
+    select_sample_for_analysis.
+
+    Args:
+        cube (dict): The cube, see build_window_cube.
+        n_years (int): How many years before and after the cutoff to include.
+        order (int): Order of the polynomial cohort trends (1 to 4).
+        reform_type_dummy (bool): If True: indicator for unsuccessful reforms is added.
+        partially_treated (bool): If True: indicator for partially treated is added.
+        partially_treated_trend (bool): If True: separate trend for partially treated is
+            added.
+
+    Returns:
+        results (dict): Keys are the dependent variables, values are the regression
+            results (see analysis_RDD_direct.flexible_trends_direct).
+
+    """
+    design = _window_design(
+        cube,
+        n_years=n_years,
+        order=order,
+        reform_type_dummy=reform_type_dummy,
+        partially_treated=partially_treated,
+        partially_treated_trend=partially_treated_trend,
+    )
+
+    return _solve(
+        design,
+        keep=np.ones(len(design["n"]), dtype=bool),
+        xx=design["xx"].sum(axis=0),
+        xy=design["xy"].sum(axis=0),
+        y_vars=cube["y_vars"],
+    )
+
+
+def leave_one_out(
+    cube,
+    n_years,
+    by="reform",
+    order=1,
+    reform_type_dummy=False,
+    partially_treated=False,
+    partially_treated_trend=False,
+):
+    """Fit one window once for every left out reform, relative cohort or country.
+
+    X'X and X'y of the window are computed once per cell. For each group, the sums of
+    its cells are subtracted from the totals (downdating), so the data is not selected
+    and fitted again per group. Columns which are zero without the group (e.g. the
+    fixed effect and trends of a left out reform) are dropped, as in a refit on the data
+    without the group. Clusters are formed from the remaining cells.
+
+    Args:
+        cube (dict): The cube, see build_window_cube.
+        n_years (int): How many years before and after the cutoff to include.
+        by (string): "reform", "cohort" (relative cohort) or "country" (the reforms
+            of one country, e.g. Ghana1961 and Ghana1987).
+        order, reform_type_dummy, partially_treated, partially_treated_trend: See
+            fit_window.
+
+    Returns:
+        results (dict): Keys are the left out groups, values are dicts with the
+            regression results of every dependent variable (see fit_window).
+
+    """
+    design = _window_design(
+        cube,
+        n_years=n_years,
+        order=order,
+        reform_type_dummy=reform_type_dummy,
+        partially_treated=partially_treated,
+        partially_treated_trend=partially_treated_trend,
+    )
+    groups, cell_group = np.unique(
+        _cell_groups(cube, by)[design["inside"]],
+        return_inverse=True,
+    )
+    xx, xy = design["xx"].sum(axis=0), design["xy"].sum(axis=0)
+    xx_groups = direct.cluster_sums(design["xx"], cell_group)
+    xy_groups = direct.cluster_sums(design["xy"], cell_group)
+
+    return {
+        group.item(): _solve(
+            design,
+            keep=cell_group != g,
+            xx=xx - xx_groups[g],
+            xy=xy - xy_groups[g],
+            y_vars=cube["y_vars"],
+        )
+        for g, group in enumerate(groups)
+    }
+
+
+def jackknife_variance(results, regressor="treated"):
+    """Compute the jackknife variance of a coefficient from leave-one-out results.
+
+    The variance is (G - 1) / G * sum_g (b_(-g) - b_mean)^2, where b_(-g) is the
+    coefficient without group g and b_mean the mean over the G groups.
+
+    Args:
+        results (dict): The results of leave_one_out.
+        regressor (string): The regressor of interest.
+
+    Returns:
+        (pandas Series): The jackknife variance of every dependent variable.
+
+    """
+    coefs = pd.DataFrame(
+        {
+            group: {y_var: fit["params"][regressor] for y_var, fit in fits.items()}
+            for group, fits in results.items()
+        },
+    )
+    n_groups = coefs.shape[1]
+    deviations = coefs.sub(coefs.mean(axis=1), axis=0)
+
+    return (n_groups - 1) / n_groups * (deviations**2).sum(axis=1)
+
+
+def window_sweep(cube, windows, regressor="treated", **spec):
+    """Fit one specification on many windows and collect one regressor.
+
+    Args:
+        cube (dict): The cube, see build_window_cube.
+        windows (iterable of ints): The values of n_years, e.g. range(1, 16).
+        regressor (string): The regressor of interest.
+        **spec: Keyword arguments of fit_window (order, partially_treated, ...).
+
+    Returns:
+        (pandas DataFrame): Coefficient ("coef"), standard error ("se"), p-value
+            ("pvalue") and number of observations ("nobs"), indexed by n_years and the
+            dependent variable.
+
+    """
+    rows = {}
+    for n_years in windows:
+        results = fit_window(cube, n_years=n_years, **spec)
+        for y_var, result in results.items():
+            rows[(n_years, y_var)] = {
+                "coef": result["params"][regressor],
+                "se": result["bse"][regressor],
+                "pvalue": result["pvalues"][regressor],
+                "nobs": result["nobs"],
+            }
+
+    return pd.DataFrame.from_dict(rows, orient="index").rename_axis(
+        ["n_years", "y_var"],
+    )
+
+
+def _window_design(
+    cube,
+    n_years,
+    order,
+    reform_type_dummy,
+    partially_treated,
+    partially_treated_trend,
+):
+    """Compute X'X and X'y of every cell of one window.
+
+    Args:
+        cube (dict): The cube, see build_window_cube.
+        n_years, order, reform_type_dummy, partially_treated, partially_treated_trend:
+            See fit_window.
+
+    Returns:
+        design (dict): The cells in the window ("inside"), the names of the columns
+            ("names"), the loadings ("loadings", see _cell_loadings), the cluster code
+            ("cluster"), the number of observations ("n"), F'F ("ff"), F'y ("fy"),
+            X'X ("xx", C x k x k) and X'y ("xy", C x k x m) of the cells.
+
+    """
+    if reform_type_dummy and "treated:unsuccessful_reform" not in cube["features"]:
+        raise ValueError("The cube was built without reform_type_dummy.")
+
+    inside = (cube["cell_cohort"] >= -n_years) & (cube["cell_cohort"] < n_years)
+    reforms_present, cell_reform = np.unique(
+        cube["cell_reform"][inside],
+        return_inverse=True,
+    )
+    loadings, names = _cell_loadings(
+        cohorts=cube["cell_cohort"][inside],
+        cell_reform=cell_reform,
+        reforms=cube["reforms"][reforms_present],
+        features=cube["features"],
+        order=order,
+        reform_type_dummy=reform_type_dummy,
+        partially_treated=partially_treated,
+        partially_treated_trend=partially_treated_trend,
+    )
+    ff, fy = cube["ff"][inside], cube["fy"][inside]
+
+    return {
+        "inside": inside,
+        "names": names,
+        "loadings": loadings,
+        "cluster": cube["cell_cluster"][inside],
+        "n": cube["n"][inside],
+        "ff": ff,
+        "fy": fy,
+        "xx": np.einsum("ckf,cfg,clg->ckl", loadings, ff, loadings),
+        "xy": np.einsum("ckf,cfm->ckm", loadings, fy),
+    }
+
+
+def _solve(design, keep, xx, xy, y_vars):
+    """Solve the normal equations of a subset of the cells of a window.
+
+    Args:
+        design (dict): See _window_design.
+        keep (numpy.ndarray): Boolean mask of the cells in the sample.
+        xx (numpy.ndarray): X'X of the kept cells (k x k).
+        xy (numpy.ndarray): X'y of the kept cells (k x m).
+        y_vars (list of strings): The dependent variables.
+
+    Returns:
+        results (dict): Keys are the dependent variables, values are the regression
+            results (see analysis_RDD_direct.flexible_trends_direct).
+
+    """
+    loadings = design["loadings"][keep]
+    columns = np.flatnonzero(np.any(loadings != 0, axis=(0, 2)))
+    loadings = loadings[:, columns]
+    names = [design["names"][column] for column in columns]
+
+    bread = _inverse(xx[np.ix_(columns, columns)])
+    params = bread @ xy[columns]
+
+    # Scores of the cells: L_c (F'y_c - F'F_c L_c' params).
+    ff = design["ff"][keep]
+    feature_resid = design["fy"][keep] - np.einsum(
+        "cfg,clg,lm->cfm",
+        ff,
+        loadings,
+        params,
+    )
+    _, cell_cluster = np.unique(design["cluster"][keep], return_inverse=True)
+    cluster_scores = direct.cluster_sums(
+        np.einsum("ckf,cfm->ckm", loadings, feature_resid),
+        cell_cluster,
+    )
+    nobs = int(design["n"][keep].sum())
+    bse = direct.clustered_standard_errors(
+        bread=bread,
+        cluster_scores=cluster_scores,
+        n_obs=nobs,
+    )
+
+    return {
+        y_var: direct._results_dict(
+            params=params[:, j],
+            bse=bse[:, j],
+            names=names,
+            nobs=nobs,
+        )
+        for j, y_var in enumerate(y_vars)
+    }
+
+
+def _cell_groups(cube, by):
+    """Label every cell of the cube with its reform, relative cohort or country.
+
+    Args:
+        cube (dict): The cube, see build_window_cube.
+        by (string): "reform", "cohort" or "country".
+
+    Returns:
+        (numpy.ndarray): The group of every cell.
+
+    """
+    if by == "cohort":
+        return cube["cell_cohort"].astype(int)
+    if by == "reform":
+        labels = cube["reforms"]
+    elif by == "country":
+        labels = np.array([re.sub(r"\d+$", "", reform) for reform in cube["reforms"]])
+    else:
+        raise ValueError(f"Unknown grouping: {by}.")
+
+    return labels[cube["cell_reform"]]
+
+
+def _cell_loadings(
+    cohorts,
+    cell_reform,
+    reforms,
+    features,
+    order,
+    reform_type_dummy,
+    partially_treated,
+    partially_treated_trend,
+):
+    """Express the columns of the design matrix as linear combinations of features.
+
+    The columns and their names are in the order of
+    analysis_RDD_direct.build_design_matrix.
+
+    Args:
+        cohorts (numpy.ndarray): Relative cohort of every cell.
+        cell_reform (numpy.ndarray): Reform code of every cell (index into reforms).
+        reforms (numpy.ndarray): The reforms in the window.
+        features (list of strings): The row features of the cube.
+        order, reform_type_dummy, partially_treated, partially_treated_trend: See
+            fit_window.
+
+    Returns:
+        loadings (numpy.ndarray): L_c with x_i = L_c f_i for every cell (C x k x f).
+        names (list of strings): The names of the columns.
+
+    """
+    const, treated, partial, siblings = (features.index(name) for name in FEATURES)
+    trend_vars = ["rel_cohort"] + [f"rel_cohort{p}" for p in range(2, order + 1)]
+    n_reforms = len(reforms)
+    cells = np.arange(len(cohorts))
+
+    # Columns which load on one feature in every cell.
+    shared = [("treated", treated)]
+    if reform_type_dummy:
+        name = "treated:unsuccessful_reform"
+        shared.append((name, features.index(name)))
+    if partially_treated:
+        shared.append(("partially_treated", partial))
+    shared.append(("siblings_age12", siblings))
+
+    # Blocks of one column per reform: (names, feature, value in the cell).
+    blocks = [([f"country_reform[{reform}]" for reform in reforms], const, 1.0)]
+    blocks += [
+        (
+            [f"{var}:country_reform[{reform}]" for reform in reforms],
+            const,
+            cohorts ** (p + 1),
+        )
+        for p, var in enumerate(trend_vars)
+    ]
+    blocks += [
+        (
+            [f"treated:{var}:country_reform[{reform}]" for reform in reforms],
+            treated,
+            cohorts ** (p + 1),
+        )
+        for p, var in enumerate(trend_vars)
+    ]
+    if partially_treated_trend:
+        blocks.append(
+            (
+                [
+                    f"partially_treated:country_reform[{reform}]:rel_cohort"
+                    for reform in reforms
+                ],
+                partial,
+                cohorts,
+            ),
+        )
+
+    n_columns = len(shared) + n_reforms * len(blocks)
+    loadings = np.zeros((len(cohorts), n_columns, len(features)))
+    names = []
+
+    for column, (name, feature) in enumerate(shared):
+        loadings[:, column, feature] = 1
+        names.append(name)
+
+    for block, (block_names, feature, value) in enumerate(blocks):
+        columns = len(shared) + block * n_reforms + cell_reform
+        loadings[cells, columns, feature] = value
+        names += block_names
+
+    return loadings, names
+
+
+def _inverse(xx):
+    """Invert X'X, or compute pinv(X'X) if X is rank deficient.
+
+    pinv(X'X) gives the minimum norm solution, as statsmodels. Columns which are zero
+    (e.g. trends of partially treated cohorts for reforms without partially treated
+    cohorts) get a zero coefficient and are left out of the inversion, since the
+    condition number of X'X is the square of that of X. If the other columns have full
+    rank, X'X is scaled to a unit diagonal and inverted with a Cholesky factorization.
+
+    Args:
+        xx (numpy.ndarray): X'X (k x k).
+
+    Returns:
+        (numpy.ndarray): (X'X)^-1 or pinv(X'X).
+
+    """
+    inverse = np.zeros_like(xx)
+    used = np.flatnonzero(np.diag(xx) > 0)
+    xx_used = xx[np.ix_(used, used)]
+
+    if np.linalg.matrix_rank(xx_used, hermitian=True) == len(used):
+        scale = 1 / np.sqrt(np.diag(xx_used))
+        factor = linalg.cho_factor(xx_used * np.outer(scale, scale))
+        inverse[np.ix_(used, used)] = linalg.cho_solve(
+            factor,
+            np.eye(len(used)),
+        ) * np.outer(scale, scale)
+    else:
+        inverse[np.ix_(used, used)] = np.linalg.pinv(xx_used, hermitian=True)
+
+    return inverse
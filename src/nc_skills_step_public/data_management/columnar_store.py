@@ -0,0 +1,141 @@
+"""Columnar (Parquet) storage of the final analysis data set.
+
+The final data set is stored as a Parquet data set which is partitioned by country.
+Tasks can then load only the columns and reforms they actually need instead of
+deserializing the whole frame.
+
+A fingerprint of the whole data set is computed once when it is written and stored
+next to the partitions, so that results can be related to the version of the data they
+were computed from (see results_warehouse.py), whatever part of the data a task loads.
+
+"""
+
+import hashlib
+from pathlib import Path
+
+import pandas as pd
+
+# Files starting with an underscore are ignored when the data set is read.
+FINGERPRINT_FILE = "_fingerprint"
+
+
+def write_analysis_data(data, path, partition_cols=("country",)):
+    """Write the analysis data to a partitioned Parquet data set.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        path (str or pathlib.Path): Path to the data set (a directory).
+        partition_cols (tuple): Columns by which the data set is partitioned.
+
+    Returns:
+        None
+
+    """
+    data.to_parquet(
+        path,
+        engine="pyarrow",
+        partition_cols=list(partition_cols),
+        index=True,
+        existing_data_behavior="delete_matching",
+    )
+    (Path(path) / FINGERPRINT_FILE).write_text(_fingerprint(data))
+
+
+def read_fingerprint(path):
+    """Read the fingerprint of the analysis data set.
+
+    Args:
+        path (str or pathlib.Path): Path to the data set (a directory).
+
+    Returns:
+        (string): The fingerprint (hexadecimal), see write_analysis_data.
+
+    """
+    return (Path(path) / FINGERPRINT_FILE).read_text()
+
+
+def read_analysis_data(
+    path,
+    columns=None,
+    reform_list=None,
+    reform_col="country_reform",
+    filters=None,
+):
+    """Read (parts of) the analysis data from the partitioned Parquet data set.
+
+    Only the requested columns are decoded (column projection). Rows are filtered
+    while reading (predicate pushdown), so that row groups and country partitions which
+    do not contain the requested reforms are skipped. The compact data types of the
+    stored data (see compact_schema.py) are kept.
+
+    Args:
+        path (str or pathlib.Path): Path to the data set (a directory).
+        columns (list of strings): Columns to load. If None, all columns are loaded.
+        reform_list (list of strings): The reforms to load. If None, all rows are loaded.
+        reform_col (string): The column which identifies the reform.
+        filters (list): Additional filters in pyarrow's disjunctive normal form, e.g.
+            [("age", ">", 23)] or [[("a", "==", 1)], [("b", "==", 2)]].
+
+    Returns:
+        data (pandas DataFrame): The requested part of the data set.
+
+    """
+    if columns is not None:
+        columns = list(dict.fromkeys(columns))
+
+    filters = _combine_filters(
+        filters=filters,
+        reform_list=reform_list,
+        reform_col=reform_col,
+    )
+
+    data = pd.read_parquet(path, engine="pyarrow", columns=columns, filters=filters)
+
+    # Restore the original row order.
+    data = data.sort_index()
+
+    return data
+
+
+def _fingerprint(data):
+    """Hash the column names, data types, index and values of a data set.
+
+    Args:
+        data (pandas DataFrame): The data set.
+
+    Returns:
+        (string): The fingerprint (hexadecimal).
+
+    """
+    key = hashlib.sha256()
+    key.update(repr([(col, str(data[col].dtype)) for col in data]).encode())
+    key.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+
+    return key.hexdigest()
+
+
+def _combine_filters(filters, reform_list, reform_col):
+    """Combine the reform restriction with additional filters.
+
+    Args:
+        filters (list or None): Filters in pyarrow's disjunctive normal form.
+        reform_list (list of strings or None): The reforms to load.
+        reform_col (string): The column which identifies the reform.
+
+    Returns:
+        filters (list or None): The combined filters.
+
+    """
+    if reform_list is None:
+        return filters
+
+    reform_filter = (reform_col, "in", list(reform_list))
+
+    if filters is None:
+        return [reform_filter]
+
+    # Disjunctive normal form: add the reform restriction to every conjunction.
+    if isinstance(filters[0], list):
+        return [[*conjunction, reform_filter] for conjunction in filters]
+
+    return [*filters, reform_filter]
@@ -0,0 +1,186 @@
+"""Compact data types for the analysis data set.
+
+After merging and preparing, almost all columns are float64 or object. The schema below
+stores labels as categoricals, 0/1 indicators as (nullable) int8 and cohort offsets as
+the smallest nullable integer type which holds their range. Standardized skill scores
+can optionally be stored as float32.
+
+Selection and regression code accepts the compact types. The regression functions
+(statsmodels/patsy) expect float columns and labels without unused categories, hence
+the selected samples are converted back with to_model_dtypes.
+
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+LABEL_PATTERNS = [r"country", r"country_reform.*"]
+
+INDICATOR_PATTERNS = [
+    r"treated",
+    r"treated_w_month",
+    r"partially_treated",
+    r"placebo.+",
+    r"partially_treated_placebo.+",
+    r"unsuccessful_reform",
+    r"female",
+    r"emp",
+    r"wage_worker",
+    r".+_binary",
+    r"parents_info_school",
+    r"overweight",
+    r"abuse_.+_age15",
+    r"worked_age15",
+    r"shocks_dummy_age15",
+]
+
+SMALL_INT_PATTERNS = [
+    r"rel_cohort\d?",
+    r"rel_placebo_cohort.+",
+    r"rel_month\d?",
+    r"brth_year",
+    r"brth_month",
+]
+
+SKILL_SCORE_PATTERNS = [
+    r".+_s",
+    r".+_s_abcorr",
+    r".+_pca",
+    r".+_s_laajaj_(drop|replace)",
+]
+
+INT_DTYPES = ["Int8", "Int16", "Int32", "Int64"]
+
+
+def apply_compact_schema(data, float32_skills=False):
+    """Cast the columns of the analysis data set to compact data types.
+
+    Columns are only cast if the values fit into the new type without loss, e.g. a
+    column matching an indicator pattern is left as it is if it contains values other
+    than 0 and 1.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        float32_skills (bool): If True, standardized skill scores are stored as float32.
+
+    Returns:
+        (pandas DataFrame): The data with compact types.
+
+    """
+    compact = {}
+
+    for col in data:
+        series = data[col]
+
+        if _matches(col, LABEL_PATTERNS) and pd.api.types.is_string_dtype(
+            series.dtype,
+        ):
+            compact[col] = series.astype("category")
+
+        elif _matches(col, INDICATOR_PATTERNS) and _is_integral(series, 0, 1):
+            # Plain int8 if there are no missing values.
+            compact[col] = series.astype("Int8" if series.hasnans else np.int8)
+
+        elif _matches(col, SMALL_INT_PATTERNS) and _is_integral(series):
+            compact[col] = series.astype(_smallest_int_dtype(series))
+
+        elif (
+            float32_skills is True
+            and _matches(col, SKILL_SCORE_PATTERNS)
+            and series.dtype == np.float64
+        ):
+            compact[col] = series.astype(np.float32)
+
+    return data.assign(**compact)
+
+
+def to_model_dtypes(data):
+    """Convert compact data types back to the types expected by the regressions.
+
+    Nullable integers and float32 become float64 (missing values become NaN), and
+    label categoricals become object columns, so that unused categories do not create
+    empty dummy columns.
+
+    Args:
+        data (pandas DataFrame): The data set.
+
+    Returns:
+        (pandas DataFrame): The data with float64 and object columns.
+
+    """
+    converted = {}
+
+    for col in data:
+        dtype = data[col].dtype
+
+        if isinstance(dtype, pd.CategoricalDtype) and _matches(col, LABEL_PATTERNS):
+            converted[col] = data[col].astype(object)
+
+        elif str(dtype) in INT_DTYPES or dtype == np.float32:
+            converted[col] = data[col].astype(np.float64)
+
+    if not converted:
+        return data
+
+    return data.assign(**converted)
+
+
+def _matches(col, patterns):
+    """Check whether a column name fully matches one of the patterns.
+
+    Args:
+        col (string): The column name.
+        patterns (list): Regular expressions.
+
+    Returns:
+        (bool)
+
+    """
+    return any(re.fullmatch(pattern, col) for pattern in patterns)
+
+
+def _is_integral(series, lower=None, upper=None):
+    """Check whether a float column only holds integers (and missing values).
+
+    Args:
+        series (pandas Series): The column.
+        lower (int): Smallest allowed value. If None, no restriction.
+        upper (int): Largest allowed value. If None, no restriction.
+
+    Returns:
+        (bool)
+
+    """
+    if series.dtype.kind not in "fi":
+        return False
+
+    values = series.to_numpy(dtype=float)
+    values = values[~np.isnan(values)]
+
+    return bool(
+        np.all(values == np.round(values))
+        and (lower is None or np.all(values >= lower))
+        and (upper is None or np.all(values <= upper)),
+    )
+
+
+def _smallest_int_dtype(series):
+    """Get the smallest nullable integer type which holds all values of a column.
+
+    Args:
+        series (pandas Series): The column with integral values.
+
+    Returns:
+        (string): The data type.
+
+    """
+    low, high = series.min(), series.max()
+
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype.lower())
+        if pd.isna(low) or (info.min <= low and high <= info.max):
+            return dtype
+
+    return "Int64"
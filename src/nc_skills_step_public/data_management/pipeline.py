@@ -0,0 +1,225 @@
+"""Run data preparation stages in place on one data frame.
+
+A stage is a dictionary with a name, a function which modifies the data in place and
+the columns it reads, writes and drops (as regular expressions which fully match the
+column names). The declarations are checked while running: the columns read must exist
+before the stage, and each column a stage adds (or drops) must be declared in its writes
+(or drops). Since no stage copies the data, only one frame of the full data set is alive
+at a time.
+
+For every stage, the pipeline reports the wall time and the peak resident set size
+(RSS) of the process. Optionally, the columns written by a stage are cached on disk and
+reused while its input columns and its code do not change (see stage_cache.py).
+
+"""
+
+import re
+import sys
+import time
+import warnings
+
+import pandas as pd
+
+from nc_skills_step_public.data_management import stage_cache
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def stage(name, func, reads=(), writes=(), drops=(), cache=True):
+    """Declare a stage of a pipeline.
+
+    Args:
+        name (string): Name of the stage.
+        func (callable): Function which takes the data and modifies it in place.
+        reads (list): Patterns of the columns read by the stage.
+        writes (list): Patterns of the columns added or changed by the stage.
+        drops (list): Patterns of the columns dropped by the stage.
+        cache (bool): If False, the stage is never cached (e.g. if it is cheap).
+
+    Returns:
+        (dict): The stage.
+
+    """
+    return {
+        "name": name,
+        "func": func,
+        "reads": list(reads),
+        "writes": list(writes),
+        "drops": list(drops),
+        "cache": cache,
+    }
+
+
+def run_pipeline(data, stages, cache_dir=None, max_cache_bytes=2**30):
+    """Run stages one after the other in place on the data.
+
+    Args:
+        data (pandas DataFrame): The data set. It is modified in place.
+        stages (list): Stages, see stage.
+        cache_dir (str or pathlib.Path): Directory of the stage cache. If None, no
+            stage is cached.
+        max_cache_bytes (int): Maximum size of the stage cache in bytes.
+
+    Returns:
+        data (pandas DataFrame): The modified data set (the same object).
+        report (pandas DataFrame): Wall time ("seconds"), peak RSS in MB
+            ("peak_rss_mb") and whether the result was loaded from the cache
+            ("cached") for every stage.
+
+    """
+    report = []
+
+    for current in stages:
+        _reset_peak_rss()
+        start = time.perf_counter()
+        cached = run_stage(
+            data=data,
+            stage=current,
+            cache_dir=cache_dir,
+            max_cache_bytes=max_cache_bytes,
+        )
+        report.append(
+            {
+                "stage": current["name"],
+                "seconds": time.perf_counter() - start,
+                "peak_rss_mb": _peak_rss_mb(),
+                "cached": cached,
+            },
+        )
+
+    return data, pd.DataFrame(report).set_index("stage")
+
+
+def run_stage(data, stage, cache_dir=None, max_cache_bytes=2**30):
+    """Run one stage in place and check its declared columns.
+
+    Args:
+        data (pandas DataFrame): The data set. It is modified in place.
+        stage (dict): The stage, see stage.
+        cache_dir (str or pathlib.Path): Directory of the stage cache. If None, the
+            stage is not cached.
+        max_cache_bytes (int): Maximum size of the stage cache in bytes.
+
+    Returns:
+        (bool): Whether the result was loaded from the cache.
+
+    """
+    missing = [
+        pattern
+        for pattern in stage["reads"]
+        if not any(_matches(col, [pattern]) for col in data)
+    ]
+    if missing:
+        raise KeyError(f"Stage {stage['name']} reads missing columns {missing}.")
+
+    use_cache = cache_dir is not None and stage["cache"]
+    before = set(data.columns)
+
+    if use_cache:
+        key = stage_cache.stage_key(data=data, stage=stage)
+        stored = stage_cache.load_stage(cache_dir=cache_dir, key=key)
+        if stored is not None:
+            _apply_stored_columns(data=data, stage=stage, stored=stored)
+            return True
+
+    with warnings.catch_warnings():
+        # Columns are inserted one by one. Consolidating the frame would copy it.
+        warnings.simplefilter("ignore", category=pd.errors.PerformanceWarning)
+        stage["func"](data)
+    after = set(data.columns)
+
+    undeclared = [
+        col for col in after - before if not _matches(col, stage["writes"])
+    ] + [col for col in before - after if not _matches(col, stage["drops"])]
+    if undeclared:
+        raise ValueError(
+            f"Stage {stage['name']} adds or drops undeclared columns {undeclared}.",
+        )
+
+    if use_cache:
+        stage_cache.store_stage(
+            cache_dir=cache_dir,
+            key=key,
+            columns=data[stage_cache.written_columns(data, stage, before)],
+            max_bytes=max_cache_bytes,
+        )
+
+    return False
+
+
+def _apply_stored_columns(data, stage, stored):
+    """Apply the cached result of a stage in place.
+
+    Args:
+        data (pandas DataFrame): The data set. It is modified in place.
+        stage (dict): The stage, see stage.
+        stored (pandas DataFrame): The columns written by the stage.
+
+    Returns:
+        None
+
+    """
+    for col in [col for col in data if _matches(col, stage["drops"])]:
+        del data[col]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=pd.errors.PerformanceWarning)
+        for col in stored:
+            data[col] = stored[col]
+
+
+def _matches(col, patterns):
+    """Check whether a column name fully matches one of the patterns.
+
+    Args:
+        col (string): The column name.
+        patterns (list): Regular expressions.
+
+    Returns:
+        (bool)
+
+    """
+    return any(re.fullmatch(pattern, col) for pattern in patterns)
+
+
+def _reset_peak_rss():
+    """Reset the peak RSS of the process, if the operating system allows it (Linux).
+
+    Returns:
+        None
+
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb():
+    """Get the peak RSS of the process in MB.
+
+    On Linux, this is the peak since the last reset. Elsewhere, it is the peak since the
+    start of the process.
+
+    Returns:
+        (float): The peak RSS. Missing if it cannot be determined.
+
+    """
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    if resource is None:
+        return float("nan")
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere.
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
@@ -2,7 +2,9 @@
 
 import numpy as np
 import pandas as pd
-from sklearn.decomposition import PCA
+
+from nc_skills_step_public.data_management import pipeline as pl
+from nc_skills_step_public.data_management import skill_factors as sf
 
 
 def rename_variables(data):
@@ -16,28 +18,7 @@ def rename_variables(data):
         changed_data (pandas DataFrame): The changed data.
 
     """
-    changed_data = data.rename(
-        columns={
-            "gender": "female",
-            "m1a_5a1": "brth_day",
-            "m1a_q05m": "brth_month",
-            "m1a_q05y": "brth_year",
-            "age_start": "age_strt_school",
-            "m2_q29": "age_end_educ",
-            "conscientiousness_avg": "conscientiousness_av",
-            "ses": "ses_age15",
-            "m7a_q23": "fam_econ_1_to_10_age15",
-            "m7a_q25": "worked_age15",
-            "shocks": "shocks_age15",
-            "shocks_dummy": "shocks_dummy_age15",
-            "old_brothers": "old_brothers_age12",
-            "old_sisters": "old_sisters_age12",
-            "young_brothers": "young_brothers_age12",
-            "young_sisters": "young_sisters_age12",
-            "m7a_q27": "abuse_outsidehh_age15",
-            "m7a_q28": "abuse_insidehh_age15",
-        },
-    )
+    changed_data = data.rename(columns=_renamed_variables())
 
     return changed_data
 
@@ -53,18 +34,360 @@ def clean_data(data):
 
     """
     changed_data = data.copy()
+    _clean_data(changed_data)
+
+    return changed_data
+
+
+def add_data_columns(data):
+    """Add variables.
+
+    Args:
+        data (pandas DataFrame): The data.
+
+    Returns:
+        more_data (pandas DataFrame): The data with added columns.
+
+    """
+    more_data = data.copy()
+    _add_data_columns(more_data)
+
+    return more_data
+
+
+def harmonize_skill_items(data):
+    """Harmonize (recode) skill items. Wave 1 and wave 2 items are reversed.
+
+    I harmonize items across survey waves and at the same time across underlying traits
+    (for personality traits). The latter means that answers to reversely asked questions
+    are recoded s.t. a larger number corresponds to a higher level of the underlying trait.
+
+    The items to be reversed and the countries of each wave are listed in
+    _skill_items_dicts_and_lists(which="item_recoding"). All items of a wave are
+    recoded in one array operation.
+
+    Args:
+        data (pandas DataFrame): The data set.
+
+    Returns:
+        data_r (pandas DataFrame): The data with harmonized items instead.
 
-    changed_data[["brth_month", "age_strt_school"]] = changed_data[
+    """
+    data_r = data.copy()
+    _harmonize_skill_items(data_r)
+
+    return data_r
+
+
+def standardize_skills_and_prefs(data):
+    """Standardize skills and preferences.
+
+    Args:
+        data (pandas DataFrame): The data set.
+
+    Returns:
+        data_s (pandas DataFrame): The data with standardized variables in addition.
+
+    """
+    data_s = data.copy()
+    _standardize_skills_and_prefs(data_s)
+
+    return data_s
+
+
+def get_some_skills_with_pca(data):
+    """Use PCA to get personality traits and behaviors.
+
+    The first principal components of all traits are computed in one pass over the
+    items (see skill_factors.py). Components are missing if an item is missing.
+
+    Args:
+        data (pandas DataFrame): The data set.
+
+    Returns:
+        data_pca (pandas DataFrame): The data with principal components in addition.
+
+    """
+    data_pca = data.copy()
+    _get_some_skills_with_pca(data_pca)
+
+    return data_pca
+
+
+def get_acquiescence_bias_corrected_skills(data):
+    """Correct for acquiescence bias in skills.
+
+    The items are corrected as one array (see _acquiescence_corrected_items), so no
+    columns are added for the corrected items or the bias.
+
+    Args:
+        data (pandas DataFrame): The data set.
+
+    Returns:
+        data_acq (pandas DataFrame): The data with corrected skills in addition.
+
+    """
+    data_acq = data.copy()
+    _get_acquiescence_bias_corrected_skills(data_acq)
+
+    return data_acq
+
+
+def get_skills_based_on_laajaj_et_al(data):
+    """Get skills based on Laajaj et al. (2019).
+
+    In one case we only use items loading on the correct skill, in the other we use
+    all items but for the skill they are loading on not for the skill they are designed for.
+
+    Args:
+        data (pandas DataFrame): The data set.
+
+    Returns:
+        data_laajaj (pandas DataFrame): The data with Laajaj et al. skills in addition.
+
+    """
+    data_laajaj = data.copy()
+    _get_skills_based_on_laajaj_et_al(data_laajaj)
+
+    return data_laajaj
+
+
+def create_skill_weights(data):
+    """Create weights for the skill measures.
+
+    Measures based on more items are given more weight.
+
+    Args:
+        data (pandas DataFrame): The data set.
+
+    Returns:
+        data_w (pandas DataFrame): The data with skill weights in addition.
+
+    """
+    data_w = data.copy()
+    _create_skill_weights(data_w)
+
+    return data_w
+
+
+def prepare_STEP_data(data, cache_dir=None, max_cache_bytes=2**30):
+    """Run all preparation steps in place on the merged data.
+
+    This is the same as applying rename_variables, clean_data, add_data_columns,
+    harmonize_skill_items, standardize_skills_and_prefs, get_some_skills_with_pca,
+    get_acquiescence_bias_corrected_skills, get_skills_based_on_laajaj_et_al and
+    create_skill_weights one after the other, but without copying the data.
+
+    Args:
+        data (pandas DataFrame): The merged data. It is modified in place.
+        cache_dir (str or pathlib.Path): Directory of the stage cache. Steps whose
+            input columns and code did not change are loaded from there. If None,
+            all steps are computed.
+        max_cache_bytes (int): Maximum size of the stage cache in bytes.
+
+    Returns:
+        data (pandas DataFrame): The prepared data (the same object).
+        report (pandas DataFrame): Wall time, peak RSS and cache use of every step.
+
+    """
+    return pl.run_pipeline(
+        data=data,
+        stages=preparation_stages(),
+        cache_dir=cache_dir,
+        max_cache_bytes=max_cache_bytes,
+    )
+
+
+def preparation_stages():
+    """Get the preparation steps with the columns they read, write and drop.
+
+    Returns:
+        (list): The stages, see pipeline.stage.
+
+    """
+    renamed = _renamed_variables()
+    raw_items = r"m6a_q01\d\d"
+    items = r"[a-z]\d_h"
+
+    return [
+        pl.stage(
+            "rename_variables",
+            _rename_variables,
+            writes=renamed.values(),
+            drops=renamed,
+            cache=False,
+        ),
+        pl.stage(
+            "clean_data",
+            _clean_data,
+            reads=[
+                "brth_month",
+                "age_strt_school",
+                "age_end_educ",
+                "brth_year",
+                "parental",
+                "fam_econ_1_to_10_age15",
+                "worked_age15",
+                "occupation",
+                "occtype_step",
+                "abuse_outsidehh_age15",
+                "abuse_insidehh_age15",
+            ],
+            writes=[
+                "brth_month",
+                "age_strt_school",
+                "age_end_educ",
+                "brth_year",
+                "parental",
+                "fam_econ_1_to_10_age15",
+                "worked_age15",
+                "occupation",
+                "occtype_step",
+                "abuse_outsidehh_age15",
+                "abuse_insidehh_age15",
+            ],
+        ),
+        pl.stage(
+            "add_data_columns",
+            _add_data_columns,
+            reads=[
+                "brth_year",
+                "m6b_q0[14]",
+                "parental",
+                "age_end_educ",
+                "age_strt_school",
+                "(old|young)_(brothers|sisters)_age12",
+                "BMI_class",
+                "abuse_(outside|inside)hh_age15",
+            ],
+            writes=[
+                "brth_year2",
+                "patience_binary",
+                "risk_binary",
+                "parents_info_school",
+                "years_educ_calc",
+                "(old_|young_)?siblings_age12",
+                "overweight",
+                "abuse_any_age15",
+            ],
+        ),
+        pl.stage(
+            "harmonize_skill_items",
+            _harmonize_skill_items,
+            reads=["country", raw_items],
+            writes=[items],
+            drops=[raw_items],
+        ),
+        pl.stage(
+            "standardize_skills_and_prefs",
+            _standardize_skills_and_prefs,
+            reads=[
+                ".+_av",
+                "risk",
+                "discount",
+                "write",
+                "read",
+                "num",
+                "patience_binary",
+                "risk_binary",
+                ".+_h",
+                r"PVLIT\d+",
+            ],
+            writes=[".+_s"],
+        ),
+        pl.stage(
+            "get_some_skills_with_pca",
+            _get_some_skills_with_pca,
+            reads=[items + "_s"],
+            writes=[".+_pca"],
+        ),
+        pl.stage(
+            "get_acquiescence_bias_corrected_skills",
+            _get_acquiescence_bias_corrected_skills,
+            reads=[items],
+            writes=[".+_av_s_abcorr"],
+        ),
+        pl.stage(
+            "get_skills_based_on_laajaj_et_al",
+            _get_skills_based_on_laajaj_et_al,
+            reads=["country", items],
+            writes=[".+_av_s_laajaj_(drop|replace)"],
+        ),
+        pl.stage(
+            "create_skill_weights",
+            _create_skill_weights,
+            reads=[items + "_s"],
+            writes=[".+_weight"],
+        ),
+    ]
+
+
+def _renamed_variables():
+    """Get the new names of renamed variables.
+
+    Returns:
+        (dict): Keys are the old names, values are the new names.
+
+    """
+    return {
+        "gender": "female",
+        "m1a_5a1": "brth_day",
+        "m1a_q05m": "brth_month",
+        "m1a_q05y": "brth_year",
+        "age_start": "age_strt_school",
+        "m2_q29": "age_end_educ",
+        "conscientiousness_avg": "conscientiousness_av",
+        "ses": "ses_age15",
+        "m7a_q23": "fam_econ_1_to_10_age15",
+        "m7a_q25": "worked_age15",
+        "shocks": "shocks_age15",
+        "shocks_dummy": "shocks_dummy_age15",
+        "old_brothers": "old_brothers_age12",
+        "old_sisters": "old_sisters_age12",
+        "young_brothers": "young_brothers_age12",
+        "young_sisters": "young_sisters_age12",
+        "m7a_q27": "abuse_outsidehh_age15",
+        "m7a_q28": "abuse_insidehh_age15",
+    }
+
+
+def _rename_variables(data):
+    """Rename variables in place.
+
+    Args:
+        data (pandas DataFrame): The data. It is modified in place.
+
+    Returns:
+        None
+
+    """
+    # Assign the columns instead of using rename(inplace=True): ruff (PD002) would
+    # rewrite the latter to a rebinding of the local name, which does not modify data.
+    renamed = _renamed_variables()
+    data.columns = [renamed.get(col, col) for col in data.columns]
+
+
+def _clean_data(data):
+    """Clean data in place. Handle missing data etc.
+
+    Args:
+        data (pandas DataFrame): The data. It is modified in place.
+
+    Returns:
+        None
+
+    """
+    data[["brth_month", "age_strt_school"]] = data[
         ["brth_month", "age_strt_school"]
     ].replace({88: np.nan, 99: np.nan, 97: np.nan, -66: np.nan})
 
-    changed_data["age_end_educ"] = changed_data["age_end_educ"].replace(
+    data["age_end_educ"] = data["age_end_educ"].replace(
         {92: np.nan, 97: np.nan},
     )
 
-    changed_data["brth_year"] = changed_data["brth_year"].replace(8888, np.nan)
+    data["brth_year"] = data["brth_year"].replace(8888, np.nan)
 
-    changed_data["parental"] = changed_data["parental"].replace(
+    data["parental"] = data["parental"].replace(
         {
             1: "Yes, always or almost always",
             2: "Yes, sometimes",
@@ -76,15 +399,15 @@ def clean_data(data):
         },
     )
 
-    changed_data["fam_econ_1_to_10_age15"] = changed_data[
-        "fam_econ_1_to_10_age15"
-    ].replace({-3: np.nan, -6: np.nan, -9: np.nan, 0: np.nan, 97: np.nan})
+    data["fam_econ_1_to_10_age15"] = data["fam_econ_1_to_10_age15"].replace(
+        {-3: np.nan, -6: np.nan, -9: np.nan, 0: np.nan, 97: np.nan},
+    )
 
-    changed_data["worked_age15"] = changed_data["worked_age15"].replace(
+    data["worked_age15"] = data["worked_age15"].replace(
         {1: 1, 2: 0, 0: np.nan, -6: np.nan, 7: np.nan},
     )
 
-    changed_data["occupation"] = changed_data["occupation"].replace(
+    data["occupation"] = data["occupation"].replace(
         {
             1: "1 Managers",
             2: "2 Professionals",
@@ -110,13 +433,13 @@ def clean_data(data):
         "9 Elementary occupations",
         "0 Armed forces occupations",
     ]
-    changed_data["occupation"] = pd.Categorical(
-        changed_data["occupation"],
+    data["occupation"] = pd.Categorical(
+        data["occupation"],
         categories=occupation_cat,
         ordered=True,
     )
 
-    changed_data["occtype_step"] = changed_data["occtype_step"].replace(
+    data["occtype_step"] = data["occtype_step"].replace(
         {
             1: "Highly skilled white collar - Managers/Professionals/Technicians",
             2: "Low skilled white collar",
@@ -134,208 +457,234 @@ def clean_data(data):
         "Skilled agriculture work",
         "Military personnel",
     ]
-    changed_data["occtype_step"] = pd.Categorical(
-        changed_data["occtype_step"],
+    data["occtype_step"] = pd.Categorical(
+        data["occtype_step"],
         categories=occtype_step_cat,
         ordered=True,
     )
 
-    changed_data["abuse_outsidehh_age15"] = changed_data[
-        "abuse_outsidehh_age15"
-    ].replace({1: 1, 2: 0, 9: np.nan})
-    changed_data["abuse_insidehh_age15"] = changed_data["abuse_insidehh_age15"].replace(
+    data["abuse_outsidehh_age15"] = data["abuse_outsidehh_age15"].replace(
+        {1: 1, 2: 0, 9: np.nan},
+    )
+    data["abuse_insidehh_age15"] = data["abuse_insidehh_age15"].replace(
         {1: 1, 2: 0, 9: np.nan},
     )
-
-    return changed_data
 
 
-def add_data_columns(data):
-    """Add variables.
+def _add_data_columns(data):
+    """Add variables in place.
 
     Args:
-        data (pandas DataFrame): The data.
+        data (pandas DataFrame): The data. It is modified in place.
 
     Returns:
-        more_data (pandas DataFrame): The data with added columns.
+        None
 
     """
-    more_data = data.copy()
-
-    more_data["brth_year2"] = more_data["brth_year"] ** 2
+    data["brth_year2"] = data["brth_year"] ** 2
 
-    more_data["patience_binary"] = np.where(
-        more_data["m6b_q04"] == 2,
+    data["patience_binary"] = np.where(
+        data["m6b_q04"] == 2,
         1,
-        np.where(more_data["m6b_q04"] == 1, 0, np.nan),
+        np.where(data["m6b_q04"] == 1, 0, np.nan),
     )
 
-    more_data["risk_binary"] = np.where(
-        more_data["m6b_q01"] == 2,
+    data["risk_binary"] = np.where(
+        data["m6b_q01"] == 2,
         1,
-        np.where(more_data["m6b_q01"] == 1, 0, np.nan),
+        np.where(data["m6b_q01"] == 1, 0, np.nan),
     )
 
-    more_data["parents_info_school"] = np.where(
+    data["parents_info_school"] = np.where(
         (data["parental"] == "Yes, always or almost always")
         | (data["parental"] == "Yes, sometimes"),
         1,
-        np.where(more_data["parental"] == "No, never or almost never", 0, np.nan),
+        np.where(data["parental"] == "No, never or almost never", 0, np.nan),
     )
 
-    more_data["years_educ_calc"] = (
-        more_data["age_end_educ"] - more_data["age_strt_school"]
-    )
-    more_data["years_educ_calc"] = np.where(
-        more_data["years_educ_calc"] < 0,
+    data["years_educ_calc"] = data["age_end_educ"] - data["age_strt_school"]
+    data["years_educ_calc"] = np.where(
+        data["years_educ_calc"] < 0,
         np.nan,
-        more_data["years_educ_calc"],
+        data["years_educ_calc"],
     )
-    more_data["years_educ_calc"] = np.where(
-        more_data["years_educ_calc"] > 30,
+    data["years_educ_calc"] = np.where(
+        data["years_educ_calc"] > 30,
         31,
-        more_data["years_educ_calc"],
+        data["years_educ_calc"],
     )
 
-    more_data["siblings_age12"] = (
-        more_data["old_brothers_age12"]
-        + more_data["old_sisters_age12"]
-        + more_data["young_brothers_age12"]
-        + more_data["young_sisters_age12"]
+    data["siblings_age12"] = (
+        data["old_brothers_age12"]
+        + data["old_sisters_age12"]
+        + data["young_brothers_age12"]
+        + data["young_sisters_age12"]
     )
 
-    more_data["young_siblings_age12"] = (
-        more_data["young_brothers_age12"] + more_data["young_sisters_age12"]
+    data["young_siblings_age12"] = (
+        data["young_brothers_age12"] + data["young_sisters_age12"]
     )
 
-    more_data["old_siblings_age12"] = (
-        more_data["old_brothers_age12"] + more_data["old_sisters_age12"]
-    )
+    data["old_siblings_age12"] = data["old_brothers_age12"] + data["old_sisters_age12"]
 
-    more_data["overweight"] = np.where(
-        (more_data["BMI_class"] == 3) | (more_data["BMI_class"] == 4),
+    data["overweight"] = np.where(
+        (data["BMI_class"] == 3) | (data["BMI_class"] == 4),
         1,
         np.where(
-            (more_data["BMI_class"] == 1) | (more_data["BMI_class"] == 2),
+            (data["BMI_class"] == 1) | (data["BMI_class"] == 2),
             0,
             np.nan,
         ),
     )
 
-    more_data["abuse_any_age15"] = np.where(
-        (more_data["abuse_outsidehh_age15"] == 1)
-        | (more_data["abuse_insidehh_age15"] == 1),
+    data["abuse_any_age15"] = np.where(
+        (data["abuse_outsidehh_age15"] == 1) | (data["abuse_insidehh_age15"] == 1),
         1,
         np.where(
-            (more_data["abuse_outsidehh_age15"] == 0)
-            & (more_data["abuse_insidehh_age15"] == 0),
+            (data["abuse_outsidehh_age15"] == 0) & (data["abuse_insidehh_age15"] == 0),
             0,
             np.nan,
         ),
     )
 
-    return more_data
 
+def _harmonize_skill_items(data):
+    """Harmonize (recode) skill items in place.
 
-def harmonize_skill_items(data):
-    """Harmonize (recode) skill items. Wave 1 and wave 2 items are reversed.
+    Args:
+        data (pandas DataFrame): The data set. It is modified in place.
+
+    Returns:
+        None
+
+    """
+    item_recoding = _skill_items_dicts_and_lists(which="item_recoding")
+
+    harmonized = []
+    for wave in item_recoding.values():
+        items = data[list(wave["items"])]
+        raw = items.to_numpy(dtype=float)
+
+        # Reverse the answers 1 to 4 (5 - x) of all items of the wave at once.
+        in_wave = data["country"].isin(wave["countries"]).to_numpy()
+        reverse = in_wave[:, None] & np.isin(raw, [1, 2, 3, 4])
+        recoded = np.where(reverse, 5 - raw, raw)
+        harmonized += [
+            (wave["items"][item], recoded[:, i].astype(dtype))
+            for i, (item, dtype) in enumerate(items.dtypes.items())
+        ]
+
+    for wave in item_recoding.values():
+        for item in wave["items"]:
+            del data[item]
+    for item, values in harmonized:
+        data[item] = values
 
-    I harmonize items across survey waves and at the same time across underlying traits
-    (for personality traits). The latter means that answers to reversely asked questions
-    are recoded s.t. a larger number corresponds to a higher level of the underlying trait.
+
+def _standardize_skills_and_prefs(data):
+    """Standardize skills and preferences in place.
 
     Args:
-        data (pandas DataFrame): The data set.
+        data (pandas DataFrame): The data. It is modified in place.
 
     Returns:
-        data_r (pandas DataFrame): The data with harmonized items instead.
+        None
 
     """
-    wave1_to_recode = _skill_items_dicts_and_lists(which="wave1_to_recode")
+    for col in _columns_to_standardize(data):
+        data[col + "_s"] = _standardize(col=data[col])
 
-    wave2_to_recode = _skill_items_dicts_and_lists(which="wave2_to_recode")
 
-    data_r = data.copy()
+def _get_some_skills_with_pca(data):
+    """Use PCA to get personality traits and behaviors (in place).
 
-    for item in wave1_to_recode:
-        data_r[wave1_to_recode[item]] = data_r[item]
-    for item in wave2_to_recode:
-        data_r[wave2_to_recode[item]] = data_r[item]
-
-    for item in wave1_to_recode:
-        data_r.loc[
-            data_r["country"].isin(
-                [
-                    "Bolivia",
-                    "Colombia",
-                    "Laos",
-                    "Sri Lanka",
-                    "Vietnam",
-                    "Yunnan",
-                    "Ukraine",
-                ],
-            ),
-            wave1_to_recode[item],
-        ] = data_r.loc[
-            data_r["country"].isin(
-                [
-                    "Bolivia",
-                    "Colombia",
-                    "Laos",
-                    "Sri Lanka",
-                    "Vietnam",
-                    "Yunnan",
-                    "Ukraine",
-                ],
-            ),
-            item,
-        ].replace(
-            {
-                1: 4,
-                2: 3,
-                3: 2,
-                4: 1,
-            },
-        )
+    Args:
+        data (pandas DataFrame): The data set. It is modified in place.
 
-    for item in wave2_to_recode:
-        data_r.loc[
-            data_r["country"].isin(
-                ["Armenia", "Georgia", "Ghana", "Macedonia", "Kenya"],
-            ),
-            wave2_to_recode[item],
-        ] = data_r.loc[
-            data_r["country"].isin(
-                ["Armenia", "Georgia", "Ghana", "Macedonia", "Kenya"],
-            ),
-            item,
-        ].replace(
-            {
-                1: 4,
-                2: 3,
-                3: 2,
-                4: 1,
-            },
+    Returns:
+        None
+
+    """
+    skill_dict = _skill_items_dicts_and_lists(which="skill_dict")
+
+    scores = sf.first_principal_components(data=data, item_blocks=skill_dict)
+    for col in scores:
+        data[col] = scores[col]
+
+
+def _get_acquiescence_bias_corrected_skills(data):
+    """Correct for acquiescence bias in skills (in place).
+
+    Args:
+        data (pandas DataFrame): The data set. It is modified in place.
+
+    Returns:
+        None
+
+    """
+    skill_means = _acquiescence_corrected_skill_means(data)
+
+    # Standardize the corrected skill measures.
+    for skill in skill_means:
+        data[skill + "_av_s_abcorr"] = _standardize(skill_means[skill])
+
+
+def _get_skills_based_on_laajaj_et_al(data):
+    """Get skills based on Laajaj et al. (2019) in place.
+
+    Args:
+        data (pandas DataFrame): The data set. It is modified in place.
+
+    Returns:
+        None
+
+    """
+    averages = _laajaj_et_al_averages(data)
+
+    # Standardize the adjusted skill measures.
+    for col in averages:
+        data[col.replace("_av_l_", "_av_s_laajaj_")] = _standardize(
+            pd.Series(averages[col], index=data.index),
         )
 
-    data_r = data_r.drop(
-        columns=list(wave1_to_recode.keys()) + list(wave2_to_recode.keys()),
-    )
 
-    return data_r
+def _create_skill_weights(data):
+    """Create weights for the skill measures in place.
 
+    Args:
+        data (pandas DataFrame): The data set. It is modified in place.
 
-def standardize_skills_and_prefs(data):
-    """Standardize skills and preferences.
+    Returns:
+        None
+
+    """
+    skill_dict = _skill_items_dicts_and_lists(which="skill_dict")
+
+    for skill in skill_dict:
+        num_items = data[skill_dict[skill]].notna().sum(axis=1)
+
+        data[skill + "_weight"] = np.where(
+            num_items == 1,
+            1,
+            np.where(
+                num_items == 2,
+                1.12,
+                np.where(num_items == 3, 1.19, np.where(num_items == 4, 1.24, 0)),
+            ),
+        )
+
+
+def _columns_to_standardize(data):
+    """Get the skills and preferences to be standardized.
 
     Args:
         data (pandas DataFrame): The data set.
 
     Returns:
-        data_s (pandas DataFrame): The data with standardized variables in addition.
+        (list): The column names.
 
     """
-    to_standardize = (
+    return (
         # All skill averages
         [col for col in data if col.endswith("_av")]
         + [
@@ -352,140 +701,93 @@ def standardize_skills_and_prefs(data):
         # All plausible values from the literacy test scores.
         + [col for col in data if col.startswith("PVLIT")]
     )
-    data_s = data.copy()
 
-    for col in to_standardize:
-        data_s[col + "_s"] = _standardize(col=data_s[col])
 
-    return data_s
-
-
-def get_some_skills_with_pca(data):
-    """Use PCA to get personality traits and behaviors.
+def _acquiescence_corrected_skill_means(data):
+    """Average the items of every skill after correcting them for acquiescence bias.
 
     Args:
         data (pandas DataFrame): The data set.
 
     Returns:
-        data_pca (pandas DataFrame): The data with principal components in addition.
+        (pandas DataFrame): The skill averages, one column per skill.
 
     """
-    orig_data = data.copy()
-
-    skill_dict = _skill_items_dicts_and_lists(which="skill_dict")
-
-    for skill in skill_dict:
-        # Prepare data.
-        data_pca = orig_data[skill_dict[skill]].copy()
-        data_pca = data_pca.dropna()
-        # Run PCA.
-        my_pca = PCA(n_components=1)
-        my_pca_component = my_pca.fit_transform(data_pca)
-        # Flip sign if all loadings are negative.
-        if np.all(my_pca.components_ < 0):
-            my_pca_component = -my_pca_component
-        # Add resulting component to the original data.
-        orig_data[skill + "_pca"] = np.nan
-        orig_data.loc[data_pca.index, skill + "_pca"] = my_pca_component
-
-    return orig_data
-
-
-def get_acquiescence_bias_corrected_skills(data):
-    """Correct for acquiescence bias in skills.
-
-    Args:
-        data (pandas DataFrame): The data set.
-
-    Returns:
-        data_acq (pandas DataFrame): The data with corrected skills in addition.
-
-    """
-    data_acq = data.copy()
-
-    # Get the individual acquiescence biases (AB).
-    data_acq["acq_bias"] = _estimate_acquiescence_bias(
-        data=data_acq,
-        reversed_info=_skill_items_dicts_and_lists(which="reversed_info"),
-    )
-
-    # Correct each item for AB.
-    for item in _skill_items_dicts_and_lists(which="reversed_item_list"):
-        data_acq[item + "_acq_corr"] = data_acq[item] + data_acq["acq_bias"]
-    for item in _skill_items_dicts_and_lists(which="non_reversed_item_list"):
-        data_acq[item + "_acq_corr"] = data_acq[item] - data_acq["acq_bias"]
+    corrected, position = _acquiescence_corrected_items(data)
 
     # Calculate the individual skill measure by taking the average of the corrected items.
     skill_dict = _skill_items_dicts_and_lists(which="skill_dict")
-    acq_skill_dict = {
-        key: [item.replace("_s", "_acq_corr") for item in value]
-        for key, value in skill_dict.items()
+    skill_items = {
+        skill: [item.removesuffix("_s") for item in items]
+        for skill, items in skill_dict.items()
     }
-    for skill in acq_skill_dict:
-        data_acq[skill + "_av_acq_corr"] = data_acq[acq_skill_dict[skill]].mean(axis=1)
 
-    # Standardize the corrected skill measures.
-    for skill in acq_skill_dict:
-        data_acq[skill + "_av_s_abcorr"] = _standardize(
-            data_acq[skill + "_av_acq_corr"],
-        )
-
-    data_acq = data_acq.drop(
-        columns=[col for col in data_acq if col.endswith("_av_acq_corr")],
+    return pd.DataFrame(
+        _group_means(corrected, position, groups=skill_items),
+        index=data.index,
+        columns=list(skill_items),
     )
 
-    return data_acq
 
+def _laajaj_et_al_averages(data):
+    """Average the acquiescence corrected items as in Laajaj et al. (2019).
 
-def get_skills_based_on_laajaj_et_al(data):
-    """Get skills based on Laajaj et al. (2019).
-
-    In one case we only use items loading on the correct skill, in the other we use
-    all items but for the skill they are loading on not for the skill they are designed for.
+    In one case we only use items loading on the correct skill, in the other we use all
+    items but for the skill they are loading on not for the skill they are designed for.
 
     Args:
         data (pandas DataFrame): The data set.
 
     Returns:
-        data_laajaj (pandas DataFrame): The data with Laajaj et al. skills in addition.
+        averages (dict): Keys are "{skill}_av_l_drop" and "{skill}_av_l_replace", values
+            are the averages (missing outside Ghana, Vietnam, Bolivia and Colombia).
 
     """
-    data_laajaj = data.copy()
+    corrected, position = _acquiescence_corrected_items(data)
+    items_acq_corr = pd.DataFrame(
+        corrected,
+        index=data.index,
+        columns=[item + "_acq_corr" for item in position],
+    )
 
     laajaj_et_al_drop = _skill_items_dicts_and_lists(which="laajaj_et_al_drop")
     laajaj_et_al_replace = _skill_items_dicts_and_lists(which="laajaj_et_al_replace")
 
+    averages = {}
+
     for skill in laajaj_et_al_drop["Ghana"]:
-        data_laajaj[skill + "_av_l_drop"] = np.where(
-            data_laajaj["country"] == "Ghana",
-            data_laajaj[laajaj_et_al_drop["Ghana"][skill]].mean(axis=1),
+        averages[skill + "_av_l_drop"] = np.where(
+            data["country"] == "Ghana",
+            items_acq_corr[laajaj_et_al_drop["Ghana"][skill]].mean(axis=1),
             np.where(
-                data_laajaj["country"] == "Vietnam",
-                data_laajaj[laajaj_et_al_drop["Vietnam"][skill]].mean(axis=1),
+                data["country"] == "Vietnam",
+                items_acq_corr[laajaj_et_al_drop["Vietnam"][skill]].mean(axis=1),
                 np.where(
-                    data_laajaj["country"] == "Bolivia",
-                    data_laajaj[laajaj_et_al_drop["Bolivia"][skill]].mean(axis=1),
+                    data["country"] == "Bolivia",
+                    items_acq_corr[laajaj_et_al_drop["Bolivia"][skill]].mean(axis=1),
                     np.where(
-                        data_laajaj["country"] == "Colombia",
-                        data_laajaj[laajaj_et_al_drop["Colombia"][skill]].mean(axis=1),
+                        data["country"] == "Colombia",
+                        items_acq_corr[laajaj_et_al_drop["Colombia"][skill]].mean(
+                            axis=1,
+                        ),
                         np.nan,
                     ),
                 ),
             ),
         )
     for skill in laajaj_et_al_replace["Ghana"]:
-        data_laajaj[skill + "_av_l_replace"] = np.where(
-            data_laajaj["country"] == "Ghana",
-            data_laajaj[laajaj_et_al_replace["Ghana"][skill]].mean(axis=1),
+        averages[skill + "_av_l_replace"] = np.where(
+            data["country"] == "Ghana",
+            items_acq_corr[laajaj_et_al_replace["Ghana"][skill]].mean(axis=1),
             np.where(
-                data_laajaj["country"] == "Vietnam",
-                data_laajaj[laajaj_et_al_replace["Vietnam"][skill]].mean(axis=1),
+                data["country"] == "Vietnam",
+                items_acq_corr[laajaj_et_al_replace["Vietnam"][skill]].mean(axis=1),
                 np.where(
-                    data_laajaj["country"] == "Bolivia",
-                    data_laajaj[laajaj_et_al_replace["Bolivia"][skill]].mean(axis=1),
+                    data["country"] == "Bolivia",
+                    items_acq_corr[laajaj_et_al_replace["Bolivia"][skill]].mean(axis=1),
                     np.where(
-                        data_laajaj["country"] == "Colombia",
-                        data_laajaj[laajaj_et_al_replace["Colombia"][skill]].mean(
+                        data["country"] == "Colombia",
+                        items_acq_corr[laajaj_et_al_replace["Colombia"][skill]].mean(
                             axis=1,
                         ),
                         np.nan,
@@ -494,108 +796,106 @@ def get_skills_based_on_laajaj_et_al(data):
             ),
         )
 
-    # Standardize the adjusted skill measures.
-    for skill in laajaj_et_al_drop["Ghana"]:
-        data_laajaj[skill + "_av_s_laajaj_drop"] = _standardize(
-            data_laajaj[skill + "_av_l_drop"],
-        )
-    for skill in laajaj_et_al_replace["Ghana"]:
-        data_laajaj[skill + "_av_s_laajaj_replace"] = _standardize(
-            data_laajaj[skill + "_av_l_replace"],
-        )
-
-    data_laajaj = data_laajaj.drop(
-        columns=[
-            col for col in data_laajaj if col.endswith(("_av_l_drop", "_av_l_replace"))
-        ],
-    )
-
-    return data_laajaj
-
+    return averages
 
-def create_skill_weights(data):
-    """Create weights for the skill measures.
 
-    Measures based on more items are given more weight.
+def _standardize(col):
+    """Standardize a specified column of a dataframe.
 
     Args:
-        data (pandas DataFrame): The data set.
+        col (series): Column of a pandas dataframe.
 
     Returns:
-        data_w (pandas DataFrame): The data with skill weights in addition.
+        column (series): Standardised column.
 
     """
-    data_w = data.copy()
+    column = (col - col.mean()) / col.std()
+    return column
 
-    skill_dict = _skill_items_dicts_and_lists(which="skill_dict")
 
-    for skill in skill_dict:
-        data_w[skill + "_num_items"] = data_w[skill_dict[skill]].notna().sum(axis=1)
+def _estimate_acquiescence_bias(values, position, reversed_info):
+    """Estimate acquiescence bias in the data set.
 
-        data_w[skill + "_weight"] = np.where(
-            data_w[skill + "_num_items"] == 1,
-            1,
-            np.where(
-                data_w[skill + "_num_items"] == 2,
-                1.12,
-                np.where(
-                    data_w[skill + "_num_items"] == 3,
-                    1.19,
-                    np.where(data_w[skill + "_num_items"] == 4, 1.24, 0),
-                ),
-            ),
-        )
+    For each of the three traits with reversed items, the bias is half the difference
+    between the average non-reversed and the average reversed item. The acquiescence
+    bias is the average of the three.
 
-    data_w = data_w.drop(columns=[col for col in data_w if col.endswith("_num_items")])
+    Args:
+        values (numpy.ndarray): The items (n x number of items).
+        position (dict): Keys are the items, values are their columns in values.
+        reversed_info (dict): Indicates which items are reversed and which are not.
 
-    return data_w
+    Returns:
+        acq_bias (numpy.ndarray): Acquiescence bias.
 
+    """
+    av_non_reversed = _group_means(
+        values,
+        position,
+        groups={trait: info["non_reversed"] for trait, info in reversed_info.items()},
+    )
+    av_reversed = _group_means(
+        values,
+        position,
+        groups={trait: info["reversed"] for trait, info in reversed_info.items()},
+    )
+    acq_bias = ((av_non_reversed - av_reversed) / 2).sum(axis=1) / len(reversed_info)
+
+    return acq_bias
 
-def _standardize(col):
-    """Standardize a specified column of a dataframe.
+
+def _acquiescence_corrected_items(data):
+    """Correct the skill items for acquiescence bias.
+
+    The bias is added to reversed and subtracted from non-reversed items.
 
     Args:
-        col (series): Column of a pandas dataframe.
+        data (pandas DataFrame): The data set.
 
     Returns:
-        column (series): Standardised column.
+        corrected (numpy.ndarray): The corrected items (n x number of items).
+        position (dict): Keys are the items, values are their columns in corrected.
 
     """
-    column = (col - col.mean()) / col.std()
-    return column
+    reversed_items = _skill_items_dicts_and_lists(which="reversed_item_list")
+    items = reversed_items + _skill_items_dicts_and_lists(
+        which="non_reversed_item_list",
+    )
+    position = {item: i for i, item in enumerate(items)}
+    corrected = data[items].to_numpy(dtype=float, na_value=np.nan, copy=True)
 
+    acq_bias = _estimate_acquiescence_bias(
+        values=corrected,
+        position=position,
+        reversed_info=_skill_items_dicts_and_lists(which="reversed_info"),
+    )
+    corrected[:, : len(reversed_items)] += acq_bias[:, None]
+    corrected[:, len(reversed_items) :] -= acq_bias[:, None]
 
-def _estimate_acquiescence_bias(data, reversed_info):
-    """Estimate acquiescence bias in the data set.
+    return corrected, position
+
+
+def _group_means(values, position, groups):
+    """Average groups of columns, skipping missing values (like DataFrame.mean).
 
     Args:
-        data (pandas DataFrame): The data set.
-        reversed_info (dict): Indicates which items are reversed and which are not.
+        values (numpy.ndarray): The items (n x number of items).
+        position (dict): Keys are the items, values are their columns in values.
+        groups (dict): Keys are the groups, values are lists of items.
 
     Returns:
-        acq_bias (pandas Series): Acquiescence bias.
+        means (numpy.ndarray): The group means (n x number of groups). Missing if all
+            items of a group are missing.
 
     """
-    av_reversed = {"extraversion": None, "conscientiousness": None, "stability": None}
-    av_non_reversed = {
-        "extraversion": None,
-        "conscientiousness": None,
-        "stability": None,
-    }
-    differences = {"extraversion": None, "conscientiousness": None, "stability": None}
+    means = np.empty((values.shape[0], len(groups)))
 
-    for trait in reversed_info:
-        av_reversed[trait] = data[reversed_info[trait]["reversed"]].mean(axis=1)
-        av_non_reversed[trait] = data[reversed_info[trait]["non_reversed"]].mean(axis=1)
-        differences[trait] = (av_non_reversed[trait] - av_reversed[trait]) / 2
+    for j, items in enumerate(groups.values()):
+        block = values[:, [position[item] for item in items]]
+        with np.errstate(invalid="ignore"):
+            means[:, j] = np.nansum(block, axis=1) / (~np.isnan(block)).sum(axis=1)
 
-    acq_bias = (
-        differences["extraversion"]
-        + differences["conscientiousness"]
-        + differences["stability"]
-    ) / 3
-
-    return acq_bias
+    return means
 
 
 def _skill_items_dicts_and_lists(which):
@@ -646,6 +946,25 @@ def _skill_items_dicts_and_lists(which):
         "decision": ["d1_h_s", "d2_h_s", "d3_h_s", "d4_h_s"],
         "hostile": ["h1_h_s", "h2_h_s"],
     }
+    # Items which are reversed in a wave and the countries surveyed in this wave.
+    item_recoding = {
+        "wave1": {
+            "countries": [
+                "Bolivia",
+                "Colombia",
+                "Laos",
+                "Sri Lanka",
+                "Vietnam",
+                "Yunnan",
+                "Ukraine",
+            ],
+            "items": wave1_to_recode,
+        },
+        "wave2": {
+            "countries": ["Armenia", "Georgia", "Ghana", "Macedonia", "Kenya"],
+            "items": wave2_to_recode,
+        },
+    }
     reversed_item_list = list(wave2_to_recode.values())
     non_reversed_item_list = list(wave1_to_recode.values())
     reversed_info = {
@@ -1,8 +1,197 @@
+"""Create the treatment, reform and cohort variables for the analysis.
+
+All variables are derived from the same few reform conditions (treatment or control
+group of reform 1 or 2 within a time window around the (placebo) pivotal cohort). The
+conditions are evaluated once per data set and memoized in a dictionary of boolean
+masks, which is passed between the helper functions.
+
+"""
 import numpy as np
+import pandas as pd
 
 from nc_skills_step_public import global_info as gl
 
 
+def create_reform_variables(data, placebo_years=None):
+    """Create all treatment, reform and cohort variables in a single pass.
+
+    The result is identical to applying create_treatment_indicator,
+    create_treatment_indicator_w_month, create_individuals_relevant_reform,
+    create_individuals_relevant_reform_months_based, create_partially_treated_indicator,
+    create_relative_cohort, create_relative_month, create_relative_placebo_cohort and
+    the placebo versions of these functions one after the other. Each reform condition
+    is evaluated only once and the data is copied only once.
+
+    Args:
+        data (pandas DataFrame): The data containing STEP data and reforms.
+        placebo_years (dict): Keys are the distances to the true pivotal cohort, values
+            are the placebo numbers (as strings). Default: gl.placebo_years.
+
+    Returns:
+        (pandas DataFrame): The data with all additional columns.
+
+    """
+    if placebo_years is None:
+        placebo_years = gl.placebo_years
+
+    masks = {}
+    new = {}
+
+    new["treated"] = _treatment_indicator_values(data=data, masks=masks)
+    new["treated_w_month"] = _treatment_indicator_values(
+        data=data,
+        masks=masks,
+        w_month=True,
+    )
+    new["country_reform"] = _relevant_reform_values(data=data, masks=masks)
+    new["country_reform_brth_year"] = _cluster_values(
+        data=data,
+        reform=new["country_reform"],
+    )
+    new["country_reform_w_month"] = _relevant_reform_values(
+        data=data,
+        masks=masks,
+        w_month=True,
+    )
+    new["country_reform_w_month_brth_year"] = _cluster_values(
+        data=data,
+        reform=new["country_reform_w_month"],
+    )
+    new["partially_treated"] = _partially_treated_values(
+        reform=new["country_reform"],
+        in_window=data["brth_year"].isin(range(1977, 1981)),
+    )
+    new["rel_cohort"] = _relative_cohort_values(data=data, masks=masks, years=10)
+    new["rel_cohort2"] = new["rel_cohort"] ** 2
+    new["rel_cohort3"] = new["rel_cohort"] ** 3
+    new["rel_cohort4"] = new["rel_cohort"] ** 4
+    new["rel_month"] = _relative_month_values(data=data, masks=masks)
+    new["rel_month2"] = new["rel_month"] ** 2
+
+    placebo = create_placebo_variables(data=data, placebo_years=placebo_years)
+
+    return pd.concat([data, pd.DataFrame(new, index=data.index), placebo], axis=1)
+
+
+def create_placebo_variables(data, placebo_years=None, chunk_size=8):
+    """Create the placebo variables for an arbitrary set of placebo cutoffs.
+
+    For every shift of the pivotal cohort, the placebo treatment indicator, the relevant
+    placebo reform (and its cluster variable), the relative placebo cohort (5-years
+    window) with its squared term and the placebo partially treated indicator are
+    created. The distances to the pivotal cohorts are computed once and broadcast over
+    the shifts. The results are written into preallocated arrays, processing chunk_size
+    shifts at a time, so that temporary memory does not grow with the number of shifts.
+
+    The columns are identical to those of create_relative_placebo_cohort,
+    create_treatment_indicator, create_individuals_relevant_reform and
+    create_partially_treated_placebo_indicator with the respective placebo shift.
+
+    Args:
+        data (pandas DataFrame): The data containing STEP data and reforms.
+        placebo_years (dict): Keys are the distances to the true pivotal cohort, values
+            are the placebo numbers (as strings) used in the column names. Default:
+            gl.placebo_years. See placebo_numbers for arbitrary ranges of shifts.
+        chunk_size (int): Number of shifts processed at once.
+
+    Returns:
+        (pandas DataFrame): The placebo variables, with the same index as data.
+
+    """
+    if placebo_years is None:
+        placebo_years = gl.placebo_years
+
+    shifts = np.array(list(placebo_years), dtype=float)
+    n_obs, n_shifts = len(data), len(shifts)
+
+    brth_year = data["brth_year"].to_numpy(dtype=float)
+    distance, reform, cluster = {}, {}, {}
+    for n_reform in (1, 2):
+        distance[n_reform] = brth_year - data[
+            "pivotal_lower_reform" + str(n_reform)
+        ].to_numpy(dtype=float)
+        reform_n = data["country"].astype(str) + data[
+            "reform_year_reform" + str(n_reform)
+        ].fillna(0).astype(int).astype(str)
+        reform[n_reform] = reform_n.to_numpy(dtype=object)
+        cluster[n_reform] = _cluster_values(data=data, reform=reform_n).to_numpy(
+            dtype=object,
+        )
+
+    treated = np.empty((n_obs, n_shifts))
+    rel_cohort = np.empty((n_obs, n_shifts))
+    partially_treated = np.empty((n_obs, n_shifts), dtype=int)
+    country_reform = np.empty((n_obs, n_shifts), dtype=object)
+    country_reform_brth_year = np.empty((n_obs, n_shifts), dtype=object)
+
+    for start in range(0, n_shifts, chunk_size):
+        chunk = slice(start, start + chunk_size)
+        # Distance to the placebo pivotal cohort (n_obs x shifts in chunk).
+        rel = {n: distance[n][:, None] - shifts[None, chunk] for n in (1, 2)}
+        # NaN distances (no reform) compare as False.
+        with np.errstate(invalid="ignore"):
+            treatment = {n: (rel[n] >= 0) & (rel[n] < 10) for n in (1, 2)}
+            window_10 = {n: (rel[n] >= -10) & (rel[n] < 10) for n in (1, 2)}
+            window_5 = {n: (rel[n] >= -5) & (rel[n] < 5) for n in (1, 2)}
+
+        treated[:, chunk] = np.where(
+            treatment[1] | treatment[2],
+            1,
+            np.where(window_10[1] | window_10[2], 0, np.nan),
+        )
+        country_reform[:, chunk] = np.where(
+            window_10[1],
+            reform[1][:, None],
+            np.where(window_10[2], reform[2][:, None], np.nan),
+        )
+        country_reform_brth_year[:, chunk] = np.where(
+            window_10[1],
+            cluster[1][:, None],
+            np.where(window_10[2], cluster[2][:, None], np.nan),
+        )
+        rel_cohort[:, chunk] = np.where(
+            window_5[1],
+            rel[1],
+            np.where(window_5[2], rel[2], np.nan),
+        )
+        partially_treated[:, chunk] = (
+            country_reform[:, chunk] == "Vietnam1991"
+        ) & np.isin(rel_cohort[:, chunk], range(4))
+
+    placebo = {}
+    for j, number in enumerate(placebo_years.values()):
+        placebo["rel_placebo_cohort" + number] = rel_cohort[:, j]
+        placebo["rel_placebo_cohort" + number + "_2"] = rel_cohort[:, j] ** 2
+    for j, number in enumerate(placebo_years.values()):
+        placebo["placebo" + number] = treated[:, j]
+        placebo["country_reform_placebo" + number] = country_reform[:, j]
+        placebo[
+            "country_reform_placebo" + number + "_brth_year"
+        ] = country_reform_brth_year[:, j]
+        placebo["partially_treated_placebo" + number] = partially_treated[:, j]
+
+    return pd.DataFrame(placebo, index=data.index)
+
+
+def placebo_numbers(shifts):
+    """Get the placebo numbers (column name suffixes) for a range of shifts.
+
+    Args:
+        shifts (iterable of ints): The distances to the true pivotal cohort, e.g.
+            range(-15, 16).
+
+    Returns:
+        (dict): Keys are the shifts, values are the suffixes, e.g. "_m15" for -15 and
+            "_p3" for 3. The true cutoff (0) is left out.
+
+    """
+    return {
+        shift: ("_m" if shift < 0 else "_p") + str(abs(shift))
+        for shift in shifts
+        if shift != 0
+    }
+
+
 def create_treatment_indicator(data, var_name, placebo=0):
     """Create a variable indicating treatment of compulsory schooling reform.
 
@@ -18,45 +207,10 @@ def create_treatment_indicator(data, var_name, placebo=0):
 
     """
     data_copy = data.copy()
-
-    data_copy[var_name] = np.where(
-        (
-            _treatment_reform_condition(
-                data=data_copy,
-                years=10,
-                n_reform=1,
-                placebo=placebo,
-            )
-        )
-        | (
-            _treatment_reform_condition(
-                data=data_copy,
-                years=10,
-                n_reform=2,
-                placebo=placebo,
-            )
-        ),
-        1,
-        np.where(
-            (
-                _control_reform_condition(
-                    data=data_copy,
-                    years=10,
-                    n_reform=1,
-                    placebo=placebo,
-                )
-            )
-            | (
-                _control_reform_condition(
-                    data=data_copy,
-                    years=10,
-                    n_reform=2,
-                    placebo=placebo,
-                )
-            ),
-            0,
-            np.nan,
-        ),
+    data_copy[var_name] = _treatment_indicator_values(
+        data=data_copy,
+        masks={},
+        placebo=placebo,
     )
 
     return data_copy
@@ -76,17 +230,10 @@ def create_treatment_indicator_w_month(data):
 
     """
     data_copy = data.copy()
-
-    data_copy["treated_w_month"] = np.where(
-        (_treatment_reform_condition_w_month(data=data_copy, years=10, n_reform=1))
-        | (_treatment_reform_condition_w_month(data=data_copy, years=10, n_reform=2)),
-        1,
-        np.where(
-            (_control_reform_condition_w_month(data=data_copy, years=10, n_reform=1))
-            | (_control_reform_condition_w_month(data=data_copy, years=10, n_reform=2)),
-            0,
-            np.nan,
-        ),
+    data_copy["treated_w_month"] = _treatment_indicator_values(
+        data=data_copy,
+        masks={},
+        w_month=True,
     )
 
     return data_copy
@@ -109,54 +256,16 @@ def create_individuals_relevant_reform(data, var_name, placebo=0):
 
     """
     data_copy = data.copy()
-
-    data_copy[var_name] = np.where(
-        # Belongs to treatment/control group because of reform 1.
-        (
-            _treatment_reform_condition(
-                data=data_copy,
-                years=10,
-                n_reform=1,
-                placebo=placebo,
-            )
-        )
-        | (
-            _control_reform_condition(
-                data=data_copy,
-                years=10,
-                n_reform=1,
-                placebo=placebo,
-            )
-        ),
-        data_copy["country"].astype(str)
-        + data_copy["reform_year_reform1"].fillna(0).astype(int).astype(str),
-        # Belongs to treatment/control group because of reform 2.
-        np.where(
-            (
-                _treatment_reform_condition(
-                    data=data_copy,
-                    years=10,
-                    n_reform=2,
-                    placebo=placebo,
-                )
-            )
-            | (
-                _control_reform_condition(
-                    data=data_copy,
-                    years=10,
-                    n_reform=2,
-                    placebo=placebo,
-                )
-            ),
-            data_copy["country"].astype(str)
-            + data_copy["reform_year_reform2"].fillna(0).astype(int).astype(str),
-            np.nan,
-        ),
+    data_copy[var_name] = _relevant_reform_values(
+        data=data_copy,
+        masks={},
+        placebo=placebo,
     )
 
     # Cluster level variable.
-    data_copy[var_name + "_brth_year"] = (
-        data_copy[var_name] + "_" + data_copy["brth_year"].astype(str)
+    data_copy[var_name + "_brth_year"] = _cluster_values(
+        data=data_copy,
+        reform=data_copy[var_name],
     )
 
     return data_copy
@@ -178,50 +287,16 @@ def create_individuals_relevant_reform_months_based(data, var_name):
 
     """
     data_copy = data.copy()
-
-    data_copy[var_name] = np.where(
-        # Belongs to treatment/control group because of reform 1.
-        (
-            _treatment_reform_condition_w_month(
-                data=data_copy,
-                years=10,
-                n_reform=1,
-            )
-        )
-        | (
-            _control_reform_condition_w_month(
-                data=data_copy,
-                years=10,
-                n_reform=1,
-            )
-        ),
-        data_copy["country"].astype(str)
-        + data_copy["reform_year_reform1"].fillna(0).astype(int).astype(str),
-        # Belongs to treatment/control group because of reform 2.
-        np.where(
-            (
-                _treatment_reform_condition_w_month(
-                    data=data_copy,
-                    years=10,
-                    n_reform=2,
-                )
-            )
-            | (
-                _control_reform_condition_w_month(
-                    data=data_copy,
-                    years=10,
-                    n_reform=2,
-                )
-            ),
-            data_copy["country"].astype(str)
-            + data_copy["reform_year_reform2"].fillna(0).astype(int).astype(str),
-            np.nan,
-        ),
+    data_copy[var_name] = _relevant_reform_values(
+        data=data_copy,
+        masks={},
+        w_month=True,
     )
 
     # Cluster level variable.
-    data_copy[var_name + "_brth_year"] = (
-        data_copy[var_name] + "_" + data_copy["brth_year"].astype(str)
+    data_copy[var_name + "_brth_year"] = _cluster_values(
+        data=data_copy,
+        reform=data_copy[var_name],
     )
 
     return data_copy
@@ -241,11 +316,9 @@ def create_partially_treated_indicator(data):
 
     """
     data_copy = data.copy()
-    data_copy["partially_treated"] = np.where(
-        (data_copy["country_reform"] == "Vietnam1991")
-        & (data_copy["brth_year"].isin(range(1977, 1981))),
-        1,
-        0,
+    data_copy["partially_treated"] = _partially_treated_values(
+        reform=data_copy["country_reform"],
+        in_window=data_copy["brth_year"].isin(range(1977, 1981)),
     )
 
     return data_copy
@@ -263,11 +336,9 @@ def create_partially_treated_placebo_indicator(data, placebo_number):
 
     """
     data_copy = data.copy()
-    data_copy["partially_treated_placebo" + placebo_number] = np.where(
-        (data_copy["country_reform_placebo" + placebo_number] == "Vietnam1991")
-        & (data_copy["rel_placebo_cohort" + placebo_number].isin(range(4))),
-        1,
-        0,
+    data_copy["partially_treated_placebo" + placebo_number] = _partially_treated_values(
+        reform=data_copy["country_reform_placebo" + placebo_number],
+        in_window=data_copy["rel_placebo_cohort" + placebo_number].isin(range(4)),
     )
 
     return data_copy
@@ -288,16 +359,10 @@ def create_relative_cohort(data):
     """
     data_copy = data.copy()
 
-    data_copy["rel_cohort"] = np.where(
-        (_treatment_reform_condition(data=data_copy, years=10, n_reform=1))
-        | (_control_reform_condition(data=data_copy, years=10, n_reform=1)),
-        data_copy["brth_year"] - data_copy["pivotal_lower_reform1"],
-        np.where(
-            (_treatment_reform_condition(data=data_copy, years=10, n_reform=2))
-            | (_control_reform_condition(data=data_copy, years=10, n_reform=2)),
-            data_copy["brth_year"] - data_copy["pivotal_lower_reform2"],
-            np.nan,
-        ),
+    data_copy["rel_cohort"] = _relative_cohort_values(
+        data=data_copy,
+        masks={},
+        years=10,
     )
 
     data_copy["rel_cohort2"] = data_copy["rel_cohort"] ** 2
@@ -321,46 +386,16 @@ def create_relative_placebo_cohort(data):
 
     """
     data_copy = data.copy()
+    masks = {}
 
     for year in gl.placebo_years:
-        data_copy["rel_placebo_cohort" + gl.placebo_years[year]] = np.where(
-            (
-                _treatment_reform_condition(
-                    data=data_copy,
-                    years=5,
-                    n_reform=1,
-                    placebo=year,
-                )
-            )
-            | (
-                _control_reform_condition(
-                    data=data_copy,
-                    years=5,
-                    n_reform=1,
-                    placebo=year,
-                )
-            ),
-            data_copy["brth_year"] - (data_copy["pivotal_lower_reform1"] + year),
-            np.where(
-                (
-                    _treatment_reform_condition(
-                        data=data_copy,
-                        years=5,
-                        n_reform=2,
-                        placebo=year,
-                    )
-                )
-                | (
-                    _control_reform_condition(
-                        data=data_copy,
-                        years=5,
-                        n_reform=2,
-                        placebo=year,
-                    )
-                ),
-                data_copy["brth_year"] - (data_copy["pivotal_lower_reform2"] + year),
-                np.nan,
-            ),
+        data_copy[
+            "rel_placebo_cohort" + gl.placebo_years[year]
+        ] = _relative_cohort_values(
+            data=data_copy,
+            masks=masks,
+            years=5,
+            placebo=year,
         )
 
         data_copy["rel_placebo_cohort" + gl.placebo_years[year] + "_2"] = (
@@ -385,36 +420,189 @@ def create_relative_month(data):
     """
     data_copy = data.copy()
 
-    data_copy["rel_month"] = np.where(
-        _treatment_reform_condition_w_month(data=data_copy, years=10, n_reform=1),
-        -12 * (data_copy["pivotal_lower_reform1"] - 1 - data_copy["brth_year"])
-        - (data_copy["pivotal_month_reform1"] - data_copy["brth_month"]),
+    data_copy["rel_month"] = _relative_month_values(data=data_copy, masks={})
+    data_copy["rel_month2"] = data_copy["rel_month"] ** 2
+
+    return data_copy
+
+
+def _treatment_indicator_values(data, masks, placebo=0, w_month=False):
+    """Get the values of the treatment indicator (10-years window).
+
+    Args:
+        data (pandas DataFrame): The data containing STEP data and reforms.
+        masks (dict): Memoized reform conditions (see _condition).
+        placebo (int): The distance to the true pivotal cohort.
+        w_month (bool): If True, the birth month is taken into account.
+
+    Returns:
+        (numpy.ndarray): 1 for treated, 0 for control individuals, NaN otherwise.
+
+    """
+    which = "_w_month" if w_month is True else ""
+    treatment = _condition(data, masks, "treatment" + which, 10, 1, placebo) | (
+        _condition(data, masks, "treatment" + which, 10, 2, placebo)
+    )
+    control = _condition(data, masks, "control" + which, 10, 1, placebo) | (
+        _condition(data, masks, "control" + which, 10, 2, placebo)
+    )
+
+    return np.where(treatment, 1, np.where(control, 0, np.nan))
+
+
+def _relevant_reform_values(data, masks, placebo=0, w_month=False):
+    """Get the values of the variable indicating the relevant reform.
+
+    Args:
+        data (pandas DataFrame): The data containing STEP data and reforms.
+        masks (dict): Memoized reform conditions (see _condition).
+        placebo (int): The distance to the true pivotal cohort.
+        w_month (bool): If True, the birth month is taken into account.
+
+    Returns:
+        (numpy.ndarray): Country and reform year (e.g. "Ghana1961"), NaN if no reform
+            is relevant.
+
+    """
+    which = "_w_month" if w_month is True else ""
+
+    return np.where(
+        # Belongs to treatment/control group because of reform 1.
+        _condition(data, masks, "treatment" + which, 10, 1, placebo)
+        | _condition(data, masks, "control" + which, 10, 1, placebo),
+        data["country"].astype(str)
+        + data["reform_year_reform1"].fillna(0).astype(int).astype(str),
+        # Belongs to treatment/control group because of reform 2.
+        np.where(
+            _condition(data, masks, "treatment" + which, 10, 2, placebo)
+            | _condition(data, masks, "control" + which, 10, 2, placebo),
+            data["country"].astype(str)
+            + data["reform_year_reform2"].fillna(0).astype(int).astype(str),
+            np.nan,
+        ),
+    )
+
+
+def _cluster_values(data, reform):
+    """Get the values of the cluster level variable (reform and birth year).
+
+    Args:
+        data (pandas DataFrame): The data set.
+        reform (numpy.ndarray or pandas Series): The relevant reform.
+
+    Returns:
+        (pandas Series): Reform and birth year, e.g. "Ghana1961_1950.0".
+
+    """
+    return pd.Series(reform, index=data.index) + "_" + data["brth_year"].astype(str)
+
+
+def _partially_treated_values(reform, in_window):
+    """Get the values of the (placebo) partially treated indicator.
+
+    Args:
+        reform (numpy.ndarray or pandas Series): The relevant reform.
+        in_window (pandas Series): Boolean, True for the partially treated cohorts.
+
+    Returns:
+        (numpy.ndarray): 1 for partially treated individuals, 0 otherwise.
+
+    """
+    return np.where((np.asarray(reform) == "Vietnam1991") & in_window.to_numpy(), 1, 0)
+
+
+def _relative_cohort_values(data, masks, years, placebo=0):
+    """Get the distance to the (placebo) pivotal cohort.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        masks (dict): Memoized reform conditions (see _condition).
+        years (int): Number of years to be included before and after the pivotal cohort.
+        placebo (int): The distance to the true pivotal cohort.
+
+    Returns:
+        (numpy.ndarray): The distance in years, NaN outside of the time window.
+
+    """
+    return np.where(
+        _condition(data, masks, "treatment", years, 1, placebo)
+        | _condition(data, masks, "control", years, 1, placebo),
+        data["brth_year"] - (data["pivotal_lower_reform1"] + placebo),
         np.where(
-            _treatment_reform_condition_w_month(data=data_copy, years=10, n_reform=2),
-            -12 * (data_copy["pivotal_lower_reform2"] - 1 - data_copy["brth_year"])
-            - (data_copy["pivotal_month_reform2"] - data_copy["brth_month"]),
+            _condition(data, masks, "treatment", years, 2, placebo)
+            | _condition(data, masks, "control", years, 2, placebo),
+            data["brth_year"] - (data["pivotal_lower_reform2"] + placebo),
+            np.nan,
+        ),
+    )
+
+
+def _relative_month_values(data, masks):
+    """Get the distance to the pivotal month in months (10-years window).
+
+    Args:
+        data (pandas DataFrame): The data set.
+        masks (dict): Memoized reform conditions (see _condition).
+
+    Returns:
+        (numpy.ndarray): The distance in months, NaN outside of the time window.
+
+    """
+    rel_month = {
+        n_reform: -12
+        * (data["pivotal_lower_reform" + str(n_reform)] - 1 - data["brth_year"])
+        - (data["pivotal_month_reform" + str(n_reform)] - data["brth_month"])
+        for n_reform in (1, 2)
+    }
+
+    return np.where(
+        _condition(data, masks, "treatment_w_month", 10, 1),
+        rel_month[1],
+        np.where(
+            _condition(data, masks, "treatment_w_month", 10, 2),
+            rel_month[2],
             np.where(
-                _control_reform_condition_w_month(data=data_copy, years=10, n_reform=1),
-                -12 * (data_copy["pivotal_lower_reform1"] - 1 - data_copy["brth_year"])
-                - (data_copy["pivotal_month_reform1"] - data_copy["brth_month"]),
+                _condition(data, masks, "control_w_month", 10, 1),
+                rel_month[1],
                 np.where(
-                    _control_reform_condition_w_month(
-                        data=data_copy,
-                        years=10,
-                        n_reform=2,
-                    ),
-                    -12
-                    * (data_copy["pivotal_lower_reform2"] - 1 - data_copy["brth_year"])
-                    - (data_copy["pivotal_month_reform2"] - data_copy["brth_month"]),
+                    _condition(data, masks, "control_w_month", 10, 2),
+                    rel_month[2],
                     np.nan,
                 ),
             ),
         ),
     )
 
-    data_copy["rel_month2"] = data_copy["rel_month"] ** 2
 
-    return data_copy
+def _condition(data, masks, which, years, n_reform, placebo=0):
+    """Get a reform condition, evaluating it only once per data set.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        masks (dict): Memoized conditions. Keys are (which, years, n_reform, placebo).
+        which (str): "treatment", "control", "treatment_w_month" or "control_w_month".
+        years (int): Number of years to be included before and after the pivotal cohort.
+        n_reform (int): 1 or 2; Which reform to look at.
+        placebo (int): The distance to the true pivotal cohort (not for months).
+
+    Returns:
+        condition (numpy.ndarray): Boolean mask.
+
+    """
+    key = (which, years, n_reform, placebo)
+
+    if key not in masks:
+        if which == "treatment":
+            condition = _treatment_reform_condition(data, years, n_reform, placebo)
+        elif which == "control":
+            condition = _control_reform_condition(data, years, n_reform, placebo)
+        elif which == "treatment_w_month":
+            condition = _treatment_reform_condition_w_month(data, years, n_reform)
+        elif which == "control_w_month":
+            condition = _control_reform_condition_w_month(data, years, n_reform)
+        masks[key] = condition.to_numpy()
+
+    return masks[key]
 
 
 def _treatment_reform_condition(data, years, n_reform, placebo=0):
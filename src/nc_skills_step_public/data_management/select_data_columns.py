@@ -0,0 +1,137 @@
+"""Read the selected columns of the STEP working files.
+
+The variable names of the 2013 wave are resolved before a file is opened, so that only
+the requested columns are decoded. Files are read in chunks of rows to bound the
+memory footprint.
+
+"""
+
+import pandas as pd
+
+countries_2012 = [
+    "Bolivia",
+    "Colombia",
+    "Laos",
+    "Sri_Lanka",
+    "Ukraine",
+    "Vietnam",
+    "Yunnan",
+]
+
+countries_2013 = [
+    "Armenia",
+    "Georgia",
+    "Ghana",
+    "Kenya",
+    "Macedonia",
+]
+
+
+def get_selected_variables(selected_variables, country):
+    """Get the names (2012 wave) of the variables to be selected for a country.
+
+    Args:
+        selected_variables (pandas DataFrame): The content of selected_variables.xlsx.
+        country (string): The country.
+
+    Returns:
+        sel_vars_list_2012 (list): The variable names.
+
+    """
+    sel_vars_list_2012 = selected_variables["Name"].to_list()
+
+    # If available, add plausible values for the literacy test.
+    if country not in ["Yunnan", "Laos", "Sri_Lanka", "Macedonia"]:
+        sel_vars_list_2012 += [f"PVLIT{i}" for i in range(1, 11)]
+
+    # Experience of violence or abuse as a child is only available for Bolivia.
+    if country == "Bolivia":
+        sel_vars_list_2012 += ["m7a_q27", "m7a_q28"]
+
+    return sel_vars_list_2012
+
+
+def get_variable_names_mapping(sel_vars_list_2012):
+    """Map the variable names of the 2012 wave to those of the 2013 wave.
+
+    Args:
+        sel_vars_list_2012 (list): The variable names (2012 wave).
+
+    Returns:
+        var_names_mapping_12_to_13 (dict): Keys are the 2012 names, values are the
+            2013 names. Variables with the same name in both waves are not included.
+
+    """
+    # Some variable names for 2013 differ.
+    var_names_mapping_12_to_13 = {
+        "m2_q29": "m2_q26",
+        "m7a_q23": "m7_q22",
+        "m7a_q25": "m7_q24",
+    }
+
+    var_names_mapping_trait_items = {
+        item: "m6a_q01_" + item.split("m6a_q01")[1]
+        for item in sel_vars_list_2012
+        if item.startswith("m6a_q01")
+    }
+
+    var_names_mapping_12_to_13.update(var_names_mapping_trait_items)
+
+    return var_names_mapping_12_to_13
+
+
+def select_data_columns(path, country, sel_vars_list_2012, chunksize=10_000):
+    """Read the selected variables of one country with the names of the 2012 wave.
+
+    Args:
+        path (str or pathlib.Path): Path to the STEP working file (.dta).
+        country (string): The country.
+        sel_vars_list_2012 (list): The variable names (2012 wave).
+        chunksize (int): Number of rows read at once.
+
+    Returns:
+        data (pandas DataFrame): The selected variables and the country.
+
+    """
+    if country in countries_2012:
+        data = read_stata_columns(path, columns=sel_vars_list_2012, chunksize=chunksize)
+
+    elif country in countries_2013:
+        var_names_mapping_12_to_13 = get_variable_names_mapping(sel_vars_list_2012)
+        sel_vars_list_2013 = [
+            var_names_mapping_12_to_13.get(item, item) for item in sel_vars_list_2012
+        ]
+        data = read_stata_columns(path, columns=sel_vars_list_2013, chunksize=chunksize)
+        data = data.rename(
+            columns={value: key for key, value in var_names_mapping_12_to_13.items()},
+        )
+
+    data["country"] = country
+
+    return data
+
+
+def read_stata_columns(path, columns, chunksize=10_000):
+    """Read some columns of a Stata file chunk by chunk.
+
+    Only the requested columns of each chunk are converted, so the memory footprint is
+    bounded by the selected data plus one chunk of raw records.
+
+    Args:
+        path (str or pathlib.Path): Path to the Stata file.
+        columns (list): The columns to be read (in this order).
+        chunksize (int): Number of rows read at once.
+
+    Returns:
+        data (pandas DataFrame): The requested columns.
+
+    """
+    with pd.read_stata(
+        path,
+        columns=list(dict.fromkeys(columns)),
+        convert_categoricals=False,
+        chunksize=chunksize,
+    ) as reader:
+        chunks = list(reader)
+
+    return pd.concat(chunks, ignore_index=True)
@@ -0,0 +1,400 @@
+"""Prepare the STEP data country by country in parallel processes.
+
+Most preparation steps work row by row. Only the standardization, the PCA and the final
+standardization of the acquiescence bias corrected and the Laajaj et al. skills use
+statistics of the pooled data. The preparation is therefore split into two phases:
+
+1. Each country is cleaned in its own process (rename_variables, clean_data,
+   add_data_columns, harmonize_skill_items). The process stores the cleaned shard and
+   returns mergeable sufficient statistics: counts, means and sums of squared
+   deviations (M2) of the columns to be standardized, and the complete-case moments of
+   the skill item blocks for the PCA.
+2. The statistics of all shards are merged (Chan et al.), and each shard is finished
+   in its own process with the pooled statistics.
+
+Hence, no process holds more than one country. The result is the same as that of
+prepare_STEP_data.prepare_STEP_data on the concatenated data (up to floating point
+error). The shards do not use the stage cache: the steps of the second phase depend on
+the statistics of all countries. The sharded preparation is therefore opt-in (see
+gl.prepare_STEP_data_in_shards).
+
+"""
+
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from nc_skills_step_public.data_management import pipeline as pl
+from nc_skills_step_public.data_management import prepare_STEP_data as prd
+from nc_skills_step_public.data_management import select_data_columns as sdc
+from nc_skills_step_public.data_management import skill_factors as sf
+
+ROW_WISE_STAGES = [
+    "rename_variables",
+    "clean_data",
+    "add_data_columns",
+    "harmonize_skill_items",
+]
+
+
+def prepare_countries_in_shards(paths, columns, shard_paths, n_workers):
+    """Prepare the data of all countries in two phases of parallel processes.
+
+    Args:
+        paths (dict): Keys are the countries, values are the paths to the selected data
+            ({country}_small.pkl).
+        columns (list): The columns of the pooled selected data, see pooled_columns.
+        shard_paths (dict): Keys are the countries, values are the paths where the
+            prepared data of the country is stored.
+        n_workers (int): Number of processes.
+
+    Returns:
+        report (pandas DataFrame): Wall time, peak RSS and cache use of every step and
+            country.
+
+    """
+    countries = list(paths)
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        cleaned = list(
+            executor.map(
+                clean_country_shard,
+                [paths[country] for country in countries],
+                [columns] * len(countries),
+                [shard_paths[country] for country in countries],
+            ),
+        )
+        pooled = functools.reduce(
+            merge_shard_statistics,
+            [statistics for statistics, _ in cleaned],
+        )
+        finished = list(
+            executor.map(
+                finish_country_shard,
+                [shard_paths[country] for country in countries],
+                [pooled] * len(countries),
+            ),
+        )
+
+    return pd.concat(
+        {
+            country: pd.concat([cleaned[i][1], finished[i]])
+            for i, country in enumerate(countries)
+        },
+        names=["country"],
+    )
+
+
+def pooled_columns(selected_variables, countries):
+    """Get the columns of the concatenated selected data of all countries.
+
+    Variables which are only selected for some countries (e.g. the literacy test
+    scores) are added to every shard, so that all shards have the same columns in the
+    same order as the concatenated data.
+
+    Args:
+        selected_variables (pandas DataFrame): The content of selected_variables.xlsx.
+        countries (list): The countries in the order of concatenation.
+
+    Returns:
+        (list): The column names.
+
+    """
+    return list(
+        dict.fromkeys(
+            chain.from_iterable(
+                [*sdc.get_selected_variables(selected_variables, country), "country"]
+                for country in countries
+            ),
+        ),
+    )
+
+
+def clean_country_shard(path, columns, shard_path):
+    """Phase one: clean the data of one country and compute its statistics.
+
+    Args:
+        path (str or pathlib.Path): Path to the selected data of the country.
+        columns (list): The columns of the pooled selected data.
+        shard_path (str or pathlib.Path): Path where the cleaned data is stored.
+
+    Returns:
+        statistics (dict): See shard_statistics.
+        report (pandas DataFrame): Wall time, peak RSS and cache use of every step.
+
+    """
+    data = pd.read_pickle(path).reindex(columns=columns)
+
+    stages = [
+        stage for stage in prd.preparation_stages() if stage["name"] in ROW_WISE_STAGES
+    ]
+    data, report = pl.run_pipeline(data=data, stages=stages)
+    data.to_pickle(shard_path)
+
+    return shard_statistics(data), report
+
+
+def finish_country_shard(shard_path, pooled):
+    """Phase two: finish the preparation of one country with the pooled statistics.
+
+    Args:
+        shard_path (str or pathlib.Path): Path to the cleaned data of the country. The
+            prepared data is stored there as well.
+        pooled (dict): The merged statistics of all shards, see shard_statistics.
+
+    Returns:
+        report (pandas DataFrame): Wall time, peak RSS and cache use of every step.
+
+    """
+    data = pd.read_pickle(shard_path)
+
+    pooled_steps = {
+        "standardize_skills_and_prefs": _standardize_skills_and_prefs,
+        "get_some_skills_with_pca": _get_some_skills_with_pca,
+        "get_acquiescence_bias_corrected_skills": _get_acquiescence_corrected_skills,
+        "get_skills_based_on_laajaj_et_al": _get_skills_based_on_laajaj_et_al,
+    }
+    stages = [
+        {**stage, "func": functools.partial(pooled_steps[stage["name"]], pooled=pooled)}
+        if stage["name"] in pooled_steps
+        else stage
+        for stage in prd.preparation_stages()
+        if stage["name"] not in ROW_WISE_STAGES
+    ]
+    data, report = pl.run_pipeline(data=data, stages=stages)
+    data.to_pickle(shard_path)
+
+    return report
+
+
+def shard_statistics(data):
+    """Compute the mergeable statistics of a cleaned shard.
+
+    Args:
+        data (pandas DataFrame): The cleaned data of a shard.
+
+    Returns:
+        statistics (dict): Column moments (see column_moments) of the columns to be
+            standardized ("standardize"), of the acquiescence bias corrected skill
+            averages ("abcorr") and of the Laajaj et al. averages ("laajaj"), and the
+            moments of the raw skill item blocks ("pca", see
+            skill_factors.item_block_moments).
+
+    """
+    return {
+        "standardize": column_moments(data[prd._columns_to_standardize(data)]),
+        "pca": sf.item_block_moments(data, _raw_item_blocks()),
+        "abcorr": column_moments(prd._acquiescence_corrected_skill_means(data)),
+        "laajaj": column_moments(
+            pd.DataFrame(prd._laajaj_et_al_averages(data), index=data.index),
+        ),
+    }
+
+
+def merge_shard_statistics(left, right):
+    """Merge the statistics of two shards.
+
+    Args:
+        left (dict): Statistics, see shard_statistics.
+        right (dict): Statistics, see shard_statistics.
+
+    Returns:
+        (dict): The statistics of both shards together.
+
+    """
+    return {
+        "standardize": merge_column_moments(left["standardize"], right["standardize"]),
+        "pca": {
+            skill: sf.merge_moments(left["pca"][skill], right["pca"][skill])
+            for skill in left["pca"]
+        },
+        "abcorr": merge_column_moments(left["abcorr"], right["abcorr"]),
+        "laajaj": merge_column_moments(left["laajaj"], right["laajaj"]),
+    }
+
+
+def column_moments(data):
+    """Compute the number of observations, mean and M2 of every column.
+
+    Missing values are skipped. M2 is the sum of squared deviations from the mean.
+
+    Args:
+        data (pandas DataFrame): The columns.
+
+    Returns:
+        moments (dict): The column names ("names"), the numbers of non-missing values
+            ("nobs"), the means ("mean") and the M2 ("m2").
+
+    """
+    values = data.to_numpy(dtype=float, na_value=np.nan)
+    observed = ~np.isnan(values)
+    nobs = observed.sum(axis=0)
+    mean = np.divide(
+        np.nansum(values, axis=0),
+        nobs,
+        out=np.zeros(values.shape[1]),
+        where=nobs > 0,
+    )
+
+    return {
+        "names": list(data.columns),
+        "nobs": nobs,
+        "mean": mean,
+        "m2": np.nansum((values - mean) ** 2, axis=0),
+    }
+
+
+def merge_column_moments(left, right):
+    """Merge the column moments of two disjoint sets of observations (Chan et al.).
+
+    Args:
+        left (dict): Moments, see column_moments.
+        right (dict): Moments, see column_moments.
+
+    Returns:
+        (dict): The moments of the union of both sets.
+
+    """
+    if left["names"] != right["names"]:
+        raise ValueError("The moments belong to different columns.")
+
+    nobs = left["nobs"] + right["nobs"]
+    delta = right["mean"] - left["mean"]
+    share = np.divide(right["nobs"], nobs, out=np.zeros(len(nobs)), where=nobs > 0)
+
+    return {
+        "names": left["names"],
+        "nobs": nobs,
+        "mean": left["mean"] + delta * share,
+        "m2": left["m2"] + right["m2"] + delta**2 * left["nobs"] * share,
+    }
+
+
+def mean_and_std(moments):
+    """Get the means and standard deviations (ddof=1) from column moments.
+
+    Args:
+        moments (dict): Moments, see column_moments.
+
+    Returns:
+        mean (pandas Series): The means, indexed by the column names.
+        std (pandas Series): The standard deviations, indexed by the column names.
+
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(moments["m2"] / (moments["nobs"] - 1))
+
+    return (
+        pd.Series(moments["mean"], index=moments["names"]),
+        pd.Series(std, index=moments["names"]),
+    )
+
+
+def _standardize_skills_and_prefs(data, pooled):
+    """Standardize skills and preferences with the pooled statistics (in place).
+
+    Args:
+        data (pandas DataFrame): The data of a shard. It is modified in place.
+        pooled (dict): The merged statistics of all shards.
+
+    Returns:
+        None
+
+    """
+    mean, std = mean_and_std(pooled["standardize"])
+
+    for col in mean.index:
+        data[col + "_s"] = (data[col] - mean[col]) / std[col]
+
+
+def _get_some_skills_with_pca(data, pooled):
+    """Compute the principal components with the pooled statistics (in place).
+
+    The components are estimated on the standardized items. Their moments follow from
+    the moments of the raw items: the means are standardized and the cross products
+    are scaled by the standard deviations.
+
+    Args:
+        data (pandas DataFrame): The data of a shard. It is modified in place.
+        pooled (dict): The merged statistics of all shards.
+
+    Returns:
+        None
+
+    """
+    mean, std = mean_and_std(pooled["standardize"])
+    raw_item_blocks = _raw_item_blocks()
+
+    standardized_moments = {}
+    for skill, items in raw_item_blocks.items():
+        moments = pooled["pca"][skill]
+        item_mean, item_std = mean[items].to_numpy(), std[items].to_numpy()
+        standardized_moments[skill] = {
+            "nobs": moments["nobs"],
+            "mean": (moments["mean"] - item_mean) / item_std,
+            "comoment": moments["comoment"] / np.outer(item_std, item_std),
+        }
+
+    components = sf.components_from_moments(
+        moments=standardized_moments,
+        item_blocks=prd._skill_items_dicts_and_lists(which="skill_dict"),
+    )
+    scores = sf.transform_item_blocks(data=data, components=components)
+    for col in scores:
+        data[col] = scores[col]
+
+
+def _get_acquiescence_corrected_skills(data, pooled):
+    """Correct for acquiescence bias with the pooled statistics (in place).
+
+    Args:
+        data (pandas DataFrame): The data of a shard. It is modified in place.
+        pooled (dict): The merged statistics of all shards.
+
+    Returns:
+        None
+
+    """
+    mean, std = mean_and_std(pooled["abcorr"])
+    skill_means = prd._acquiescence_corrected_skill_means(data)
+
+    for skill in skill_means:
+        data[skill + "_av_s_abcorr"] = (skill_means[skill] - mean[skill]) / std[skill]
+
+
+def _get_skills_based_on_laajaj_et_al(data, pooled):
+    """Get skills based on Laajaj et al. (2019) with the pooled statistics (in place).
+
+    Args:
+        data (pandas DataFrame): The data of a shard. It is modified in place.
+        pooled (dict): The merged statistics of all shards.
+
+    Returns:
+        None
+
+    """
+    mean, std = mean_and_std(pooled["laajaj"])
+    averages = prd._laajaj_et_al_averages(data)
+
+    for col in averages:
+        data[col.replace("_av_l_", "_av_s_laajaj_")] = (
+            pd.Series(averages[col], index=data.index) - mean[col]
+        ) / std[col]
+
+
+def _raw_item_blocks():
+    """Get the (not standardized) items of every skill.
+
+    Returns:
+        (dict): Keys are the skills, values are lists of their items.
+
+    """
+    skill_dict = prd._skill_items_dicts_and_lists(which="skill_dict")
+
+    return {
+        skill: [item.removesuffix("_s") for item in items]
+        for skill, items in skill_dict.items()
+    }
@@ -0,0 +1,218 @@
+"""First principal components of the skill item blocks.
+
+Each skill (e.g. extraversion) is measured by a small block of items. Its factor is the
+first principal component of the items, estimated on the observations without missing
+items. Instead of fitting one PCA per skill, the moments (number of observations, means
+and centered cross products) of all item blocks are accumulated in one pass over the
+data. The loadings are the leading eigenvectors of the block covariance matrices.
+
+The moments of several chunks of data can be merged (Chan et al.), so the components
+can also be fitted on data which does not fit into memory: fit_item_blocks accepts any
+iterable of chunks, like IncrementalPCA.partial_fit, and transform_item_blocks projects
+one chunk at a time.
+
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def first_principal_components(data, item_blocks, chunks=None):
+    """Compute the first principal component of every item block.
+
+    The result is the same as that of sklearn's PCA(n_components=1).fit_transform on
+    the observations without missing items, with the sign normalized by
+    normalize_sign.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        item_blocks (dict): Keys are the skills, values are lists of their items.
+        chunks (iterable): Chunks of data (pandas DataFrames) to fit the components on.
+            If None, the components are fitted on data.
+
+    Returns:
+        scores (pandas DataFrame): The components, one column per skill. Missing if an
+            item of the skill is missing.
+
+    """
+    components = fit_item_blocks(
+        chunks=[data] if chunks is None else chunks,
+        item_blocks=item_blocks,
+    )
+
+    return transform_item_blocks(data=data, components=components)
+
+
+def fit_item_blocks(chunks, item_blocks):
+    """Estimate the means and loadings of the first components of all item blocks.
+
+    Args:
+        chunks (iterable): Chunks of data (pandas DataFrames). The chunks are visited
+            once, so a generator reading the data piece by piece can be passed.
+        item_blocks (dict): Keys are the skills, values are lists of their items.
+
+    Returns:
+        components (dict): Keys are the skills, values are dictionaries with the items
+            ("items"), the item means ("mean"), the loadings ("loadings") and the
+            number of complete observations ("nobs").
+
+    """
+    moments = {}
+
+    for chunk in chunks:
+        for skill, chunk_moments in item_block_moments(chunk, item_blocks).items():
+            moments[skill] = (
+                merge_moments(moments[skill], chunk_moments)
+                if skill in moments
+                else chunk_moments
+            )
+
+    return components_from_moments(moments=moments, item_blocks=item_blocks)
+
+
+def components_from_moments(moments, item_blocks):
+    """Get the means and loadings of the first components from the block moments.
+
+    Args:
+        moments (dict): Keys are the skills, values are moments, see
+            item_block_moments.
+        item_blocks (dict): Keys are the skills, values are lists of their items.
+
+    Returns:
+        components (dict): See fit_item_blocks.
+
+    """
+    components = {}
+    for skill, items in item_blocks.items():
+        # Leading eigenvector of the (scaled) covariance matrix.
+        loadings = np.linalg.eigh(moments[skill]["comoment"])[1][:, -1]
+        components[skill] = {
+            "items": list(items),
+            "mean": moments[skill]["mean"],
+            "loadings": normalize_sign(loadings),
+            "nobs": moments[skill]["nobs"],
+        }
+
+    return components
+
+
+def transform_item_blocks(data, components):
+    """Project the items of every block on its first component.
+
+    Args:
+        data (pandas DataFrame): The data set (or a chunk of it).
+        components (dict): See fit_item_blocks.
+
+    Returns:
+        scores (pandas DataFrame): Columns "{skill}_pca". Missing if an item of the
+            skill is missing.
+
+    """
+    values, position = _item_values(data, components)
+    scores = {}
+
+    for skill, component in components.items():
+        block = values[:, [position[item] for item in component["items"]]]
+        # Rows with a missing item get a missing score.
+        scores[skill + "_pca"] = (block - component["mean"]) @ component["loadings"]
+
+    return pd.DataFrame(scores, index=data.index)
+
+
+def item_block_moments(data, item_blocks):
+    """Compute the moments of all item blocks on their complete observations.
+
+    Args:
+        data (pandas DataFrame): The data set (or a chunk of it).
+        item_blocks (dict): Keys are the skills, values are lists of their items.
+
+    Returns:
+        moments (dict): Keys are the skills, values are dictionaries with the number of
+            complete observations ("nobs"), the item means ("mean") and the centered
+            cross products ("comoment").
+
+    """
+    values, position = _item_values(
+        data,
+        {skill: {"items": items} for skill, items in item_blocks.items()},
+    )
+    complete = ~np.isnan(values)
+    moments = {}
+
+    for skill, items in item_blocks.items():
+        columns = [position[item] for item in items]
+        block = values[complete[:, columns].all(axis=1)][:, columns]
+        mean = block.mean(axis=0) if len(block) > 0 else np.zeros(len(columns))
+        centered = block - mean
+        moments[skill] = {
+            "nobs": len(block),
+            "mean": mean,
+            "comoment": centered.T @ centered,
+        }
+
+    return moments
+
+
+def merge_moments(left, right):
+    """Merge the moments of two disjoint sets of observations.
+
+    Args:
+        left (dict): Moments, see item_block_moments.
+        right (dict): Moments, see item_block_moments.
+
+    Returns:
+        (dict): The moments of the union of both sets.
+
+    """
+    nobs = left["nobs"] + right["nobs"]
+    if nobs == 0:
+        return left
+
+    delta = right["mean"] - left["mean"]
+
+    return {
+        "nobs": nobs,
+        "mean": left["mean"] + delta * right["nobs"] / nobs,
+        "comoment": left["comoment"]
+        + right["comoment"]
+        + np.outer(delta, delta) * left["nobs"] * right["nobs"] / nobs,
+    }
+
+
+def normalize_sign(loadings):
+    """Fix the sign of a component s.t. its largest absolute loading is positive.
+
+    This is the convention of sklearn's PCA. In particular, the loadings are never all
+    negative.
+
+    Args:
+        loadings (numpy.ndarray): The loadings.
+
+    Returns:
+        (numpy.ndarray): The loadings with normalized sign.
+
+    """
+    return loadings * np.sign(loadings[np.argmax(np.abs(loadings))])
+
+
+def _item_values(data, components):
+    """Get all items of all blocks as one float array.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        components (dict): Keys are the skills, values are dictionaries with the items
+            ("items").
+
+    Returns:
+        values (numpy.ndarray): The items (n x number of distinct items).
+        position (dict): Keys are the items, values are their columns in values.
+
+    """
+    items = list(
+        dict.fromkeys(
+            item for component in components.values() for item in component["items"]
+        ),
+    )
+    values = data[items].to_numpy(dtype=float, na_value=np.nan)
+
+    return values, {item: i for i, item in enumerate(items)}
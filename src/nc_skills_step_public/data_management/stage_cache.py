@@ -0,0 +1,265 @@
+"""Content-addressed cache for the stages of a pipeline (see pipeline.py).
+
+The key of a stage is a hash of the data in the columns it reads (including the
+index), of its source code and of the source code it calls within this package, and of
+the numpy and pandas versions. The columns a stage writes are stored as one Parquet file
+per key. If a stage runs again with the same key, its columns are loaded instead of
+recomputed. When the cache grows beyond its maximum size, the least recently used
+entries are deleted.
+
+"""
+
+import hashlib
+import inspect
+import os
+import re
+import types
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+PACKAGE = "nc_skills_step_public"
+
+
+def stage_key(data, stage):
+    """Compute the cache key of a stage for the current data.
+
+    Args:
+        data (pandas DataFrame): The data set before the stage.
+        stage (dict): The stage, see pipeline.stage.
+
+    Returns:
+        (string): The key (hexadecimal).
+
+    """
+    columns = read_columns(data, stage)
+    key = hashlib.sha256()
+
+    for part in [
+        stage["name"],
+        source_fingerprint(stage["func"]),
+        np.__version__,
+        pd.__version__,
+        repr([(col, str(data[col].dtype)) for col in columns]),
+    ]:
+        key.update(part.encode())
+    key.update(
+        pd.util.hash_pandas_object(data[columns], index=True).to_numpy().tobytes(),
+    )
+
+    return key.hexdigest()
+
+
+def read_columns(data, stage):
+    """Get the columns of the data which a stage reads.
+
+    Args:
+        data (pandas DataFrame): The data set.
+        stage (dict): The stage, see pipeline.stage.
+
+    Returns:
+        (list): The column names (in the order of the data).
+
+    """
+    return [col for col in data if _matches(col, stage["reads"])]
+
+
+def written_columns(data, stage, before):
+    """Get the columns a stage has added or changed.
+
+    These are the columns which match the declared writes and which are either new or
+    read by the stage (a stage only changes columns it reads).
+
+    Args:
+        data (pandas DataFrame): The data set after the stage.
+        stage (dict): The stage, see pipeline.stage.
+        before (set): The column names before the stage.
+
+    Returns:
+        (list): The column names (in the order of the data).
+
+    """
+    return [
+        col
+        for col in data
+        if _matches(col, stage["writes"])
+        and (col not in before or _matches(col, stage["reads"]))
+    ]
+
+
+def load_stage(cache_dir, key):
+    """Load the stored columns of a stage.
+
+    The entry is marked as recently used.
+
+    Args:
+        cache_dir (str or pathlib.Path): The cache directory.
+        key (string): The key of the stage.
+
+    Returns:
+        (pandas DataFrame): The stored columns. None if there is no entry.
+
+    """
+    path = Path(cache_dir) / f"{key}.parquet"
+    if not path.exists():
+        return None
+
+    os.utime(path)
+    stored = pd.read_parquet(path, engine="pyarrow")
+
+    # Object columns (e.g. labels with missing values) may be read as strings.
+    object_cols = [
+        col["name"]
+        for col in pq.read_schema(path).pandas_metadata["columns"]
+        if col["numpy_type"] == "object" and col["name"] in stored
+    ]
+
+    return stored.astype(dict.fromkeys(object_cols, object))
+
+
+def store_stage(cache_dir, key, columns, max_bytes):
+    """Store the columns of a stage and evict old entries if the cache is too large.
+
+    Args:
+        cache_dir (str or pathlib.Path): The cache directory.
+        key (string): The key of the stage.
+        columns (pandas DataFrame): The columns written by the stage.
+        max_bytes (int): Maximum size of the cache in bytes.
+
+    Returns:
+        None
+
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # Write to a temporary file first, so that an interrupted write leaves no entry.
+    tmp_path = cache_dir / f"{key}.parquet.tmp"
+    columns.to_parquet(tmp_path, engine="pyarrow", index=True)
+    tmp_path.replace(cache_dir / f"{key}.parquet")
+
+    evict(cache_dir=cache_dir, max_bytes=max_bytes)
+
+
+def evict(cache_dir, max_bytes):
+    """Delete the least recently used entries until the cache fits into max_bytes.
+
+    Args:
+        cache_dir (str or pathlib.Path): The cache directory.
+        max_bytes (int): Maximum size of the cache in bytes.
+
+    Returns:
+        None
+
+    """
+    entries = sorted(
+        Path(cache_dir).glob("*.parquet"),
+        key=lambda path: path.stat().st_mtime,
+    )
+    total = sum(path.stat().st_size for path in entries)
+
+    for path in entries:
+        if total <= max_bytes:
+            break
+        total -= path.stat().st_size
+        path.unlink()
+
+
+def source_fingerprint(func):
+    """Collect the source code of a function and of the package code it calls.
+
+    Functions of this package which are called by func (directly or indirectly) are
+    included with their source. Modules of this package which func uses (e.g. sf in
+    sf.first_principal_components) are included with their whole source.
+
+    Args:
+        func (callable): The function.
+
+    Returns:
+        (string): The concatenated source code.
+
+    """
+    sources = {}
+    _collect_sources(func, sources)
+
+    return "\n".join(sources[name] for name in sorted(sources))
+
+
+def _collect_sources(obj, sources):
+    """Add the source of obj and of the package objects it refers to.
+
+    Args:
+        obj (function or module): The object.
+        sources (dict): Keys are qualified names, values are source code. Modified in
+            place.
+
+    Returns:
+        None
+
+    """
+    if isinstance(obj, types.ModuleType):
+        if obj.__name__ not in sources:
+            sources[obj.__name__] = inspect.getsource(obj)
+        return
+
+    name = f"{obj.__module__}.{obj.__qualname__}"
+    if name in sources:
+        return
+    sources[name] = inspect.getsource(obj)
+
+    for referenced in _referenced_names(obj.__code__):
+        value = obj.__globals__.get(referenced)
+        if _in_package(value):
+            _collect_sources(value, sources)
+
+
+def _referenced_names(code):
+    """Get the global names used by a code object and its nested code objects.
+
+    Args:
+        code (code): The code object.
+
+    Returns:
+        (set): The names.
+
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _referenced_names(const)
+
+    return names
+
+
+def _in_package(value):
+    """Check whether a value is a function or module of this package.
+
+    Args:
+        value: Any object.
+
+    Returns:
+        (bool)
+
+    """
+    if isinstance(value, types.ModuleType):
+        return value.__name__.startswith(PACKAGE)
+    if isinstance(value, types.FunctionType):
+        return value.__module__.startswith(PACKAGE)
+
+    return False
+
+
+def _matches(col, patterns):
+    """Check whether a column name fully matches one of the patterns.
+
+    Args:
+        col (string): The column name.
+        patterns (list): Regular expressions.
+
+    Returns:
+        (bool)
+
+    """
+    return any(re.fullmatch(pattern, col) for pattern in patterns)
@@ -4,46 +4,100 @@ Prepare this dataset.
 
 """
 
+import os
+
 import pandas as pd
 import pytask
 
-from nc_skills_step_public.config import BLD
+from nc_skills_step_public import global_info as gl
+from nc_skills_step_public.config import BLD, SRC
 from nc_skills_step_public.data_management import prepare_STEP_data as prd
+from nc_skills_step_public.data_management import sharded_preparation as shp
+
+countries = [
+    "Armenia",
+    "Bolivia",
+    "Colombia",
+    "Georgia",
+    "Ghana",
+    "Kenya",
+    "Laos",
+    "Macedonia",
+    "Sri_Lanka",
+    "Ukraine",
+    "Vietnam",
+    "Yunnan",
+]
+
+if gl.prepare_STEP_data_in_shards:
+    shards = {
+        f"{country}_shard": BLD / "python" / "data" / "shards" / f"{country}.pkl"
+        for country in countries
+    }
+else:
+    shards = {}
 
 
 @pytask.mark.depends_on(
     {
-        "scripts": ["prepare_STEP_data.py"],
-        "Armenia": BLD / "python" / "data" / "Armenia_small.pkl",
-        "Bolivia": BLD / "python" / "data" / "Bolivia_small.pkl",
-        "Colombia": BLD / "python" / "data" / "Colombia_small.pkl",
-        "Georgia": BLD / "python" / "data" / "Georgia_small.pkl",
-        "Ghana": BLD / "python" / "data" / "Ghana_small.pkl",
-        "Kenya": BLD / "python" / "data" / "Kenya_small.pkl",
-        "Laos": BLD / "python" / "data" / "Laos_small.pkl",
-        "Macedonia": BLD / "python" / "data" / "Macedonia_small.pkl",
-        "Sri_Lanka": BLD / "python" / "data" / "Sri_Lanka_small.pkl",
-        "Ukraine": BLD / "python" / "data" / "Ukraine_small.pkl",
-        "Vietnam": BLD / "python" / "data" / "Vietnam_small.pkl",
-        "Yunnan": BLD / "python" / "data" / "Yunnan_small.pkl",
+        "scripts": [
+            "prepare_STEP_data.py",
+            "pipeline.py",
+            "sharded_preparation.py",
+            "skill_factors.py",
+            "stage_cache.py",
+        ],
+        "selected_variables": SRC / "data_management" / "selected_variables.xlsx",
+        **{
+            country: BLD / "python" / "data" / f"{country}_small.pkl"
+            for country in countries
+        },
+    },
+)
+@pytask.mark.produces(
+    {
+        "data": BLD / "python" / "data" / "STEP_data_clean.pkl",
+        "report": BLD / "python" / "data" / "STEP_data_preparation_report.csv",
+        **shards,
     },
 )
-@pytask.mark.produces(BLD / "python" / "data" / "STEP_data_clean.pkl")
 def task_merge_and_prepare_countries(depends_on, produces):
-    """Merge, clean and prepare the data."""
-    datasets = [
-        pd.read_pickle(depends_on[country]) for country in list(depends_on.keys())[1:13]
-    ]
-    data_appended = pd.concat(datasets, ignore_index=True)
-
-    data_renamed = prd.rename_variables(data_appended)
-    data_cleaned = prd.clean_data(data_renamed)
-    data_new_columns = prd.add_data_columns(data_cleaned)
-    data_har_items = prd.harmonize_skill_items(data_new_columns)
-    data_w_std = prd.standardize_skills_and_prefs(data_har_items)
-    data_w_pca = prd.get_some_skills_with_pca(data_w_std)
-    data_ab_corr = prd.get_acquiescence_bias_corrected_skills(data_w_pca)
-    data_laajaj = prd.get_skills_based_on_laajaj_et_al(data_ab_corr)
-    data_weights = prd.create_skill_weights(data_laajaj)
-
-    data_weights.to_pickle(produces)
+    """Merge, clean and prepare the data.
+
+    If gl.prepare_STEP_data_in_shards, the countries are prepared in parallel
+    processes and only the prepared shards are concatenated (see
+    sharded_preparation.py). Otherwise, the preparation steps run in place on the
+    merged data, and steps whose input columns and code did not change are loaded from
+    the stage cache. Wall time, peak RSS and cache use of every step are stored in a
+    report.
+
+    """
+    if gl.prepare_STEP_data_in_shards:
+        selected_variables = pd.read_excel(depends_on["selected_variables"])
+
+        report = shp.prepare_countries_in_shards(
+            paths={country: depends_on[country] for country in countries},
+            columns=shp.pooled_columns(selected_variables, countries),
+            shard_paths={
+                country: produces[f"{country}_shard"] for country in countries
+            },
+            n_workers=min(len(countries), os.cpu_count()),
+        )
+        data_prepared = pd.concat(
+            [pd.read_pickle(produces[f"{country}_shard"]) for country in countries],
+            ignore_index=True,
+        )
+
+    else:
+        datasets = [pd.read_pickle(depends_on[country]) for country in countries]
+        data_appended = pd.concat(datasets, ignore_index=True)
+        del datasets
+
+        data_prepared, report = prd.prepare_STEP_data(
+            data_appended,
+            cache_dir=BLD / "python" / "cache" / "prepare_STEP_data",
+            max_cache_bytes=gl.stage_cache_max_bytes,
+        )
+
+    data_prepared.to_pickle(produces["data"])
+    report.to_csv(produces["report"])
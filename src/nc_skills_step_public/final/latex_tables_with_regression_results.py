@@ -173,7 +173,10 @@ def create_tabular_tex_code_reg_results_show_regressors(
     tabular.add_row(
         (
             "Observations",
-            *[int(results[next(iter(results))][i].nobs) for i in range(M)],
+            *[
+                int(_result_value(results[next(iter(results))][i], "nobs"))
+                for i in range(M)
+            ],
         ),
     )
     tabular.add_hline()
@@ -268,7 +271,10 @@ def create_tabular_tex_code_with_reg_results(
     tabular.add_row(
         (
             "Observations",
-            *[int(results[next(iter(results))][i].nobs) for i in range(M)],
+            *[
+                int(_result_value(results[next(iter(results))][i], "nobs"))
+                for i in range(M)
+            ],
         ),
     )
     tabular.add_hline()
@@ -338,7 +344,7 @@ def latex_tabular_multiple_outcomes(
         tabular.add_row(
             (
                 pl.NoEscape(r"\textit{Observations}"),
-                *[int(results[dep_var][i].nobs) for i in range(M)],
+                *[int(_result_value(results[dep_var][i], "nobs")) for i in range(M)],
             ),
         )
         tabular.add_hline()
@@ -397,7 +403,7 @@ def create_placebo_test_table(
                 dep_var_names[dep_var],
                 *coef[dep_var],
                 *se[dep_var],
-                f"{results[dep_var][0].nobs:.0f}",
+                f"{_result_value(results[dep_var][0], 'nobs'):.0f}",
             ),
         )
 
@@ -477,7 +483,7 @@ def create_table_with_optimal_bandwidth(
                     *coef[dep_var],
                     *se[dep_var],
                     f"{h_df.loc[dep_var, 'h (left)']:.0f}",
-                    f"{results[dep_var][0].nobs:.0f}",
+                    f"{_result_value(results[dep_var][0], 'nobs'):.0f}",
                 ),
             )
     elif with_estimates is False:
@@ -486,7 +492,7 @@ def create_table_with_optimal_bandwidth(
                 (
                     dep_var_names[dep_var],
                     f"{h_df.loc[dep_var, 'h (left)']:.0f}",
-                    f"{results[dep_var][0].nobs:.0f}",
+                    f"{_result_value(results[dep_var][0], 'nobs'):.0f}",
                 ),
             )
 
@@ -642,6 +648,55 @@ def create_table_with_list_of_correlations(file, corr_dict):
     tabular.generate_tex(file)
 
 
+def create_table_with_randomization_pvalues(file, results, dep_var_names):
+    """Create a LaTeX table with randomization and bootstrap p-values.
+
+    Args:
+        file (string): Path to file.
+        results (dict): Keys are the dependent variables, values are dictionaries with
+            the keys "cutoff" and "cohort", each containing the results of
+            randomization_inference.randomization_inference for this variable, and
+            "wild_bootstrap", containing the results of
+            wild_cluster_bootstrap.wild_cluster_bootstrap.
+        dep_var_names (dict): Keys are dependent variables, values are the nice labels.
+
+    Returns:
+        .tex file in specified path.
+
+    """
+    # Begin tabular.
+    tabular = pl.Tabular("l" + "c" * 4)
+    tabular.add_hline()
+    tabular.add_hline()
+    tabular.add_row(
+        (
+            "",
+            "Treated",
+            "p-value (pivotal cohort)",
+            "p-value (cohort permutation)",
+            "p-value (wild bootstrap)",
+        ),
+    )
+    tabular.add_hline()
+    tabular.add_row(("Dependent variable", *[""] * 4))
+
+    for dep_var in results:
+        tabular.add_row(
+            (
+                dep_var_names[dep_var],
+                f"{results[dep_var]['cutoff']['coefficient']:.2f}",
+                f"{results[dep_var]['cutoff']['pvalue']:.3f}",
+                f"{results[dep_var]['cohort']['pvalue']:.3f}",
+                f"{results[dep_var]['wild_bootstrap']['pvalue']:.3f}",
+            ),
+        )
+
+    tabular.add_hline()
+    tabular.add_hline()
+
+    tabular.generate_tex(file)
+
+
 def _format_coef_se_for_table(results, regressor):
     """Format OLS coefficients and standard errors for one particular regressor.
 
@@ -669,14 +724,36 @@ def _format_coef_se_for_table(results, regressor):
         for dep_var in results:
             # Add stars to coefficients.
             coef[dep_var][i] = "{:.2f}".format(
-                results[dep_var][i].params[regressor],
-            ) + _star_function(results[dep_var][i].pvalues[regressor])
+                _result_value(results[dep_var][i], "params")[regressor],
+            ) + _star_function(
+                _result_value(results[dep_var][i], "pvalues")[regressor],
+            )
             # Add brackets to standard errors.
-            se[dep_var][i] = "(" + f"{results[dep_var][i].bse[regressor]:.2f}" + ")"
+            bse = _result_value(results[dep_var][i], "bse")[regressor]
+            se[dep_var][i] = "(" + f"{bse:.2f}" + ")"
 
     return coef, se, M
 
 
+def _result_value(result, name):
+    """Get params, bse, pvalues or nobs of a regression result.
+
+    Args:
+        result (OLSResults, RegressionRecord or dict): Results of statsmodels, a
+            compact record of them (see regression_record.py), or a dictionary with the
+            same keys (see analysis_RDD_direct.py and window_cube.py).
+        name (string): "params", "bse", "pvalues" or "nobs".
+
+    Returns:
+        The value.
+
+    """
+    if isinstance(result, dict):
+        return result[name]
+
+    return getattr(result, name)
+
+
 def _star_function(p):
     """Create significance stars.
 
@@ -3,6 +3,9 @@
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from scipy import stats
+
+from nc_skills_step_public.analysis import regression_record as rec
 
 
 def plot_years_of_education(data, staggered, not_staggered):
@@ -287,13 +290,22 @@ def plot_outcomes(data, outcome, reg_results, nice_variable_names, months=False)
     return fig
 
 
-def coeff_plot_two_xaxis(results_list, nice_variable_names, group_mapping):
+def coeff_plot_two_xaxis(
+    results_list,
+    nice_variable_names,
+    group_mapping,
+    y_vars=None,
+):
     """Plot point estimates and confidence intervals of OLSResults.
 
     Args:
-        results_list (list): List of OLSResults.
+        results_list (list): List of OLSResults, RegressionRecords or dictionaries with
+            the regression results (see analysis_RDD_direct.py and window_cube.py).
         nice_variable_names (dict): Dictionary with nice variable names.
         group_mapping (dict): Dictionary mapping dependent variables to groups ("Personality and behavior" or "Preferences").
+        y_vars (list): The dependent variables of the results. Required for
+            dictionaries, for OLSResults and RegressionRecords they are taken from the
+            results.
 
     Returns:
         fig (plotly.graph_objects.Figure): The figure.
@@ -305,12 +317,25 @@ def coeff_plot_two_xaxis(results_list, nice_variable_names, group_mapping):
 
     # Extract coefficient estimates, dependent variables,
     # and "errors" based on confidence intervals.
-    for result in results_list:
-        coeff_sizes.append(result.params["treated"])
-        dependent_vars.append(result.model.endog_names)
-        conf_intervals_errors.append(
-            result.conf_int().loc["treated", 1] - result.params["treated"],
-        )
+    for i, result in enumerate(results_list):
+        if isinstance(result, dict):
+            # 95% confidence interval based on the normal distribution, as conf_int
+            # with clustered standard errors.
+            coeff_sizes.append(result["params"]["treated"])
+            dependent_vars.append(y_vars[i])
+            conf_intervals_errors.append(
+                stats.norm.ppf(0.975) * result["bse"]["treated"],
+            )
+        else:
+            coeff_sizes.append(result.params["treated"])
+            dependent_vars.append(
+                result.y_var
+                if isinstance(result, rec.RegressionRecord)
+                else result.model.endog_names,
+            )
+            conf_intervals_errors.append(
+                result.conf_int().loc["treated", 1] - result.params["treated"],
+            )
 
     # Replace dependent_vars with nice names.
     nice_names = [nice_variable_names[var] for var in dependent_vars]
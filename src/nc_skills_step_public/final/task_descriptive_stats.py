@@ -1,12 +1,12 @@
 """Descriptive statistics."""
 
-import pandas as pd
 import pytask
 import statsmodels.formula.api as smf
 
 from nc_skills_step_public import global_info as gl
 from nc_skills_step_public.analysis import select_sample_for_analysis as sel
 from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.data_management import columnar_store as store
 from nc_skills_step_public.final import latex_tables_with_regression_results as tab
 
 
@@ -15,7 +15,8 @@ from nc_skills_step_public.final import latex_tables_with_regression_results as
         "scripts": ["latex_tables_with_regression_results.py"],
         "global_info": SRC / "global_info.py",
         "select_sample": SRC / "analysis" / "select_sample_for_analysis.py",
-        "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+        "columnar_store": SRC / "data_management" / "columnar_store.py",
+        "data": BLD / "python" / "data" / "step_reforms_final.parquet",
     },
 )
 @pytask.mark.produces(
@@ -30,7 +31,7 @@ from nc_skills_step_public.final import latex_tables_with_regression_results as
 )
 def task_descriptive_statistics(depends_on, produces):
     """TeX tabular code with descriptive statistics."""
-    data = pd.read_pickle(depends_on["data"])
+    data = store.read_analysis_data(depends_on["data"])
 
     variables_to_check = {
         "female": "Female",
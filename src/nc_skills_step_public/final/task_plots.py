@@ -1,12 +1,12 @@
 """Plots."""
 
-import pandas as pd
 import pytask
 
 from nc_skills_step_public import global_info as gl
 from nc_skills_step_public.analysis import analysis_other_regressions as reg
 from nc_skills_step_public.analysis import select_sample_for_analysis as sel
 from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.data_management import columnar_store as store
 from nc_skills_step_public.final import plots as pl
 
 
@@ -15,13 +15,14 @@ from nc_skills_step_public.final import plots as pl
         "scripts": ["plots.py"],
         "global_info": SRC / "global_info.py",
         "select_sample": SRC / "analysis" / "select_sample_for_analysis.py",
-        "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+        "columnar_store": SRC / "data_management" / "columnar_store.py",
+        "data": BLD / "python" / "data" / "step_reforms_final.parquet",
     },
 )
 @pytask.mark.produces(BLD / "python" / "figures" / "RDD_plot.png")
 def task_plot_years_of_education(depends_on, produces):
     """Plot years of education around the reforms."""
-    data = pd.read_pickle(depends_on["data"])
+    data = store.read_analysis_data(depends_on["data"])
 
     data_subset = sel.select_sample_for_analysis(
         data=data,
@@ -53,13 +54,14 @@ for y_var in gl.dependent_variables:
             "global_info": SRC / "global_info.py",
             "select_sample": SRC / "analysis" / "select_sample_for_analysis.py",
             "reg": SRC / "analysis" / "analysis_RDD.py",
-            "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+            "columnar_store": SRC / "data_management" / "columnar_store.py",
+            "data": BLD / "python" / "data" / "step_reforms_final.parquet",
         },
     )
     @pytask.mark.task(id=y_var, kwargs=kwargs)
     def task_plot(depends_on, y_var, produces):
         """Plot outcome around the cutoffs."""
-        data = pd.read_pickle(depends_on["data"])
+        data = store.read_analysis_data(depends_on["data"])
 
         # Birth years on x-axis.
         data_subset = sel.select_sample_for_analysis(
@@ -113,7 +115,8 @@ for y_var in gl.dependent_variables:
         "scripts": ["plots.py"],
         "global_info": SRC / "global_info.py",
         "select_sample": SRC / "analysis" / "select_sample_for_analysis.py",
-        "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+        "columnar_store": SRC / "data_management" / "columnar_store.py",
+        "data": BLD / "python" / "data" / "step_reforms_final.parquet",
     },
 )
 @pytask.mark.produces(
@@ -124,7 +127,7 @@ for y_var in gl.dependent_variables:
 )
 def task_plot_occupations(depends_on, produces):
     """Histograms with occupations."""
-    data = pd.read_pickle(depends_on["data"])
+    data = store.read_analysis_data(depends_on["data"])
 
     data_subset = sel.select_sample_for_analysis(
         data=data,
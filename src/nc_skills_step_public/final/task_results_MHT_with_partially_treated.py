@@ -4,20 +4,29 @@ import pandas as pd
 import pytask
 
 from nc_skills_step_public import global_info as gl
-from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.analysis import results_warehouse as wh
+from nc_skills_step_public.config import BLD, RESULTS_WAREHOUSE, SRC
 from nc_skills_step_public.final import latex_tables_with_regression_results as tab
 
+GROUPS = ["ncogn_skills", "preferences_binary"]
+
 
 @pytask.mark.depends_on(
     {
         "scripts": ["latex_tables_with_regression_results.py"],
         "global_info": SRC / "global_info.py",
-        "pvalues_combined": BLD
-        / "python"
-        / "data"
-        / "pvalues"
-        / "common_trend"
-        / "pvalues_combined.xlsx",
+        "results_warehouse": SRC / "analysis" / "results_warehouse.py",
+        # Markers of the rows written to the warehouse by the main results tables.
+        **{
+            group: BLD
+            / "python"
+            / "results"
+            / "with_partially_treated"
+            / "common_trend"
+            / f"results_with_partially_treated_{group}.json"
+            for group in GROUPS
+        },
+        # Computed by Stata from the p-values of the main results (in this order).
         "qvalues_combined": BLD
         / "python"
         / "data"
@@ -31,12 +40,6 @@ from nc_skills_step_public.final import latex_tables_with_regression_results as
 )
 def task_latex_p_and_qvalues(depends_on, produces):
     """LaTeX tabular with coefficients, p- and q-values."""
-    results_df = pd.read_excel(depends_on["pvalues_combined"])
-    qvalues = pd.read_excel(depends_on["qvalues_combined"], header=None)
-
-    results_df["adj_pvalues"] = qvalues
-    results_df = results_df.set_index("dep_vars")
-
     column_headers = [
         "lin",
         "quad",
@@ -46,16 +49,27 @@ def task_latex_p_and_qvalues(depends_on, produces):
         "quad",
         "cub",
     ]
-    dep_vars = (
-        gl.groups_of_dependent_variables["ncogn_skills"]
-        + gl.groups_of_dependent_variables["preferences_binary"]
-    )
+    dep_vars = [
+        y_var for group in GROUPS for y_var in gl.groups_of_dependent_variables[group]
+    ]
     dep_var_names = {dep_var: gl.nice_variable_names[dep_var] for dep_var in dep_vars}
 
+    results_df = wh.main_results_estimates(
+        RESULTS_WAREHOUSE,
+        y_vars=dep_vars,
+        columns=gl.main_table_columns,
+        trend="common_trend",
+        fingerprint=wh.read_fingerprints([depends_on[group] for group in GROUPS]),
+    )
+    qvalues = pd.read_excel(depends_on["qvalues_combined"], header=None)
+
+    results_df["adj_pvalues"] = qvalues
+    results_df = results_df.set_index("dep_vars")
+
     tab.create_tex_table_p_and_MHT_adjusted_pvalues(
         file=str(produces).replace(".tex", ""),
         results_df=results_df,
         column_headers=column_headers,
         dep_var_names=dep_var_names,
         version=4,
-    )
\ No newline at end of file
+    )
@@ -5,13 +5,13 @@ measures inspired by Laajaj et al. (2019).
 
 """
 
-import pandas as pd
 import pytask
 
 from nc_skills_step_public import global_info as gl
 from nc_skills_step_public.analysis import analysis_RDD as reg
 from nc_skills_step_public.analysis import select_sample_for_analysis as sel
 from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.data_management import columnar_store as store
 from nc_skills_step_public.final import latex_tables_with_regression_results as tab
 
 for skills_measure in "laajaj_drop", "laajaj_replace":
@@ -43,9 +43,11 @@ for skills_measure in "laajaj_drop", "laajaj_replace":
         {
             "scripts": ["latex_tables_with_regression_results.py"],
             "reg_functions": SRC / "analysis" / "analysis_RDD.py",
+            "regression_record": SRC / "analysis" / "regression_record.py",
             "select_sample": SRC / "analysis" / "select_sample_for_analysis.py",
             "global_info": SRC / "global_info.py",
-            "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+            "columnar_store": SRC / "data_management" / "columnar_store.py",
+            "data": BLD / "python" / "data" / "step_reforms_final.parquet",
         },
     )
     @pytask.mark.task(id=skills_measure, kwargs=kwargs)
@@ -77,7 +79,7 @@ for skills_measure in "laajaj_drop", "laajaj_replace":
             not in ["grit_av_s_abcorr", "decision_av_s_abcorr", "hostile_av_s_abcorr"]
         }
 
-        data = pd.read_pickle(depends_on["data"])
+        data = store.read_analysis_data(depends_on["data"])
 
         # 3 years
         reg_data_3y = sel.select_sample_for_analysis(
@@ -108,6 +110,7 @@ for skills_measure in "laajaj_drop", "laajaj_replace":
                 reform_type_dummy=False,
                 partially_treated=True,
                 partially_treated_trend=False,
+                compact=True,
             )
             results_3quad = reg.quadratic_flexible_trends(
                 data=reg_data_3y,
@@ -115,6 +118,7 @@ for skills_measure in "laajaj_drop", "laajaj_replace":
                 reform_type_dummy=False,
                 partially_treated=True,
                 partially_treated_trend=False,
+                compact=True,
             )
             results_5lin = reg.linear_flexible_trends(
                 data=reg_data_5y,
@@ -122,6 +126,7 @@ for skills_measure in "laajaj_drop", "laajaj_replace":
                 reform_type_dummy=False,
                 partially_treated=True,
                 partially_treated_trend=False,
+                compact=True,
             )
             results_5quad = reg.quadratic_flexible_trends(
                 data=reg_data_5y,
@@ -129,6 +134,7 @@ for skills_measure in "laajaj_drop", "laajaj_replace":
                 reform_type_dummy=False,
                 partially_treated=True,
                 partially_treated_trend=False,
+                compact=True,
             )
             results_10lin = reg.linear_flexible_trends(
                 data=reg_data_10y,
@@ -136,6 +142,7 @@ for skills_measure in "laajaj_drop", "laajaj_replace":
                 reform_type_dummy=False,
                 partially_treated=True,
                 partially_treated_trend=False,
+                compact=True,
             )
             results_10quad = reg.quadratic_flexible_trends(
                 data=reg_data_10y,
@@ -143,10 +150,12 @@ for skills_measure in "laajaj_drop", "laajaj_replace":
                 reform_type_dummy=False,
                 partially_treated=True,
                 partially_treated_trend=False,
+                compact=True,
             )
             results_10cub = reg.cubic_flexible_trends(
                 data=reg_data_10y,
                 y_var=y_var,
+                compact=True,
             )
 
             results_dict[y_var] = [
@@ -194,9 +203,11 @@ for skills_measure in "laajaj_drop", "laajaj_replace":
     {
         "scripts": ["latex_tables_with_regression_results.py"],
         "reg_functions": SRC / "analysis" / "analysis_RDD.py",
+        "regression_record": SRC / "analysis" / "regression_record.py",
         "select_sample": SRC / "analysis" / "select_sample_for_analysis.py",
         "global_info": SRC / "global_info.py",
-        "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+        "columnar_store": SRC / "data_management" / "columnar_store.py",
+        "data": BLD / "python" / "data" / "step_reforms_final.parquet",
     },
 )
 @pytask.mark.produces(
@@ -233,7 +244,7 @@ def task_latex_results_abcorr_weighted(depends_on, produces):
         skill: skill.replace("av_s_abcorr", "weight") for skill in dep_vars
     }
 
-    data = pd.read_pickle(depends_on["data"])
+    data = store.read_analysis_data(depends_on["data"])
 
     # 3 years
     reg_data_3y = sel.select_sample_for_analysis(
@@ -265,6 +276,7 @@ def task_latex_results_abcorr_weighted(depends_on, produces):
             partially_treated=True,
             partially_treated_trend=False,
             weights=dep_var_weights[y_var],
+            compact=True,
         )
         results_3flex = reg.linear_flexible_trends(
             data=reg_data_3y,
@@ -273,6 +285,7 @@ def task_latex_results_abcorr_weighted(depends_on, produces):
             partially_treated=True,
             partially_treated_trend=False,
             weights=dep_var_weights[y_var],
+            compact=True,
         )
         results_5inf = reg.linear_inflexible_trends(
             data=reg_data_5y,
@@ -281,6 +294,7 @@ def task_latex_results_abcorr_weighted(depends_on, produces):
             partially_treated=True,
             partially_treated_trend=False,
             weights=dep_var_weights[y_var],
+            compact=True,
         )
         results_5flex = reg.linear_flexible_trends(
             data=reg_data_5y,
@@ -289,6 +303,7 @@ def task_latex_results_abcorr_weighted(depends_on, produces):
             partially_treated=True,
             partially_treated_trend=False,
             weights=dep_var_weights[y_var],
+            compact=True,
         )
         results_10inf = reg.linear_inflexible_trends(
             data=reg_data_10y,
@@ -297,6 +312,7 @@ def task_latex_results_abcorr_weighted(depends_on, produces):
             partially_treated=True,
             partially_treated_trend=False,
             weights=dep_var_weights[y_var],
+            compact=True,
         )
         results_10flex = reg.linear_flexible_trends(
             data=reg_data_10y,
@@ -305,6 +321,7 @@ def task_latex_results_abcorr_weighted(depends_on, produces):
             partially_treated=True,
             partially_treated_trend=False,
             weights=dep_var_weights[y_var],
+            compact=True,
         )
         results_10quad = reg.quadratic_flexible_trends(
             data=reg_data_10y,
@@ -313,6 +330,7 @@ def task_latex_results_abcorr_weighted(depends_on, produces):
             partially_treated=True,
             partially_treated_trend=False,
             weights=dep_var_weights[y_var],
+            compact=True,
         )
 
         results_dict[y_var] = [
@@ -4,13 +4,13 @@ Partially treated individuals are included.
 
 """
 
-import pandas as pd
 import pytask
 
 from nc_skills_step_public import global_info as gl
 from nc_skills_step_public.analysis import analysis_RDD as reg
 from nc_skills_step_public.analysis import select_sample_for_analysis as sel
 from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.data_management import columnar_store as store
 from nc_skills_step_public.final import latex_tables_with_regression_results as tab
 
 
@@ -18,9 +18,11 @@ from nc_skills_step_public.final import latex_tables_with_regression_results as
     {
         "scripts": ["latex_tables_with_regression_results.py"],
         "reg_functions": SRC / "analysis" / "analysis_RDD.py",
+        "regression_record": SRC / "analysis" / "regression_record.py",
         "select_sample": SRC / "analysis" / "select_sample_for_analysis.py",
         "global_info": SRC / "global_info.py",
-        "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+        "columnar_store": SRC / "data_management" / "columnar_store.py",
+        "data": BLD / "python" / "data" / "step_reforms_final.parquet",
     },
 )
 @pytask.mark.produces(
@@ -37,7 +39,7 @@ def task_results_lm_outcomes_one_table(depends_on, produces):
     results_dict = {key: None for key in dep_vars}
     dep_var_names = {key: gl.nice_variable_names[key] for key in dep_vars}
 
-    data = pd.read_pickle(depends_on["data"])
+    data = store.read_analysis_data(depends_on["data"])
 
     for y_var in dep_vars:
         # 3 years
@@ -68,6 +70,7 @@ def task_results_lm_outcomes_one_table(depends_on, produces):
             reform_type_dummy=False,
             partially_treated=True,
             partially_treated_trend=False,
+            compact=True,
         )
         results_3quad = reg.quadratic_flexible_trends(
             data=reg_data_3y,
@@ -75,6 +78,7 @@ def task_results_lm_outcomes_one_table(depends_on, produces):
             reform_type_dummy=False,
             partially_treated=True,
             partially_treated_trend=False,
+            compact=True,
         )
         results_5lin = reg.linear_flexible_trends(
             data=reg_data_5y,
@@ -82,6 +86,7 @@ def task_results_lm_outcomes_one_table(depends_on, produces):
             reform_type_dummy=False,
             partially_treated=True,
             partially_treated_trend=False,
+            compact=True,
         )
         results_5quad = reg.quadratic_flexible_trends(
             data=reg_data_5y,
@@ -89,6 +94,7 @@ def task_results_lm_outcomes_one_table(depends_on, produces):
             reform_type_dummy=False,
             partially_treated=True,
             partially_treated_trend=False,
+            compact=True,
         )
         results_10lin = reg.linear_flexible_trends(
             data=reg_data_10y,
@@ -96,6 +102,7 @@ def task_results_lm_outcomes_one_table(depends_on, produces):
             reform_type_dummy=False,
             partially_treated=True,
             partially_treated_trend=False,
+            compact=True,
         )
         results_10quad = reg.quadratic_flexible_trends(
             data=reg_data_10y,
@@ -103,10 +110,12 @@ def task_results_lm_outcomes_one_table(depends_on, produces):
             reform_type_dummy=False,
             partially_treated=True,
             partially_treated_trend=False,
+            compact=True,
         )
         results_10cub = reg.cubic_flexible_trends(
             data=reg_data_10y,
             y_var=y_var,
+            compact=True,
         )
 
         results_dict[y_var] = [
@@ -5,13 +5,13 @@ not corrected for acquiescence bias.
 
 """
 
-import pandas as pd
 import pytask
 
 from nc_skills_step_public import global_info as gl
 from nc_skills_step_public.analysis import analysis_RDD as reg
 from nc_skills_step_public.analysis import select_sample_for_analysis as sel
 from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.data_management import columnar_store as store
 from nc_skills_step_public.final import latex_tables_with_regression_results as tab
 
 
@@ -19,9 +19,11 @@ from nc_skills_step_public.final import latex_tables_with_regression_results as
     {
         "scripts": ["latex_tables_with_regression_results.py"],
         "reg_functions": SRC / "analysis" / "analysis_RDD.py",
+        "regression_record": SRC / "analysis" / "regression_record.py",
         "select_sample": SRC / "analysis" / "select_sample_for_analysis.py",
         "global_info": SRC / "global_info.py",
-        "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+        "columnar_store": SRC / "data_management" / "columnar_store.py",
+        "data": BLD / "python" / "data" / "step_reforms_final.parquet",
     },
 )
 @pytask.mark.produces(
@@ -62,7 +64,7 @@ def task_latex_results_not_abcorr(depends_on, produces):
         for var in gl.groups_of_dependent_variables["ncogn_skills"]
     }
 
-    data = pd.read_pickle(depends_on["data"])
+    data = store.read_analysis_data(depends_on["data"])
 
     # 3 years
     reg_data_3y = sel.select_sample_for_analysis(
@@ -93,6 +95,7 @@ def task_latex_results_not_abcorr(depends_on, produces):
             reform_type_dummy=False,
             partially_treated=True,
             partially_treated_trend=False,
+            compact=True,
         )
         results_3flex = reg.linear_flexible_trends(
             data=reg_data_3y,
@@ -100,6 +103,7 @@ def task_latex_results_not_abcorr(depends_on, produces):
             reform_type_dummy=False,
             partially_treated=True,
             partially_treated_trend=False,
+            compact=True,
         )
         results_5inf = reg.linear_inflexible_trends(
             data=reg_data_5y,
@@ -107,6 +111,7 @@ def task_latex_results_not_abcorr(depends_on, produces):
             reform_type_dummy=False,
             partially_treated=True,
             partially_treated_trend=False,
+            compact=True,
         )
         results_5flex = reg.linear_flexible_trends(
             data=reg_data_5y,
@@ -114,6 +119,7 @@ def task_latex_results_not_abcorr(depends_on, produces):
             reform_type_dummy=False,
             partially_treated=True,
             partially_treated_trend=False,
+            compact=True,
         )
         results_10inf = reg.linear_inflexible_trends(
             data=reg_data_10y,
@@ -121,6 +127,7 @@ def task_latex_results_not_abcorr(depends_on, produces):
             reform_type_dummy=False,
             partially_treated=True,
             partially_treated_trend=False,
+            compact=True,
         )
         results_10flex = reg.linear_flexible_trends(
             data=reg_data_10y,
@@ -128,6 +135,7 @@ def task_latex_results_not_abcorr(depends_on, produces):
             reform_type_dummy=False,
             partially_treated=True,
             partially_treated_trend=False,
+            compact=True,
         )
         results_10quad = reg.quadratic_flexible_trends(
             data=reg_data_10y,
@@ -135,6 +143,7 @@ def task_latex_results_not_abcorr(depends_on, produces):
             reform_type_dummy=False,
             partially_treated=True,
             partially_treated_trend=False,
+            compact=True,
         )
 
         results_dict[y_var] = [
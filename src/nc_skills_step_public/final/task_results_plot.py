@@ -1,12 +1,12 @@
 """Results figure for the paper."""
 
-import pandas as pd
 import pytask
 
 from nc_skills_step_public import global_info as gl
 from nc_skills_step_public.analysis import analysis_RDD as reg
 from nc_skills_step_public.analysis import select_sample_for_analysis as sel
 from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.data_management import columnar_store as store
 from nc_skills_step_public.final import plots as pl
 
 
@@ -16,7 +16,9 @@ from nc_skills_step_public.final import plots as pl
         "global_info": SRC / "global_info.py",
         "select_sample": SRC / "analysis" / "select_sample_for_analysis.py",
         "reg_functions": SRC / "analysis" / "analysis_RDD.py",
-        "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+        "regression_record": SRC / "analysis" / "regression_record.py",
+        "columnar_store": SRC / "data_management" / "columnar_store.py",
+        "data": BLD / "python" / "data" / "step_reforms_final.parquet",
     },
 )
 @pytask.mark.produces(BLD / "python" / "figures" / "results_figure_two_xaxis.png")
@@ -27,7 +29,7 @@ def task_results_plot_with_two_xaxis(depends_on, produces):
     binary data (risk and patience).
 
     """
-    data = pd.read_pickle(depends_on["data"])
+    data = store.read_analysis_data(depends_on["data"])
 
     results_list = []
 
@@ -60,6 +62,7 @@ def task_results_plot_with_two_xaxis(depends_on, produces):
             reform_type_dummy=False,
             partially_treated=True,
             partially_treated_trend=False,
+            compact=True,
         )
         results_list.append(results)
 
@@ -1,83 +1,119 @@
-"""Results figure for the paper leaving one reform out."""
+"""Results figure for the paper leaving one reform out.
+
+The pooled regression is aggregated to cells once per group of dependent variables.
+The results without each reform are then obtained by subtracting the cells of the
+reform from the pooled normal equations (see window_cube.leave_one_out), instead of
+reading the data and refitting once per reform.
+
+"""
 
 import pandas as pd
 import pytask
 
 from nc_skills_step_public import global_info as gl
-from nc_skills_step_public.analysis import analysis_RDD as reg
-from nc_skills_step_public.analysis import select_sample_for_analysis as sel
+from nc_skills_step_public.analysis import window_cube as wc
 from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.data_management import columnar_store as store
 from nc_skills_step_public.final import plots as pl
 
-for country_reform in gl.reforms_final:
-    kwargs = {
-        "group": country_reform,
-        "produces": BLD
-        / "python"
-        / "figures"
-        / "leave_one_out"
-        / f"results_figure_two_xaxis_leave_{country_reform}_out.png",
-    }
+GROUPS = ["ncogn_skills", "preferences_binary"]
 
-    @pytask.mark.depends_on(
-        {
-            "scripts": ["plots.py"],
-            "global_info": SRC / "global_info.py",
-            "select_sample": SRC / "analysis" / "select_sample_for_analysis.py",
-            "reg_functions": SRC / "analysis" / "analysis_RDD.py",
-            "data": BLD / "python" / "data" / "step_reforms_final.pkl",
-        },
-    )
-    @pytask.mark.task(id=country_reform, kwargs=kwargs)
-    def task_results_plot_with_two_xaxis_leave_one_out(depends_on, group, produces):
-        """Create figure with estimated coefficients and two x-axis.
+produces = {
+    country_reform: BLD
+    / "python"
+    / "figures"
+    / "leave_one_out"
+    / f"results_figure_two_xaxis_leave_{country_reform}_out.png"
+    for country_reform in gl.reforms_final
+}
+produces["estimates"] = BLD / "python" / "data" / "leave_one_out.csv"
 
-        One x-axis is for standardized data (personality and behaviors) and the other is
-        for binary data (risk and patience).
 
-        """
-        data = pd.read_pickle(depends_on["data"])
+@pytask.mark.depends_on(
+    {
+        "scripts": ["plots.py"],
+        "global_info": SRC / "global_info.py",
+        "select_sample": SRC / "analysis" / "select_sample_for_analysis.py",
+        "reg_functions": SRC / "analysis" / "analysis_RDD_direct.py",
+        "window_cube": SRC / "analysis" / "window_cube.py",
+        "columnar_store": SRC / "data_management" / "columnar_store.py",
+        "data": BLD / "python" / "data" / "step_reforms_final.parquet",
+    },
+)
+@pytask.mark.produces(produces)
+def task_results_plot_with_two_xaxis_leave_one_out(depends_on, produces):
+    """Create figures with estimated coefficients and two x-axis per left out reform.
 
-        # Leave one reform out
-        data = data.loc[data["country_reform"] != group]
+    One x-axis is for standardized data (personality and behaviors) and the other is
+    for binary data (risk and patience). The coefficients and standard errors of
+    treated without each reform and the jackknife standard errors are saved as well.
 
-        results_list = []
+    """
+    y_vars = [
+        y_var for group in GROUPS for y_var in gl.groups_of_dependent_variables[group]
+    ]
 
-        y_vars = (
-            gl.groups_of_dependent_variables["ncogn_skills"]
-            + gl.groups_of_dependent_variables["preferences_binary"]
-        )
-        data_subset_ncogn = sel.select_sample_for_analysis(
+    data = store.read_analysis_data(
+        depends_on["data"],
+        columns=[
+            "age",
+            "treated",
+            "partially_treated",
+            "rel_cohort",
+            "country_reform",
+            "country_reform_brth_year",
+            "siblings_age12",
+            *y_vars,
+        ],
+        reform_list=gl.reforms_final,
+    )
+
+    leave_one_out = {}
+    for group in GROUPS:
+        cube = wc.build_window_cube(
             data=data,
-            y_vars=gl.groups_of_dependent_variables["ncogn_skills"],
-            n_years=5,
+            y_vars=gl.groups_of_dependent_variables[group],
+            max_years=5,
             reform_list=gl.reforms_final,
         )
-        data_subset_pref = sel.select_sample_for_analysis(
-            data=data,
-            y_vars=gl.groups_of_dependent_variables["preferences_binary"],
+        leave_one_out[group] = wc.leave_one_out(
+            cube=cube,
             n_years=5,
-            reform_list=gl.reforms_final,
+            by="reform",
+            order=1,
+            reform_type_dummy=False,
+            partially_treated=True,
+            partially_treated_trend=False,
         )
 
-        for y_var in y_vars:
-            if y_var in gl.groups_of_dependent_variables["ncogn_skills"]:
-                data_subset = data_subset_ncogn
-            elif y_var in gl.groups_of_dependent_variables["preferences_binary"]:
-                data_subset = data_subset_pref
-
-            results = reg.linear_flexible_trends(
-                data=data_subset,
-                y_var=y_var,
-                reform_type_dummy=False,
-                partially_treated=True,
-                partially_treated_trend=False,
-            )
-            results_list.append(results)
+    estimates = []
+    for group, results in leave_one_out.items():
+        jackknife_se = wc.jackknife_variance(results, regressor="treated") ** 0.5
+        for country_reform, fits in results.items():
+            for y_var, result in fits.items():
+                estimates.append(
+                    {
+                        "left_out": country_reform,
+                        "y_var": y_var,
+                        "coef": result["params"]["treated"],
+                        "se": result["bse"]["treated"],
+                        "pvalue": result["pvalues"]["treated"],
+                        "nobs": result["nobs"],
+                        "jackknife_se": jackknife_se[y_var],
+                    },
+                )
+    pd.DataFrame(estimates).to_csv(produces["estimates"], index=False)
 
+    for country_reform in gl.reforms_final:
+        results_list = [
+            leave_one_out[group][country_reform][y_var]
+            for group in GROUPS
+            for y_var in gl.groups_of_dependent_variables[group]
+        ]
         fig = pl.coeff_plot_two_xaxis(
             results_list=results_list,
             nice_variable_names=gl.nice_variable_names,
             group_mapping=gl.nice_variable_names_to_broad_groups_mapping,
+            y_vars=y_vars,
         )
-        fig.write_image(produces, scale=2)
+        fig.write_image(produces[country_reform], scale=2)
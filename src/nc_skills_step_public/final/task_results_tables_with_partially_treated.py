@@ -4,14 +4,14 @@ Partially treated individuals are included. This file produces our main results.
 
 """
 
-import pandas as pd
 import pylatex as pl
 import pytask
 
 from nc_skills_step_public import global_info as gl
-from nc_skills_step_public.analysis import analysis_RDD as reg
-from nc_skills_step_public.analysis import select_sample_for_analysis as sel
-from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.analysis import results_warehouse as wh
+from nc_skills_step_public.analysis import window_cube as wc
+from nc_skills_step_public.config import BLD, RESULTS_WAREHOUSE, SRC
+from nc_skills_step_public.data_management import columnar_store as store
 from nc_skills_step_public.final import latex_tables_with_regression_results as tab
 
 for trend in "common_trend", "separate_trends":
@@ -38,22 +38,26 @@ for trend in "common_trend", "separate_trends":
                 / "with_partially_treated"
                 / trend
                 / f"results_with_partially_treated_{group}_tabular.tex",
-                "results_df": BLD
+                # Marker of the rows written to the results warehouse.
+                "warehouse": BLD
                 / "python"
-                / "data"
-                / "pvalues"
+                / "results"
+                / "with_partially_treated"
                 / trend
-                / f"pvalues_{group}.xlsx",
+                / f"results_with_partially_treated_{group}.json",
             },
         }
 
         @pytask.mark.depends_on(
             {
                 "scripts": ["latex_tables_with_regression_results.py"],
-                "reg_functions": SRC / "analysis" / "analysis_RDD.py",
+                "reg_functions": SRC / "analysis" / "analysis_RDD_direct.py",
+                "window_cube": SRC / "analysis" / "window_cube.py",
+                "results_warehouse": SRC / "analysis" / "results_warehouse.py",
                 "select_sample": SRC / "analysis" / "select_sample_for_analysis.py",
                 "global_info": SRC / "global_info.py",
-                "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+                "columnar_store": SRC / "data_management" / "columnar_store.py",
+                "data": BLD / "python" / "data" / "step_reforms_final.parquet",
             },
         )
         @pytask.mark.task(id=trend + "_" + group, kwargs=kwargs)
@@ -65,30 +69,16 @@ for trend in "common_trend", "separate_trends":
         ):
             """Latex tabular with regression results."""
             dep_vars = gl.groups_of_dependent_variables[group]
-            results_dict = {key: None for key in dep_vars}
             dep_var_names = {key: gl.nice_variable_names[key] for key in dep_vars}
 
-            data = pd.read_pickle(depends_on["data"])
+            data = store.read_analysis_data(depends_on["data"])
 
-            # 3 years
-            reg_data_3y = sel.select_sample_for_analysis(
-                data=data,
-                y_vars=dep_vars,
-                n_years=3,
-                reform_list=gl.reforms_final,
-            )
-            # 5 years
-            reg_data_5y = sel.select_sample_for_analysis(
+            # The 3, 5 and 10 year samples are nested: aggregate the 10 year sample to
+            # cells once and fit every column of the table from the cells.
+            cube = wc.build_window_cube(
                 data=data,
                 y_vars=dep_vars,
-                n_years=5,
-                reform_list=gl.reforms_final,
-            )
-            # 10 years
-            reg_data_10y = sel.select_sample_for_analysis(
-                data=data,
-                y_vars=dep_vars,
-                n_years=10,
+                max_years=10,
                 reform_list=gl.reforms_final,
             )
 
@@ -97,63 +87,43 @@ for trend in "common_trend", "separate_trends":
             elif trend == "separate_trends":
                 trend_boolean = True
 
-            for y_var in dep_vars:
-                results_3lin = reg.linear_flexible_trends(
-                    data=reg_data_3y,
-                    y_var=y_var,
-                    reform_type_dummy=False,
-                    partially_treated=True,
-                    partially_treated_trend=trend_boolean,
-                )
-                results_3quad = reg.quadratic_flexible_trends(
-                    data=reg_data_3y,
-                    y_var=y_var,
-                    reform_type_dummy=False,
-                    partially_treated=True,
-                    partially_treated_trend=trend_boolean,
-                )
-                results_5lin = reg.linear_flexible_trends(
-                    data=reg_data_5y,
-                    y_var=y_var,
-                    reform_type_dummy=False,
-                    partially_treated=True,
-                    partially_treated_trend=trend_boolean,
-                )
-                results_5quad = reg.quadratic_flexible_trends(
-                    data=reg_data_5y,
-                    y_var=y_var,
-                    reform_type_dummy=False,
-                    partially_treated=True,
-                    partially_treated_trend=trend_boolean,
-                )
-                results_10lin = reg.linear_flexible_trends(
-                    data=reg_data_10y,
-                    y_var=y_var,
-                    reform_type_dummy=False,
-                    partially_treated=True,
-                    partially_treated_trend=trend_boolean,
-                )
-                results_10quad = reg.quadratic_flexible_trends(
-                    data=reg_data_10y,
-                    y_var=y_var,
-                    reform_type_dummy=False,
-                    partially_treated=True,
-                    partially_treated_trend=trend_boolean,
-                )
-                results_10cub = reg.cubic_flexible_trends(
-                    data=reg_data_10y,
-                    y_var=y_var,
-                )
+            # The cubic specification has no separate trend for partially treated (see
+            # analysis_RDD.cubic_flexible_trends).
+            fits, seconds = zip(
+                *[
+                    wh.timed(
+                        wc.fit_window,
+                        cube=cube,
+                        n_years=n_years,
+                        order=order,
+                        reform_type_dummy=False,
+                        partially_treated=True,
+                        partially_treated_trend=trend_boolean if order < 3 else False,
+                    )
+                    for n_years, order in gl.main_table_columns
+                ],
+            )
+            results_dict = {y_var: [fit[y_var] for fit in fits] for y_var in dep_vars}
 
-                results_dict[y_var] = [
-                    results_5lin,
-                    results_5quad,
-                    results_3lin,
-                    results_3quad,
-                    results_10lin,
-                    results_10quad,
-                    results_10cub,
-                ]
+            # Store the estimates, e.g. for Multiple Hypothesis Testing correction.
+            fingerprint = store.read_fingerprint(depends_on["data"])
+            rows = []
+            for y_var in dep_vars:
+                keys = wh.main_results_keys([y_var], gl.main_table_columns, trend)
+                for (_, specification, sample), fit, fit_seconds in zip(
+                    keys,
+                    fits,
+                    seconds,
+                ):
+                    rows += wh.result_rows(
+                        result=fit[y_var],
+                        outcome=y_var,
+                        specification=specification,
+                        sample=sample,
+                        fingerprint=fingerprint,
+                        seconds=fit_seconds,
+                    )
+            wh.write_rows(RESULTS_WAREHOUSE, rows, marker=produces["warehouse"])
 
             column_headers = [
                 "lin",
@@ -212,17 +182,3 @@ for trend in "common_trend", "separate_trends":
                     version=4,
                     gen_pdf=False,
                 )
-
-            # Export coeffs and p-values for Multiple Hypothesis Testing correction.
-            results_df = pd.DataFrame()
-
-            for key in results_dict:
-                for i in range(len(results_dict[key])):
-                    results_df.loc[key + "_" + str(i), "params"] = results_dict[key][
-                        i
-                    ].params["treated"]
-                    results_df.loc[key + "_" + str(i), "pvalues"] = results_dict[key][
-                        i
-                    ].pvalues["treated"]
-
-            results_df.to_excel(produces["results_df"], index=True, header=False)
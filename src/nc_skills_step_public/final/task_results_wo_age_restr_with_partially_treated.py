@@ -5,7 +5,6 @@ included.
 
 """
 
-import pandas as pd
 import pylatex as pl
 import pytask
 
@@ -13,6 +12,7 @@ from nc_skills_step_public import global_info as gl
 from nc_skills_step_public.analysis import analysis_RDD as reg
 from nc_skills_step_public.analysis import select_sample_for_analysis as sel
 from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.data_management import columnar_store as store
 from nc_skills_step_public.final import latex_tables_with_regression_results as tab
 
 for group in gl.groups_of_dependent_variables:
@@ -44,9 +44,11 @@ for group in gl.groups_of_dependent_variables:
         {
             "scripts": ["latex_tables_with_regression_results.py"],
             "reg_functions": SRC / "analysis" / "analysis_RDD.py",
+            "regression_record": SRC / "analysis" / "regression_record.py",
             "select_sample": SRC / "analysis" / "select_sample_for_analysis.py",
             "global_info": SRC / "global_info.py",
-            "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+            "columnar_store": SRC / "data_management" / "columnar_store.py",
+            "data": BLD / "python" / "data" / "step_reforms_final.parquet",
         },
     )
     @pytask.mark.task(id=group, kwargs=kwargs)
@@ -60,7 +62,7 @@ for group in gl.groups_of_dependent_variables:
         results_dict = {key: None for key in dep_vars}
         dep_var_names = {key: gl.nice_variable_names[key] for key in dep_vars}
 
-        data = pd.read_pickle(depends_on["data"])
+        data = store.read_analysis_data(depends_on["data"])
 
         # 3 years
         reg_data_3y = sel.select_sample_for_robustness_check_wo_age_restriction(
@@ -91,6 +93,7 @@ for group in gl.groups_of_dependent_variables:
                 reform_type_dummy=False,
                 partially_treated=True,
                 partially_treated_trend=False,
+                compact=True,
             )
             results_3quad = reg.quadratic_flexible_trends(
                 data=reg_data_3y,
@@ -98,6 +101,7 @@ for group in gl.groups_of_dependent_variables:
                 reform_type_dummy=False,
                 partially_treated=True,
                 partially_treated_trend=False,
+                compact=True,
             )
             results_5lin = reg.linear_flexible_trends(
                 data=reg_data_5y,
@@ -105,6 +109,7 @@ for group in gl.groups_of_dependent_variables:
                 reform_type_dummy=False,
                 partially_treated=True,
                 partially_treated_trend=False,
+                compact=True,
             )
             results_5quad = reg.quadratic_flexible_trends(
                 data=reg_data_5y,
@@ -112,6 +117,7 @@ for group in gl.groups_of_dependent_variables:
                 reform_type_dummy=False,
                 partially_treated=True,
                 partially_treated_trend=False,
+                compact=True,
             )
             results_10lin = reg.linear_flexible_trends(
                 data=reg_data_10y,
@@ -119,6 +125,7 @@ for group in gl.groups_of_dependent_variables:
                 reform_type_dummy=False,
                 partially_treated=True,
                 partially_treated_trend=False,
+                compact=True,
             )
             results_10quad = reg.quadratic_flexible_trends(
                 data=reg_data_10y,
@@ -126,10 +133,12 @@ for group in gl.groups_of_dependent_variables:
                 reform_type_dummy=False,
                 partially_treated=True,
                 partially_treated_trend=False,
+                compact=True,
             )
             results_10cub = reg.cubic_flexible_trends(
                 data=reg_data_10y,
                 y_var=y_var,
+                compact=True,
             )
 
             results_dict[y_var] = [
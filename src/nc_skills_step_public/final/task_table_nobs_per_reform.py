@@ -6,6 +6,8 @@ import pytask
 from nc_skills_step_public import global_info as gl
 from nc_skills_step_public.analysis import select_sample_for_analysis as sel
 from nc_skills_step_public.config import BLD, SRC
+from nc_skills_step_public.data_management import columnar_store as store
+from nc_skills_step_public.data_management import compact_schema as schema
 
 reform_names = {
     "Ghana1961": "Ghana 1961",
@@ -18,7 +20,9 @@ reform_names = {
 
 @pytask.mark.depends_on(
     {
-        "data": BLD / "python" / "data" / "step_reforms_final.pkl",
+        "columnar_store": SRC / "data_management" / "columnar_store.py",
+        "compact_schema": SRC / "data_management" / "compact_schema.py",
+        "data": BLD / "python" / "data" / "step_reforms_final.parquet",
         "select_sample": SRC / "analysis" / "select_sample_for_analysis.py",
         "global_info": SRC / "global_info.py",
     },
@@ -35,8 +39,8 @@ reform_names = {
 )
 def task_tex_table_with_nobs_per_reform(depends_on, produces):
     """Create a tex table with number of observations per reform."""
-    data = pd.read_pickle(depends_on["data"])
-    data_to_use = data.query("age > 23").copy()
+    data = store.read_analysis_data(depends_on["data"])
+    data_to_use = schema.to_model_dtypes(data.query("age > 23"))
 
     # 5 years
     data_5y = data_to_use[data_to_use["rel_cohort"].isin(range(-5, 5))].copy()
@@ -125,3 +125,25 @@ PCA_dependent_variables = [
 ]
 
 placebo_years = {-6: "0", -5: "1", 5: "2", 6: "3", 7: "4"}
+
+######### RANDOMIZATION INFERENCE ########
+n_randomization_draws = 2000
+randomization_seed = 20230615
+n_bootstrap_draws = 9999
+
+######### DATA PREPARATION ########
+stage_cache_max_bytes = 2 * 1024**3
+# If True, the countries are prepared in parallel (see sharded_preparation.py). This
+# bounds the memory to about one country per process, but the shards bypass the stage
+# cache. If False, the steps run on the merged data and unchanged steps are loaded from
+# the stage cache (see data_management/stage_cache.py).
+prepare_STEP_data_in_shards = False
+
+######### OPTIMAL BANDWIDTH ########
+# "rdbwselect" (rdrobust) or "cells" (native selector for the discrete running
+# variable, see analysis/cct_bandwidth.py).
+bandwidth_selector = "rdbwselect"
+
+######### MAIN RESULTS ########
+# (years, order) of the columns of the main results tables.
+main_table_columns = [(5, 1), (5, 2), (3, 1), (3, 2), (10, 1), (10, 2), (10, 3)]